@@ -1,6 +1,8 @@
 import OpenGL.GL as GL
 import numpy as np
 
+from core.utils import Utils
+
 class HUD:
     def __init__(self):
         self.vao = GL.glGenVertexArrays(1)
@@ -43,7 +45,6 @@ class HUD:
     def create_shader_program(self):
         # Vertex shader
         vertex_shader_source = """
-        #version 330 core
         layout(location = 0) in vec3 position;
         layout(location = 1) in vec3 color;
         out vec3 fragColor;
@@ -52,46 +53,17 @@ class HUD:
             fragColor = color;
         }
         """
-        vertex_shader = GL.glCreateShader(GL.GL_VERTEX_SHADER)
-        GL.glShaderSource(vertex_shader, vertex_shader_source)
-        GL.glCompileShader(vertex_shader)
-
-        # Check for compilation errors
-        if not GL.glGetShaderiv(vertex_shader, GL.GL_COMPILE_STATUS):
-            raise Exception(GL.glGetShaderInfoLog(vertex_shader))
 
         # Fragment shader
         fragment_shader_source = """
-        #version 330 core
         in vec3 fragColor;
         out vec4 color;
         void main() {
             color = vec4(fragColor, 1.0);
         }
         """
-        fragment_shader = GL.glCreateShader(GL.GL_FRAGMENT_SHADER)
-        GL.glShaderSource(fragment_shader, fragment_shader_source)
-        GL.glCompileShader(fragment_shader)
-
-        # Check for compilation errors
-        if not GL.glGetShaderiv(fragment_shader, GL.GL_COMPILE_STATUS):
-            raise Exception(GL.glGetShaderInfoLog(fragment_shader))
-
-        # Link shaders to create the program
-        shader_program = GL.glCreateProgram()
-        GL.glAttachShader(shader_program, vertex_shader)
-        GL.glAttachShader(shader_program, fragment_shader)
-        GL.glLinkProgram(shader_program)
-
-        # Check for linking errors
-        if not GL.glGetProgramiv(shader_program, GL.GL_LINK_STATUS):
-            raise Exception(GL.glGetProgramInfoLog(shader_program))
-
-        # Clean up shaders as they are now linked into the program
-        GL.glDeleteShader(vertex_shader)
-        GL.glDeleteShader(fragment_shader)
-
-        return shader_program
+        # Compiled and linked (or loaded from the program binary cache) as every material is
+        return Utils.initialize_program(vertex_shader_source, fragment_shader_source)
 
     def update_boost_vertices(self, new_vertices):
         updated_vertices = []
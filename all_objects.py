@@ -1,13 +1,19 @@
 import math
 import random
-import time
-import OpenGL.GL as GL
+import numpy as np
 
 from constants import *
+from core.matrix import Matrix
+from core_ext.asset_loader import AssetLoader
+from core_ext.instanced_mesh import InstancedMesh
+from core_ext.entity_store import EntityStore
 from core_ext.mesh import Mesh
-from core_ext.texture import Texture
+from core_ext.static_batcher import StaticBatcher
+from core_ext.texture_cache import TextureCache
 from geometry.circleGeometry import CircleGeometry
+from geometry.decimate import Decimator
 from geometry.ellipsoid import EllipsoidGeometry
+from geometry.geometry_cache import GeometryCache
 from geometry.objGeo import ObjGeo
 from geometry.rectangle import RectangleGeometry
 from geometry.sphere import SphereGeometry
@@ -21,6 +27,20 @@ from extras.movement_rig import MovementRig
 # Add the vertex_shader_code and fragment_shader_code here
 
 class ObjectCreator:
+    # OBJ models, the models drawn with levels of detail (generated on the first run),
+    # images of TextureMaterial textures (bottom row first) and of LambertMaterial
+    # textures (top row first); loaded ahead of the constructor by AssetLoader, see asset_list()
+    MODEL_FILE_LIST = ["models/boost.obj", "models/bola_praia.obj", "models/jetSki.obj",
+                       "models/umbrella.obj", "models/ring.obj", "models/goal.obj"]
+    LOD_MODEL_FILE_LIST = ["models/boost.obj", "models/umbrella.obj", "models/ring.obj", "models/goal.obj"]
+    TEXTURE_FILE_LIST = ["images/sky.jpg", "images/sea2.jpg", "images/labels.png",
+                         "images/umbrella.jpg", "images/ring0.jpg", "images/field_wall0.png"]
+    MATERIAL_TEXTURE_FILE_LIST = ["images/boost0.jpg", "images/texture.png",
+                                  "images/jetSki_azul.jpg", "images/jetSki_red.jpg"]
+    # Texture coordinates (u start, u end) of each label in images/labels.png (1854 pixels wide);
+    # the labels share that texture, so static labels are merged into one mesh
+    LABEL_U_RANGE_DICT = {"red": (8 / 1854, 790 / 1854), "blue": (806 / 1854, 1846 / 1854)}
+
     def __init__(self, example):
         self.vertex_shader_code = """
         uniform mat4 projectionMatrix;
@@ -47,29 +67,77 @@ class ObjectCreator:
         self.white_material = Material(self.vertex_shader_code, self.fragment_shader_code)
         self.white_material.add_uniform("vec3", "baseColor", [0.3, 0.3, 0.3])  # White color
         self.white_material.locate_uniforms()
+        # The fragment shader writes an alpha of 0.8
+        self.white_material.set_properties({"transparent": True})
         self.example = example
+        # Animated entities (spectators, field elements, boost boxes); rows are bound to their rigs or instances
+        self.entities = EntityStore()
         self.spheres = []
         self.field_elements = []
         self.create_objects()
         self.create_field()
+        self.field_rows = self.entities.add([element.local_position for element in self.field_elements],
+                                            frequency=FIELD_JUMP_FREQUENCY, amplitude=FIELD_JUMP_AMPLITUDE,
+                                            base_height=GROUND, node_list=self.field_elements)
         self.create_contoured_invisible_walls()
         self.create_hitboxGoals()
         if not LOW_SPEC:
             self.create_field_spheres(spacing = 7, offset = 1)
             self.create_field_spheres(spacing = 12, offset = 3)
-        self.ball_velocity = [0, 0, 0]  # Initialize ball velocity
         self.boost_boxes = []  # List to store boost boxes
-        self.box_geometry = ObjGeo('models/boost.obj')
+        self.box_geometry = GeometryCache.get(ObjGeo, 'models/boost.obj')
         self.box_material = LambertMaterial(
             texture_path = "images/boost0.jpg"
         )
-        self.circle_geometry = EllipsoidGeometry(width=0.3, height=0.01, depth=0.3, radius_segments=16, height_segments=2)
-        self.boost_circle_geometry = EllipsoidGeometry(width=0.7, height=0.01, depth=0.7, radius_segments=16, height_segments=2)
+        self.circle_geometry = GeometryCache.get(EllipsoidGeometry, width=0.3, height=0.01, depth=0.3,
+                                                 radius_segments=16, height_segments=2)
+        self.boost_circle_geometry = GeometryCache.get(EllipsoidGeometry, width=0.7, height=0.01, depth=0.7,
+                                                       radius_segments=16, height_segments=2)
         self.circle_material = self.white_material  # Use white color material
+        # Merge the meshes marked static (walls, goal hitboxes; labels, goals and umbrellas
+        # under LOW_SPEC) into one mesh per material
+        self.static_batches = StaticBatcher.batch(self.example.scene)
+
+
+    @staticmethod
+    def asset_list():
+        """ Every model and image file of the level, in the form of AssetLoader.start """
+        level_list = range(1, len(Decimator.RATIO_LIST) + 1)
+        return [(AssetLoader.MODEL, filename) for filename in ObjectCreator.MODEL_FILE_LIST] \
+            + [(AssetLoader.MODEL_LEVEL, filename, level)
+               for filename in ObjectCreator.LOD_MODEL_FILE_LIST for level in level_list] \
+            + [(AssetLoader.IMAGE, filename, True) for filename in ObjectCreator.TEXTURE_FILE_LIST] \
+            + [(AssetLoader.IMAGE, filename, False) for filename in ObjectCreator.MATERIAL_TEXTURE_FILE_LIST]
+
+    @staticmethod
+    def add_obj_levels(mesh, filename, distance_list):
+        """
+        Add the lower levels of detail of an OBJ model to a mesh, from the given
+        distances; levels not generated yet (see AssetLoader) are generated here
+        """
+        for level, distance in enumerate(distance_list, start=1):
+            level_filename = Decimator.ensure_level(filename, level, ObjGeo.parse_obj)
+            level_geometry = GeometryCache.get(ObjGeo, level_filename)
+            mesh.add_level(level_geometry, distance)
+            # The mesh holds its own reference, released with the mesh
+            GeometryCache.release(level_geometry)
+
+    @staticmethod
+    def add_static_or_levels(mesh, filename, distance_list):
+        """
+        Field elements only bob up and down when not LOW_SPEC. Otherwise they never move,
+        so they are marked static and merged by StaticBatcher; a merged mesh is drawn
+        with one geometry, so they get no levels of detail then.
+        """
+        if LOW_SPEC:
+            mesh.static = True
+        else:
+            ObjectCreator.add_obj_levels(mesh, filename, distance_list)
 
-
-    def create_boost_box(self):
+    def create_boost_box(self, position):
+        """ Add the models of a boost box at position [x, y, z]; return its rig and the rig of its circle """
         boost_box_mesh = Mesh(self.box_geometry, self.box_material)
+        self.add_obj_levels(boost_box_mesh, 'models/boost.obj', [20, 40])
         boost_box_rig = MovementRig()
         boost_box_rig.add(boost_box_mesh)
 
@@ -78,31 +146,66 @@ class ObjectCreator:
         boost_circle_rig.add(boost_circle)
         
         # Set the position and scale using the rig
-        random_x = random.uniform(-FIELD_WIDTH / 2 + FIELD_WIDTH_OFFSET, FIELD_WIDTH / 2 - FIELD_WIDTH_OFFSET)
-        random_z = random.uniform(-FIELD_LENGTH / 2 + FIELD_LENGTH_OFFSET, FIELD_LENGTH / 2 - FIELD_LENGTH_OFFSET)
-        boost_box_rig.set_position([random_x, 0.8, random_z])
-        boost_circle_rig.set_position([random_x, 0.1, random_z])
+        boost_box_rig.set_position([position[0], 0.8, position[2]])
+        boost_circle_rig.set_position([position[0], 0.1, position[2]])
         boost_box_rig.scale(0.015)  # Adjust this value to scale the boost box appropriately
 
-        self.boost_boxes.append((boost_box_rig, boost_circle_rig, random.uniform(0.5, 2.0)))  # Add boost box rig with a random frequency
+        # Add boost box rig with its row in the entity store, which has a random frequency
+        box_row = self.entities.add(boost_box_rig.local_position, frequency=random.uniform(0.5, 2.0),
+                                    amplitude=BOOST_JUMP_AMPLITUDE, base_height=BOOST_GROUND,
+                                    node_list=[boost_box_rig])
+        self.boost_boxes.append((boost_box_rig, boost_circle_rig, box_row))
         self.example.scene.add(boost_box_rig)
         self.example.scene.add(boost_circle_rig)
+        return boost_box_rig, boost_circle_rig
 
     def remove_box(self, box_rig, boost_circle_rig):
-        self.boost_boxes = [box for box in self.boost_boxes if box[0] != box_rig]
+        for box in self.boost_boxes:
+            if box[0] is box_rig:
+                self.entities.remove(box[2])
+        self.boost_boxes = [box for box in self.boost_boxes if box[0] is not box_rig]
         self.example.scene.remove(box_rig)
         self.example.scene.remove(boost_circle_rig)
+        # Free the VAOs; the shared geometries stay alive for the next boxes
+        for rig in [box_rig, boost_circle_rig]:
+            for node in rig.descendant_list:
+                if isinstance(node, Mesh):
+                    node.release()
+
+    def create_labels(self):
+        """ Red and blue labels over the goals, both drawn with one material """
+        label_material = TextureMaterial(
+            texture=TextureCache.get("images/labels.png"),
+            property_dict={"transparent": True}
+        )
+        self.red = self.create_label(label_material, "red", [0, 9, -55])
+        self.blue = self.create_label(label_material, "blue", [0, 9, 55])
+
+    def create_label(self, material, name, position):
+        """ Add a label drawn with its part of images/labels.png at position [x, y, z] """
+        geometry = RectangleGeometry(width=1000, height=1000)
+        u_start, u_end = ObjectCreator.LABEL_U_RANGE_DICT[name]
+        uv_attribute = geometry.attribute_dict["vertexUV"]
+        uv_attribute.data = uv_attribute.data * [u_end - u_start, 1] + [u_start, 0]
+        uv_attribute.upload_data()
+        label = Mesh(geometry, material)
+        # Labels that never turn (see Main.update) are merged by StaticBatcher
+        label.static = not LABELS_TURN
+        label.scale(0.006)
+        label.set_position(position)
+        self.example.scene.add(label)
+        return label
 
     def create_objects(self):
         sky_geometry = SphereGeometry(radius=200)
-        sky_material = TextureMaterial(texture=Texture(file_name="images/sky.jpg"))
+        sky_material = TextureMaterial(texture=TextureCache.get("images/sky.jpg"))
         sky = Mesh(sky_geometry, sky_material)
         self.example.scene.add(sky)
 
         sea_geometry = RectangleGeometry(width=500, height=500)
         if not LOW_SPEC:
             sea_material = TextureMaterial(
-                texture=Texture(file_name="images/sea2.jpg"),
+                texture=TextureCache.get("images/sea2.jpg"),
                 property_dict={"repeatUV": [25, 25]}
             )
         else:
@@ -113,60 +216,40 @@ class ObjectCreator:
         sea.rotate_x(-math.pi / 2)
         self.example.scene.add(sea)
 
-        red_geometry = RectangleGeometry(width=1000, height=1000)
-        red_material = TextureMaterial(
-            texture=Texture(file_name="images/red.png"),
-        )
-        self.red = Mesh(red_geometry, red_material)
-        self.red.scale(0.006)
-        self.red.set_position([0,9,-55])
-        self.example.scene.add(self.red)
-
-        blue_geometry = RectangleGeometry(width=1000, height=1000)
-        blue_material = TextureMaterial(
-            texture=Texture(file_name="images/blue.png"),
-        )
-        self.blue = Mesh(blue_geometry, blue_material)
-        self.blue.scale(0.006)
-        self.blue.set_position([0,9,55])
-        self.example.scene.add(self.blue)
-
+        self.create_labels()
 
-        geometryball = ObjGeo('models/bola_praia.obj')
+        geometryball = GeometryCache.get(ObjGeo, 'models/bola_praia.obj')
         materialball = LambertMaterial(
             texture_path = "images/texture.png"
         )
         # materialball = TextureMaterial(texture=Texture(file_name="images/texture.png"))
         self.meshball = Mesh(geometryball, materialball)
-        self.ball = MovementRig()
+        # The rigs of the ball and jet skis belong to the match simulation
+        match_state = self.example.match.state
+        self.ball = match_state.ball.rig
         self.ball.add(self.meshball)
-        self.ball.scale(0.3)
-        self.ball.set_position(BALL_START_POSITION)
         self.example.scene.add(self.ball)
 
-        jetSki_geometry = ObjGeo('models/jetSki.obj')
+        jetSki_geometry = GeometryCache.get(ObjGeo, 'models/jetSki.obj')
         jetSki_material = LambertMaterial(
             texture_path = "images/jetSki_azul.jpg"
         )
         self.jetSki_mesh = Mesh(jetSki_geometry, jetSki_material)
-        self.jetSki = MovementRig()
+        self.jetSki = match_state.jet_ski.rig
         self.jetSki.add(self.jetSki_mesh)
-        self.jetSki.rotate_y((math.pi) * 1.5)
-        self.jetSki.set_position(PLAYER_START_POSITION)  # Adjust position as needed
         self.example.scene.add(self.jetSki)   
 
         opponent_material = LambertMaterial(
             texture_path = "images/jetSki_red.jpg"
         )
         self.opponent_mesh = Mesh(jetSki_geometry, opponent_material)
-        self.opponent = MovementRig()
+        self.opponent = match_state.opponent.rig
         self.opponent.add(self.opponent_mesh)
-        self.opponent.rotate_y((math.pi) / 2 )
-        self.opponent.set_position(OPPONENT_START_POSITION)  # Adjust position as needed
         self.example.scene.add(self.opponent)   
 
         # Create and add the circle
-        circle_geometry = EllipsoidGeometry(width=0.3, height=0.01, depth=0.3, radius_segments=16, height_segments=2)
+        circle_geometry = GeometryCache.get(EllipsoidGeometry, width=0.3, height=0.01, depth=0.3,
+                                            radius_segments=16, height_segments=2)
         circle_material = self.white_material  # Use white color material
         self.circle_ball = Mesh(circle_geometry, circle_material)
         self.example.scene.add(self.circle_ball)
@@ -178,17 +261,18 @@ class ObjectCreator:
         ball_pos = self.ball.get_position()
         self.circle_ball.set_position([ball_pos[0], 0.1, ball_pos[2]])
 
-    def update_sine_wave_field(self):
-        for field_element in self.field_elements:
-            original_position = field_element.global_position
-            new_y = GROUND + FIELD_JUMP_AMPLITUDE * math.sin(FIELD_JUMP_FREQUENCY * time.time())
-            field_element.set_position([original_position[0], new_y, original_position[2]])
+    def update_entities(self, time):
+        """ Bob spectators, field elements and boost boxes up and down """
+        self.entities.oscillate(time)
+        self.entities.write_back()
+        for spectators, rows in self.spheres:
+            spectators.set_instance_positions(self.entities.position[rows])
 
     def create_field(self, goal_width=20, goal_depth=10):
 
         # Umbrella setup with increased scale
-        umbrella_geometry = ObjGeo('models/umbrella.obj')
-        umbrella_texture = Texture(file_name="images/umbrella.jpg")
+        umbrella_geometry = GeometryCache.get(ObjGeo, 'models/umbrella.obj')
+        umbrella_texture = TextureCache.get("images/umbrella.jpg")
         umbrella_material = TextureMaterial(texture=umbrella_texture)
         umbrella_scale = 3  # Increased scale for umbrellas
 
@@ -203,6 +287,7 @@ class ObjectCreator:
         # Create and place scaled umbrellas at each corner
         for pos in corner_positions:
             umbrella_mesh = Mesh(umbrella_geometry, umbrella_material)
+            self.add_static_or_levels(umbrella_mesh, 'models/umbrella.obj', [30, 60])
             umbrella = MovementRig()
             umbrella.add(umbrella_mesh)
             umbrella.set_position(pos)
@@ -211,10 +296,12 @@ class ObjectCreator:
             self.field_elements.append(umbrella)
 
         # Ring setup with precise placement
-        ring_geometry = ObjGeo('models/ring.obj')
-        ring_texture = Texture(file_name="images/ring0.jpg")
-        ring_material = TextureMaterial(texture=ring_texture)
+        ring_geometry = GeometryCache.get(ObjGeo, 'models/ring.obj')
+        ring_texture = TextureCache.get("images/ring0.jpg")
+        ring_material = TextureMaterial(texture=ring_texture, use_instancing=True)
         ring_scale = 0.05  # Smaller scale for rings
+        # All rings are drawn as instances of a single mesh
+        ring_matrices = []
 
         # Centered gap calculation for goals based on the new goal width
         center_x = 0
@@ -238,27 +325,26 @@ class ObjectCreator:
             x_position = -FIELD_WIDTH / 2 + i * ring_spacing_width
             if not (gap_start < x_position < gap_end):  # Ensure rings are placed outside the goal gap
                 for z_position in [-FIELD_LENGTH / 2, FIELD_LENGTH / 2]:
-                    ring_mesh = Mesh(ring_geometry, ring_material)
-                    ring = MovementRig()
-                    ring.add(ring_mesh)
-                    ring.scale(ring_scale)
-                    ring.set_position([x_position, 0, z_position])
-                    self.example.scene.add(ring)
-                    self.field_elements.append(ring)
+                    ring_matrices.append(Matrix.make_translation(x_position, 0, z_position)
+                                         @ Matrix.make_scale(ring_scale))
 
         # Place rings along the length on both sides of the field, ensuring they do not extend beyond field ends
         for i in range(num_rings_length):
             z_position = -FIELD_LENGTH / 2 + i * ring_spacing_length
             if -FIELD_LENGTH / 2 < z_position < FIELD_LENGTH / 2:  # Ensure rings do not extend beyond field ends
                 for x_position in [-FIELD_WIDTH / 2, FIELD_WIDTH / 2]:
-                    ring_mesh = Mesh(ring_geometry, ring_material)
-                    ring_mesh.scale(ring_scale)
-                    ring_mesh.set_position([x_position, 0, z_position])
-                    self.example.scene.add(ring_mesh)
-                    self.field_elements.append(ring_mesh)
+                    ring_matrices.append(Matrix.make_translation(x_position, 0, z_position)
+                                         @ Matrix.make_scale(ring_scale))
+
+        # The whole set of rings moves up and down together with the other field elements
+        rings = InstancedMesh(ring_geometry, ring_material, ring_matrices)
+        # Each ring picks its own level of detail
+        self.add_obj_levels(rings, 'models/ring.obj', [15, 40])
+        self.example.scene.add(rings)
+        self.field_elements.append(rings)
 
         # Goal setup with dynamic dimensions
-        goal_geometry = ObjGeo('models/goal.obj')
+        goal_geometry = GeometryCache.get(ObjGeo, 'models/goal.obj')
         goal_material = self.white_material  # Use white color material
 
         # Assumptions about original model dimensions (update these if you know the exact dimensions)
@@ -277,6 +363,7 @@ class ObjectCreator:
 
         for idx, pos in enumerate(goal_positions):
             goal_mesh = Mesh(goal_geometry, goal_material)
+            self.add_static_or_levels(goal_mesh, 'models/goal.obj', [40, 80])
             goal_mesh.scale(goal_scale_x, 10, goal_scale_z)  # Apply non-uniform scaling
             goal_mesh.set_position(pos)
             goal_mesh.rotate_y(math.pi if idx == 0 else 0)  # Rotate goals correctly, simplifying rotation
@@ -286,12 +373,11 @@ class ObjectCreator:
 
     def create_contoured_invisible_walls(self):
         wall_thickness = 5  # More reasonable thickness for the walls
-        exclusion_zone_width = 20  # Width of the exclusion zone around each goal
         scale_factor = 20.0  # Fator de escala para "diminuir" a imagem e repetir a textura
 
         # Criando o material para as paredes com a textura repetida
-        wall_texture = Texture(file_name="images/field_wall0.png", property_dict={"wrap": GL.GL_REPEAT})
-        wall_material = TextureMaterial(texture=wall_texture)
+        wall_texture = TextureCache.get("images/field_wall0.png")
+        wall_material = TextureMaterial(texture=wall_texture, property_dict={"transparent": True})
         wall_material.visible = True
 
         # Initialize the list of walls
@@ -318,14 +404,11 @@ class ObjectCreator:
         # Loop to add horizontal and vertical walls
         for i, geom in enumerate(horizontal_walls):
             wall_mesh = Mesh(geom, wall_material)
+            wall_mesh.static = True
             wall_mesh.set_position(wall_positions[i])
-            if i < 2:  # Horizontal walls
-                wall_mesh.bounds = ([-FIELD_WIDTH / 2 + exclusion_zone_width, FIELD_WIDTH / 2 - exclusion_zone_width],
-                                    [-FIELD_LENGTH / 2, FIELD_LENGTH / 2])  # Fixed bounds for horizontal
-            else:  # Behind Goal walls
+            # Collision bounds of the walls are part of the match simulation (WALL_PLANES)
+            if i >= 2:  # Behind Goal walls
                 wall_mesh.rotate_y(-math.pi / 2) #rotate 90 degreas
-                wall_mesh.bounds = ([-FIELD_WIDTH / 2, FIELD_WIDTH / 2],
-                                    [-FIELD_LENGTH / 2 + wall_thickness, FIELD_LENGTH / 2 - wall_thickness])  # Fixed bounds for vertical
             self.example.scene.add(wall_mesh)
             self.walls.append(wall_mesh)
 
@@ -334,8 +417,8 @@ class ObjectCreator:
         wall_thickness = 5
         scale_factor = 20.0
 
-        hitBoxes_texture = Texture(file_name="images/field_wall0.png", property_dict={"wrap": GL.GL_REPEAT})
-        hitBoxes_material = TextureMaterial(texture=hitBoxes_texture)
+        hitBoxes_texture = TextureCache.get("images/field_wall0.png")
+        hitBoxes_material = TextureMaterial(texture=hitBoxes_texture, property_dict={"transparent": True})
         hitBoxes_material.visible = True
 
         self.hitBoxes = []
@@ -352,62 +435,52 @@ class ObjectCreator:
 
         for i, geom in enumerate(hitBoxesWalls):
             hitBoxes_mesh = Mesh(geom, hitBoxes_material)
+            hitBoxes_mesh.static = True
+            # Scoring is checked by the match simulation (GOAL_BOUNDS)
             hitBoxes_mesh.set_position(hitBoxes_positions[i])
-
-            pos_x, pos_y, pos_z = hitBoxes_positions[i]
-            width = 16 / 2
-            height = 8 / 2
-
-            hitBoxes_mesh.bounds = (
-                [pos_x - width, pos_x + width],
-                [pos_z - height, pos_z + height]
-            )
-
             self.example.scene.add(hitBoxes_mesh)
             self.hitBoxes.append(hitBoxes_mesh)
 
     def create_field_spheres(self, sphere_radius=0.5, spacing=4, offset = 0.1):
-        sphere_geometry = SphereGeometry(radius=sphere_radius, radius_segments=8, height_segments=8)
+        sphere_geometry = GeometryCache.get(SphereGeometry, radius=sphere_radius, radius_segments=8, height_segments=8)
+        # One instanced mesh per call; each spectator has its own color
+        sphere_material = LambertMaterial(use_instancing=True)
         
         width_segments = int(FIELD_WIDTH / spacing)
         length_segments = int(FIELD_LENGTH / spacing)
+        sphere_positions = []
 
     # Place spheres along the width
         for i in range(width_segments + 1):
             x_position = -FIELD_WIDTH / 2 + i * spacing
             for z_position in [-FIELD_LENGTH / 2, FIELD_LENGTH / 2]:
-                random_color = [random.random(), random.random(), random.random()]
-                sphere_material = LambertMaterial(
-                    property_dict={"baseColor": random_color},
-                )
-                sphere_mesh = Mesh(sphere_geometry, sphere_material)
-                sphere_rig = MovementRig()
-                sphere_rig.add(sphere_mesh)
                 # Adjust offset based on the position to avoid overlap
-                sphere_rig.set_position([
+                sphere_positions.append([
                     x_position + (offset if x_position > 0 else -offset), 
                     1, 
                     z_position + (offset if z_position > 0 else -offset)
                 ])
-                self.example.scene.add(sphere_rig)
-                self.spheres.append((sphere_rig, random.uniform(0.5, 2.0)))
 
     # Place spheres along the length
         for i in range(length_segments + 1):
             z_position = -FIELD_LENGTH / 2 + i * spacing
             for x_position in [-FIELD_WIDTH / 2, FIELD_WIDTH / 2]:
-                random_color = [random.random(), random.random(), random.random()]
-                sphere_material = LambertMaterial(
-                    property_dict={"baseColor": random_color},
-                )
-                sphere_mesh = Mesh(sphere_geometry, sphere_material)
-                sphere_rig = MovementRig()
-                sphere_rig.add(sphere_mesh)
                 # Adjust offset based on the position to avoid overlap
-                sphere_rig.set_position([
+                sphere_positions.append([
                     x_position + (offset if x_position > 0 else -offset), 
                     sphere_radius, 
                     z_position + (offset if z_position > 0 else -offset)
                 ])
-                self.example.scene.add(sphere_rig)
-                self.spheres.append((sphere_rig, random.uniform(0.5, 2.0)))
\ No newline at end of file
+
+        sphere_matrices = [Matrix.make_translation(*position) for position in sphere_positions]
+        sphere_colors = [[random.random(), random.random(), random.random()] for _ in sphere_positions]
+        spectators = InstancedMesh(sphere_geometry, sphere_material, sphere_matrices, sphere_colors)
+        # Far spectators are drawn with fewer segments
+        far_sphere_geometry = GeometryCache.get(SphereGeometry, radius=sphere_radius, radius_segments=4,
+                                                height_segments=4)
+        spectators.add_level(far_sphere_geometry, 30)
+        GeometryCache.release(far_sphere_geometry)
+        self.example.scene.add(spectators)
+        rows = self.entities.add(sphere_positions, frequency=np.random.uniform(0.5, 2.0, len(sphere_positions)),
+                                 amplitude=SPECTATORS_JUMP_AMPLITUDE, base_height=GROUND + 0.2)
+        self.spheres.append((spectators, rows))
@@ -0,0 +1,99 @@
+"""
+Fire balls at the walls at extreme speeds and coarse tick rates, with the
+previous end-of-step wall and goal checks versus the swept ball of
+MatchSimulation (time of impact, reflection at the contact point), and count
+the balls that tunnel: end up outside the field without scoring. The swept
+ball is checked after every tick. tests/test_ball_tunneling.py asserts the
+same for the swept ball.
+
+Run from the repository root:
+    python -m benchmarks.ball_tunneling
+"""
+import math
+import random
+
+from constants import FIELD_WIDTH, FIELD_LENGTH, BALL_GROUND, SECONDS_PER_TIME_UNIT
+from simulation.match import MatchSimulation, GOAL_BOUNDS, WALL_THICKNESS
+from simulation.match_settings import MatchSettings
+from simulation.match_state import Controls, BALL_SCALE
+
+
+SPEEDS = [8, 80, 800, 8000]
+TICK_RATES = [60, 20, 5]
+BALLS = 200
+SECONDS = 3
+TOLERANCE = 1e-6
+
+
+def random_shots(seed=0):
+    """ (position, velocity direction) of balls anywhere in the field, flying flat """
+    generator = random.Random(seed)
+    shot_list = []
+    for _ in range(BALLS):
+        position = [generator.uniform(-FIELD_WIDTH / 2 + 1, FIELD_WIDTH / 2 - 1), BALL_GROUND,
+                    generator.uniform(-FIELD_LENGTH / 2 + 8, FIELD_LENGTH / 2 - 8)]
+        angle = generator.uniform(0, 2 * math.pi)
+        shot_list.append((position, [math.cos(angle), 0, math.sin(angle)]))
+    return shot_list
+
+
+def outside_field(position, margin=0):
+    return abs(position[0]) > FIELD_WIDTH / 2 - margin + TOLERANCE \
+        or abs(position[2]) > FIELD_LENGTH / 2 - margin + TOLERANCE
+
+
+def run_previous(position, velocity, delta_time, tick_count):
+    """ The previous rules: move, then look one step ahead and invert the velocity or score """
+    position = list(position)
+    velocity = list(velocity)
+    for _ in range(tick_count):
+        position = [position[i] + velocity[i] * delta_time * BALL_SCALE for i in range(3)]
+        next_position = [position[i] + velocity[i] * delta_time for i in range(3)]
+        if -FIELD_WIDTH / 2 <= next_position[0] <= FIELD_WIDTH / 2:
+            if abs(next_position[2]) > FIELD_LENGTH / 2:
+                velocity[2] = -velocity[2]
+        elif abs(next_position[2]) <= FIELD_LENGTH - 2 * WALL_THICKNESS:
+            velocity[0] = -velocity[0]
+        for i, ((min_x, max_x), (min_z, max_z)) in enumerate(GOAL_BOUNDS):
+            z_offset = -3 if i == 0 else 3
+            if min_x <= next_position[0] <= max_x and min_z + z_offset <= next_position[2] <= max_z + z_offset:
+                return False
+    return outside_field(position)
+
+
+def run_swept(match, position, velocity, delta_time, tick_count):
+    """ The ball of a MatchSimulation; returns True if it leaves the field at any tick """
+    ball = match.state.ball
+    ball.rig.set_position(position)
+    ball.velocity = list(velocity)
+    match.pop_events()
+    radius = match.settings.ball_radius
+    for _ in range(tick_count):
+        match.tick(Controls(), delta_time)
+        if any(event[0] == "goal" for event in match.pop_events()):
+            return False
+        if outside_field(ball.rig.global_position, radius):
+            return True
+    return False
+
+
+def main():
+    # The jet skis stay where they are, so only walls and goals act on the ball
+    match = MatchSimulation(MatchSettings(opponent_difficulty=0))
+    shot_list = random_shots()
+    print(f"{'speed':>6}  {'ticks/s':>7}  {'step':>7}  {'previous':>8}  {'swept':>5}   (tunnelled of {BALLS} balls)")
+    for speed in SPEEDS:
+        for tick_rate in TICK_RATES:
+            delta_time = 1 / tick_rate / SECONDS_PER_TIME_UNIT
+            tick_count = SECONDS * tick_rate
+            previous_count = swept_count = 0
+            for position, direction in shot_list:
+                velocity = [d * speed for d in direction]
+                previous_count += run_previous(position, velocity, delta_time, tick_count)
+                swept_count += run_swept(match, position, velocity, delta_time, tick_count)
+            step = speed * delta_time * BALL_SCALE
+            print(f"{speed:>6}  {tick_rate:>7}  {step:>7.1f}  {previous_count:>8}  {swept_count:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Micro-benchmark: contact detection between dynamic spheres spread over the
+arena, with the previous approach (every pair tested with math.sqrt on
+global_position lists) versus CollisionWorld (uniform grid broad phase,
+squared-distance narrow phase). Also checks that both find the same pairs.
+
+Run from the repository root:
+    python -m benchmarks.collisions
+"""
+import math
+import time
+
+import numpy as np
+
+from constants import FIELD_WIDTH, FIELD_LENGTH, HITBOX_BUFFER
+from simulation.collision import CollisionWorld
+
+
+BODY_COUNTS = [10, 100, 1000]
+TICKS = 20
+DELTA_TIME = 1 / 60
+SPEED = 10
+
+
+def random_bodies(count, seed=0):
+    generator = np.random.default_rng(seed)
+    position_list = generator.uniform([-FIELD_WIDTH / 2, 0, -FIELD_LENGTH / 2],
+                                      [FIELD_WIDTH / 2, 2, FIELD_LENGTH / 2], (count, 3))
+    velocity_list = generator.uniform(-SPEED, SPEED, (count, 3))
+    velocity_list[:, 1] = 0
+    return position_list, velocity_list
+
+
+def run_pairs(count):
+    position_list, velocity_list = random_bodies(count)
+    position_list = position_list.tolist()
+    velocity_list = velocity_list.tolist()
+    elapsed = 0
+    contact_set = set()
+    for _ in range(TICKS):
+        for position, velocity in zip(position_list, velocity_list):
+            for i in range(3):
+                position[i] += velocity[i] * DELTA_TIME
+        start = time.perf_counter()
+        contact_set = set()
+        for a in range(count):
+            for b in range(a + 1, count):
+                distance = math.sqrt(sum((position_list[a][i] - position_list[b][i]) ** 2 for i in range(3)))
+                if distance < HITBOX_BUFFER:
+                    contact_set.add((a, b))
+        elapsed += time.perf_counter() - start
+    return elapsed / TICKS, contact_set
+
+
+def run_world(count):
+    position_list, velocity_list = random_bodies(count)
+    world = CollisionWorld(-FIELD_WIDTH / 2, FIELD_WIDTH / 2, -FIELD_LENGTH / 2, FIELD_LENGTH / 2,
+                           cell_size=2.0, capacity=count)
+    body_ids = np.array([world.add_sphere(i, position, HITBOX_BUFFER / 2)
+                         for i, position in enumerate(position_list)])
+    elapsed = 0
+    contact_set = set()
+    for _ in range(TICKS):
+        position_list += velocity_list * DELTA_TIME
+        start = time.perf_counter()
+        # Game systems set positions body by body
+        for body_id, position in zip(body_ids, position_list):
+            world.set_position(body_id, position)
+        contact_list = world.find_contacts()
+        elapsed += time.perf_counter() - start
+        contact_set = {(min(a, b), max(a, b)) for a, b in contact_list}
+    return elapsed / TICKS, contact_set
+
+
+def main():
+    print(f"{'bodies':>6}  {'all pairs':>10}  {'grid':>8}  {'contacts':>8}   (ms/tick)")
+    for count in BODY_COUNTS:
+        pairs_time, pairs_contacts = run_pairs(count)
+        world_time, world_contacts = run_world(count)
+        if pairs_contacts != world_contacts:
+            raise Exception(f"Different contacts with {count} bodies")
+        print(f"{count:>6}  {pairs_time * 1000:>10.3f}  {world_time * 1000:>8.3f}  {len(world_contacts):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark: cold (parse OBJ text and write the binary cache) versus warm
+(memory-map the binary cache) load time of every model under models/.
+
+Run from the repository root:
+    python -m benchmarks.obj_loading
+"""
+import os
+import time
+
+import numpy as np
+
+from geometry.mesh_cache import MeshCache
+from geometry.objGeo import ObjGeo
+
+
+def load_time(filename):
+    start = time.perf_counter()
+    arrays = MeshCache.load(filename, ObjGeo.parse_obj)
+    # Touch the data so that memory-mapped pages are actually read
+    checksum = sum(float(np.asarray(array).sum()) for array in arrays)
+    return time.perf_counter() - start, checksum
+
+
+def main():
+    model_list = sorted(os.path.join("models", name) for name in os.listdir("models") if name.endswith(".obj"))
+    print(f"{'model':<26}{'cold (ms)':>12}{'warm (ms)':>12}{'speedup':>10}")
+    for filename in model_list:
+        cache_filename = MeshCache.cache_path(filename)
+        if os.path.exists(cache_filename):
+            os.remove(cache_filename)
+        cold, cold_checksum = load_time(filename)
+        warm, warm_checksum = load_time(filename)
+        assert np.isclose(cold_checksum, warm_checksum), filename
+        print(f"{filename:<26}{cold * 1000:>12.1f}{warm * 1000:>12.1f}{cold / warm:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
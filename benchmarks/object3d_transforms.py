@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: cached (dirty-flag) world transforms versus recomputing
+the full parent chain on every read.
+
+Run from the repository root:
+    python -m benchmarks.object3d_transforms
+"""
+import time
+
+from core_ext.object3d import Object3D
+from extras.movement_rig import MovementRig
+
+
+RING_COUNT = 200
+PARTICLE_COUNT = 300
+FRAMES = 60
+# number of times each leaf is read per frame (collisions, AI, camera, renderer)
+READS_PER_FRAME = 3
+
+
+def recursive_global_matrix(node):
+    """ Reference implementation: the previous uncached Object3D.global_matrix """
+    if node.parent is None:
+        return node.local_matrix
+    return recursive_global_matrix(node.parent) @ node.local_matrix
+
+
+def build_scene():
+    scene = Object3D()
+    leaves = []
+    for i in range(RING_COUNT):
+        rig = MovementRig()
+        leaf = Object3D()
+        rig.add(leaf)
+        rig.scale(0.05)
+        rig.set_position([i * 0.5, 0, 0])
+        scene.add(rig)
+        leaves.append(leaf)
+    particle_system = Object3D()
+    scene.add(particle_system)
+    particles = []
+    for i in range(PARTICLE_COUNT):
+        particle = Object3D()
+        leaf = Object3D()
+        particle.add(leaf)
+        particle.set_position([0, i * 0.01, 0])
+        particle_system.add(particle)
+        particles.append(particle)
+        leaves.append(leaf)
+    return scene, leaves, particles
+
+
+def run(read_matrix):
+    scene, leaves, particles = build_scene()
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        # particles move every frame; rings stay still
+        for particle in particles:
+            particle.translate(0.01, 0.01, 0.01)
+        for _ in range(READS_PER_FRAME):
+            for leaf in leaves:
+                read_matrix(leaf)
+    return (time.perf_counter() - start) / FRAMES
+
+
+def main():
+    recursive = run(recursive_global_matrix)
+    cached = run(lambda node: node.global_matrix)
+    print(f"nodes read per frame: {(RING_COUNT + PARTICLE_COUNT) * READS_PER_FRAME}")
+    print(f"recursive: {recursive * 1000:.3f} ms/frame")
+    print(f"cached:    {cached * 1000:.3f} ms/frame")
+    print(f"speedup:   {recursive / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Micro-benchmark: boost particles as one Object3D (and one Mesh) per particle
+versus the ring-buffer ParticleBuffer drawn with one instanced call.
+
+Measures the CPU cost per frame of updating the particles and of preparing
+the draw (per-particle world matrices, or packing the instance buffer).
+No OpenGL context is needed; the previous implementation also issued one
+draw call per particle, the new one issues a single call.
+
+Run from the repository root:
+    python -m benchmarks.particles
+"""
+import time
+
+import numpy as np
+
+from boost_particles import ParticleBuffer
+from core_ext.object3d import Object3D
+
+
+PARTICLE_COUNTS = [300, 1000, 3000, 10000]
+FRAMES = 30
+DELTA_TIME = 1 / 60
+
+
+class ObjectParticle(Object3D):
+    """ The previous Particle, without its Mesh (which needs a GL context) """
+    def __init__(self, position, velocity, lifespan):
+        super().__init__()
+        self.velocity = velocity
+        self.lifespan = lifespan
+        self.age = 0
+        self.set_position(position)
+
+    def update(self, delta_time):
+        self.translate(self.velocity[0] * delta_time, self.velocity[1] * delta_time, self.velocity[2] * delta_time)
+        self.age += delta_time
+        return self.age < self.lifespan
+
+
+def random_particles(count):
+    velocity_list = np.random.uniform([-0.5, 0, -0.5], [0, 0.5, 0], (count, 3))
+    # long lifespans keep every particle alive during the run
+    lifespan_list = np.random.uniform(10, 30, count)
+    return np.zeros((count, 3)), velocity_list, lifespan_list
+
+
+def run_objects(count):
+    system = Object3D()
+    particles = []
+    for position, velocity, lifespan in zip(*random_particles(count)):
+        particle = ObjectParticle(list(position), list(velocity), lifespan)
+        system.add(particle)
+        particles.append(particle)
+    update_time = draw_time = 0
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        new_particles = []
+        for particle in particles:
+            if particle.update(DELTA_TIME):
+                new_particles.append(particle)
+            else:
+                system.remove(particle)
+        particles = new_particles
+        middle = time.perf_counter()
+        # The renderer read the world matrix of every particle mesh
+        for particle in particles:
+            particle.global_matrix
+        draw_time += time.perf_counter() - middle
+        update_time += middle - start
+    return update_time / FRAMES, draw_time / FRAMES
+
+
+def run_buffer(count):
+    particle_buffer = ParticleBuffer(count)
+    particle_buffer.emit(*random_particles(count))
+    instance_matrices = np.tile(np.identity(4, dtype=np.float32), (count, 1, 1))
+    upload_buffer = np.zeros((count, 16), dtype=np.float32)
+    update_time = draw_time = 0
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        particle_buffer.update(DELTA_TIME)
+        middle = time.perf_counter()
+        # Same work as ParticleSystem.update and _upload_instance_data
+        positions = particle_buffer.alive_positions
+        alive_count = len(positions)
+        instance_matrices[0:alive_count, 0:3, 3] = positions
+        upload_buffer[0:alive_count] = instance_matrices[0:alive_count].transpose(0, 2, 1).reshape(-1, 16)
+        draw_time += time.perf_counter() - middle
+        update_time += middle - start
+    return update_time / FRAMES, draw_time / FRAMES
+
+
+def main():
+    print(f"{'particles':>9}  {'objects update':>14}  {'objects draw':>12}  "
+          f"{'buffer update':>13}  {'buffer draw':>11}   (ms/frame)")
+    for count in PARTICLE_COUNTS:
+        object_update, object_draw = run_objects(count)
+        buffer_update, buffer_draw = run_buffer(count)
+        print(f"{count:>9}  {object_update * 1000:>14.3f}  {object_draw * 1000:>12.3f}  "
+              f"{buffer_update * 1000:>13.3f}  {buffer_draw * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
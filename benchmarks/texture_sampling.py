@@ -0,0 +1,50 @@
+"""
+Loading of baked textures: for every image, the time to decode it (how the
+runtime used to load textures, before glGenerateMipmap) versus the time to map
+the mip chains written by TextureBaker (RGBA8 and BC1) through its
+memory-mapped loader, and the GPU bytes of each.
+
+How closely the baked chains match the generated mipmaps is checked by
+tests/test_texture_sampling.py.
+
+Run from the repository root:
+    python -m benchmarks.texture_sampling
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from core_ext.texture import Texture
+from core_ext.texture_baker import TextureBaker
+
+
+IMAGES = ["images/sea2.jpg", "images/ring0.jpg", "images/sky.jpg"]
+
+
+def map_baked(filename, compress, directory):
+    """ Bake a copy of the image, then read it back as the runtime does; returns (seconds, bytes) """
+    copy_filename = os.path.join(directory, os.path.basename(filename))
+    shutil.copy2(filename, copy_filename)
+    TextureBaker.bake(copy_filename, compress=compress)
+    start = time.perf_counter()
+    level_list, _ = TextureBaker.read(copy_filename, compression_supported=True)
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(data.nbytes for _, _, data in level_list)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        for filename in IMAGES:
+            start = time.perf_counter()
+            pixel_data = Texture.decode_image(filename)
+            decode_time = time.perf_counter() - start
+            print(f"{filename}: decode {decode_time * 1000:.1f} ms, "
+                  f"RGBA8 with generated mipmaps {pixel_data.nbytes * 4 // 3 / 2 ** 20:.2f} MiB")
+            for name, compress in [("RGBA8", False), ("BC1", True)]:
+                map_time, byte_size = map_baked(filename, compress, directory)
+                print(f"  baked {name:<6}  map {map_time * 1000:.1f} ms, {byte_size / 2 ** 20:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,116 @@
-import random
+import numpy as np
+import OpenGL.GL as GL
+
 from constants import *
-from core_ext.object3d import Object3D
-from core_ext.mesh import Mesh
+from core_ext.instanced_mesh import InstancedMesh
+from geometry.geometry_cache import GeometryCache
 from geometry.sphere import SphereGeometry
-from material.material import Material
-
-class Particle(Object3D):
-    def __init__(self, position, velocity, lifespan, geo, mat):
-        super().__init__()
-        self.velocity = velocity
-        self.lifespan = lifespan
-        self.age = 0        
-        self.mesh = Mesh(geo, mat)
-        self.add(self.mesh)
-        position[1] -= 0.2
-        self.set_position(position)
+from material.basic import BasicMaterial
 
-    def update(self, delta_time):
-        self.translate(self.velocity[0] * delta_time, self.velocity[1] * delta_time, self.velocity[2] * delta_time)
-        self.age += delta_time
-        return self.age < self.lifespan
-
-
-class ParticleSystem(Object3D):
-    def __init__(self, ):
-        super().__init__()
-        self.max_particles = MAX_BOOST_PARTICLES
-        self.particles = []
-        self.geometry = SphereGeometry(radius=0.05, radius_segments=4, height_segments=4)
-        self.material = Material(vertex_shader_code, fragment_shader_code)
-        self.material.add_uniform("vec3", "baseColor", [0, 0, 0.6])  # Red color
-        self.material.locate_uniforms()
-
-    def create_particle(self, position):
-        velocity = [random.uniform(-0.5, 0), random.uniform(0, 0.5), random.uniform(-0.5, 0)]
-        lifespan = random.uniform(1, 3)
-        particle = Particle(position, velocity, lifespan,geo = self.geometry, mat = self.material)
-        self.particles.append(particle)
-        self.add(particle)
+
+class ParticleBuffer:
+    """
+    Particle state in preallocated numpy arrays (structure of arrays),
+    used as a ring buffer: once all slots are in use, new particles
+    replace the oldest ones. A slot is free when age >= lifespan.
+    Contains no OpenGL objects.
+    """
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self._position = np.zeros((capacity, 3), dtype=np.float32)
+        self._velocity = np.zeros((capacity, 3), dtype=np.float32)
+        self._age = np.zeros(capacity, dtype=np.float32)
+        self._lifespan = np.zeros(capacity, dtype=np.float32)
+        # slot that receives the next emitted particle
+        self._next_index = 0
+        self._alive = np.zeros(capacity, dtype=bool)
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def alive_count(self):
+        """ Number of living particles at the last update """
+        return int(np.count_nonzero(self._alive))
+
+    @property
+    def alive_positions(self):
+        """ Positions of the living particles at the last update, shape (alive count, 3) """
+        return self._position[self._alive]
+
+    def emit(self, position_list, velocity_list, lifespan_list):
+        """ Add len(position_list) particles, overwriting the oldest slots """
+        count = min(len(position_list), self._capacity)
+        slots = (self._next_index + np.arange(count)) % self._capacity
+        self._next_index = (self._next_index + count) % self._capacity
+        self._position[slots] = np.asarray(position_list)[-count:]
+        self._velocity[slots] = np.asarray(velocity_list)[-count:]
+        self._lifespan[slots] = np.asarray(lifespan_list)[-count:]
+        self._age[slots] = 0
+        self._alive[slots] = True
+
+    def clear(self):
+        """ Remove every particle (e.g. when a new match starts) """
+        self._age[:] = 0
+        self._lifespan[:] = 0
+        self._alive[:] = False
 
     def update(self, delta_time):
-        new_particles = []
-        for particle in self.particles:
-            if particle.update(delta_time):
-                new_particles.append(particle)
-            else:
-                self.remove(particle)
-        self.particles = new_particles
+        """ Move and age every particle in one vectorized step """
+        self._position += self._velocity * delta_time
+        self._age += delta_time
+        self._alive = self._age < self._lifespan
+
+
+class ParticleSystem(InstancedMesh):
+    """
+    Boost trail: particles live in a ParticleBuffer and are drawn as
+    instances of one small sphere with a single draw call.
+    All GPU buffers are created here; emit() and update() allocate none.
+    """
+    PARTICLES_PER_EMIT = 4
+
+    def __init__(self, max_particles=MAX_BOOST_PARTICLES):
+        geometry = GeometryCache.get(SphereGeometry, radius=0.05, radius_segments=4, height_segments=4)
+        material = BasicMaterial(use_vertex_colors=False, use_instancing=True)
+        material.set_properties({"baseColor": [0, 0, 0.6]})
+        # One identity matrix per slot; only the translation of living particles changes
+        super().__init__(geometry, material, np.tile(np.identity(4), (max_particles, 1, 1)),
+                         usage=GL.GL_STREAM_DRAW)
+        self._particle_buffer = ParticleBuffer(max_particles)
+        self._alive_count = 0
+
+    @property
+    def particle_buffer(self):
+        return self._particle_buffer
+
+    @property
+    def instance_count(self):
+        return self._alive_count
 
     def emit(self, position):
-        if len(self.particles) < self.max_particles:
-            self.create_particle(position)
-            self.create_particle(position)
-            self.create_particle(position)
-            self.create_particle(position)
-
-
-# Vertex shader code
-vertex_shader_code = """
-uniform mat4 projectionMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 modelMatrix;
-in vec3 vertexPosition;
-void main()
-{
-    gl_Position = projectionMatrix * viewMatrix * modelMatrix * vec4(vertexPosition, 1.0);
-}
-"""
-
-# Fragment shader code
-fragment_shader_code = """
-uniform vec3 baseColor;
-out vec4 fragColor;
-void main()
-{
-    fragColor = vec4(baseColor, 1.0);
-}
-"""
+        count = self.PARTICLES_PER_EMIT
+        position_list = np.tile(np.asarray(position, dtype=np.float32) - [0, 0.2, 0], (count, 1))
+        velocity_list = np.random.uniform([-0.5, 0, -0.5], [0, 0.5, 0], (count, 3))
+        lifespan_list = np.random.uniform(1, 3, count)
+        self._particle_buffer.emit(position_list, velocity_list, lifespan_list)
+
+    def update(self, delta_time):
+        self._particle_buffer.update(delta_time)
+        # Living particles are packed at the start of the instance buffer
+        positions = self._particle_buffer.alive_positions
+        self._alive_count = len(positions)
+        self._instance_matrices[0:self._alive_count, 0:3, 3] = positions
+        self._instances_changed = True
+
+    def draw(self, draw_style):
+        if self._alive_count > 0:
+            super().draw(draw_style)
+
+    def _upload_instance_data(self):
+        # Only the matrices of living particles are sent to the GPU
+        matrices = self._instance_matrices[0:self._alive_count].transpose(0, 2, 1).reshape(-1, 16)
+        self._instance_attribute_dict["instanceMatrix"].set_elements(0, matrices)
+        self._instance_attribute_dict["instanceMatrix"].upload_data()
+        self._instances_changed = False
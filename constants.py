@@ -1,4 +1,7 @@
 LOW_SPEC = False
+# Do the red and blue labels over the goals turn around? If not, they never move
+# and are merged into one static mesh
+LABELS_TURN = not LOW_SPEC
 
 CAMERA_OFFSET_Y = 2
 CAMERA_FOLLOW_OFFSET_Y = 2
@@ -8,9 +11,13 @@ SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 
 BALL_SPEED = 8
-BALL_ATTRITION = 0.992
+# Rates per time unit (SECONDS_PER_TIME_UNIT); they were tuned per tick at 60 Hz,
+# which is 1/9 of a time unit
+BALL_ATTRITION = 0.992 ** 9  # fraction of the ball velocity kept after one time unit
 BALL_GRAVITY = -0.65
 BALL_BOUNCE = 0.5
+# bola_praia.obj has radius 1.25 and the ball is scaled by 0.3
+BALL_RADIUS = 0.375
 
 HITBOX_BUFFER = 1
 
@@ -18,7 +25,7 @@ JETSKI_SPEED = 1.3
 JETSKI_SPEED_BOOST = 2.5
 JETSKI_JUMP_STRENGTH = 2
 
-BOOST_COST = 0.3
+BOOST_COST = 0.3 * 9  # boost used per time unit of boosting
 BOOST_AMOUNT = 35
 MAX_BOOST = 100
 BOOST_IN_MAP_LIMIT = 4
@@ -26,6 +33,10 @@ TIME_DELAY_SPAWN_BOOST = 3
 BAR_BOOST_LEFT = 0.3
 BAR_BOOST_TOP = -0.7
 BAR_BOOST_BOTTOM = -0.8
+LOADING_BAR_LEFT = -0.6
+LOADING_BAR_RIGHT = 0.6
+LOADING_BAR_TOP = -0.05
+LOADING_BAR_BOTTOM = -0.1
 
 FIELD_LENGTH = 120
 FIELD_WIDTH = 80
@@ -55,9 +66,12 @@ BALL_START_POSITION = [0.5, BALL_GROUND, -4]
 
 SPECTATORS_JUMP_AMPLITUDE = 0.7
 BOOST_JUMP_AMPLITUDE = 1
-AIR_SPEED_BOOST = 0.3
+AIR_SPEED_BOOST = 0.3 * 9  # extra distance per time unit while jumping
 
 FIELD_JUMP_AMPLITUDE = 0.15  
 FIELD_JUMP_FREQUENCY = 1.0  
 
-MAX_BOOST_PARTICLES = 300
\ No newline at end of file
+MAX_BOOST_PARTICLES = 300
+
+JETSKI_TURN_SPEED = 30  # degrees per time unit
+SECONDS_PER_TIME_UNIT = 0.15  # delta_time is measured in units of 150 ms
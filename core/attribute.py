@@ -3,32 +3,103 @@ import numpy as np
 
 
 class Attribute:
-    def __init__(self, data_type, data):
-        # type of elements in data array: int | float | vec2 | vec3 | vec4
+    # number of values per element of each data type
+    COMPONENT_COUNT = {"int": 1, "float": 1, "vec2": 2, "vec3": 3, "vec4": 4, "mat4": 16}
+    # type of the values stored in the buffer; all other data types are float32
+    DTYPE = {"int": np.int32}
+
+    def __init__(self, data_type, data, divisor=0, usage=GL.GL_STATIC_DRAW):
+        # type of elements in data array: int | float | vec2 | vec3 | vec4 | mat4
         self._data_type = data_type
-        # array of data to be stored in buffer
-        self._data = data
+        # contiguous float32 (int32 for int) array of data to be stored in buffer,
+        # shape (element count, components)
+        self._data = self._as_buffer(data)
+        # 0: advance once per vertex; n: advance once per n instances
+        self._divisor = divisor
+        # GL_STATIC_DRAW | GL_DYNAMIC_DRAW (changes often) | GL_STREAM_DRAW (changes every frame)
+        self._usage = usage
         # reference of available buffer from GPU
         self._buffer_ref = GL.glGenBuffers(1)
+        # size of the data stored in the GPU buffer
+        self._byte_size = 0
+        # [first, last) elements marked as changed since the last upload; None: upload everything
+        self._dirty_range = None
         # Upload data immediately
         self.upload_data()
 
+    @property
+    def dtype(self):
+        return self.DTYPE.get(self._data_type, np.float32)
+
+    def _as_buffer(self, data):
+        """ Return data as a contiguous array of the buffer type; arrays that already are one are not copied """
+        data = np.ascontiguousarray(data, dtype=self.dtype)
+        return data.reshape(-1, self.COMPONENT_COUNT.get(self._data_type, 1))
+
+    @property
+    def data_type(self):
+        return self._data_type
+
+    @property
+    def buffer_ref(self):
+        return self._buffer_ref
+
+    @property
+    def byte_size(self):
+        return self._byte_size
+
+    @property
+    def usage(self):
+        return self._usage
+
     @property
     def data(self):
         return self._data
 
     @data.setter
     def data(self, data):
-        self._data = data
+        """ Replace the whole array; the next upload sends all of it """
+        self._data = self._as_buffer(data)
+        self._dirty_range = None
+
+    def set_elements(self, start, values):
+        """ Overwrite elements from index start and mark them for upload """
+        values = np.asarray(values, dtype=self.dtype).reshape(-1, self._data.shape[1])
+        if not self._data.flags.writeable:
+            # e.g. a read-only memory-mapped cache file
+            self._data = self._data.copy()
+        self._data[start:start + len(values)] = values
+        self.mark_dirty(start, start + len(values))
+
+    def mark_dirty(self, start, end):
+        """ Mark elements [start, end) as changed after writing to data in place """
+        if self._dirty_range is None:
+            self._dirty_range = (start, end)
+        else:
+            self._dirty_range = (min(start, self._dirty_range[0]), max(end, self._dirty_range[1]))
 
     def upload_data(self):
-        """ Upload the data to a GPU buffer """
-        # Convert data to numpy array format; convert numbers to 32-bit floats
-        data = np.array(self._data).astype(np.float32)
+        """
+        Upload the data to a GPU buffer. If only a range was marked dirty and
+        the size of the data is unchanged, only that range is sent (glBufferSubData).
+        """
         # Select buffer used by the following functions
         GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self._buffer_ref)
-        # Store data in currently bound buffer
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, data.ravel(), GL.GL_STATIC_DRAW)
+        if self._dirty_range is not None and self._byte_size == self._data.nbytes:
+            start, end = self._dirty_range
+            element_size = self._data.itemsize * self._data.shape[1]
+            GL.glBufferSubData(GL.GL_ARRAY_BUFFER, start * element_size,
+                               (end - start) * element_size, self._data[start:end])
+        else:
+            # Store data in currently bound buffer
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, self._data.nbytes, self._data, self._usage)
+            self._byte_size = self._data.nbytes
+        self._dirty_range = None
+
+    def delete(self):
+        """ Free the GPU buffer """
+        GL.glDeleteBuffers(1, [self._buffer_ref])
+        self._byte_size = 0
 
     def associate_variable(self, program_ref, variable_name):
         """ Associate variable in program with the buffer """
@@ -39,8 +110,17 @@ class Attribute:
             # Select buffer used by the following functions
             GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self._buffer_ref)
             # Specify how data will be read from the currently bound buffer into the specified variable
+            if self._data_type == "mat4":
+                # A mat4 variable occupies four consecutive locations, one per column;
+                # data must be stored in column-major order
+                for column in range(4):
+                    GL.glVertexAttribPointer(variable_ref + column, 4, GL.GL_FLOAT, False, 64, GL.GLvoidp(16 * column))
+                    GL.glEnableVertexAttribArray(variable_ref + column)
+                    GL.glVertexAttribDivisor(variable_ref + column, self._divisor)
+                return
             if self._data_type == "int":
-                GL.glVertexAttribPointer(variable_ref, 1, GL.GL_INT, False, 0, None)
+                # Integer variables must be read without conversion to float
+                GL.glVertexAttribIPointer(variable_ref, 1, GL.GL_INT, 0, None)
             elif self._data_type == "float":
                 GL.glVertexAttribPointer(variable_ref, 1, GL.GL_FLOAT, False, 0, None)
             elif self._data_type == "vec2":
@@ -53,3 +133,5 @@ class Attribute:
                 raise Exception(f'Attribute {variable_name} has unknown type {self._data_type}')
             # Indicate that data will be streamed to this variable
             GL.glEnableVertexAttribArray(variable_ref)
+            if self._divisor:
+                GL.glVertexAttribDivisor(variable_ref, self._divisor)
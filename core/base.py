@@ -1,12 +1,18 @@
 import pygame
 import sys
 
+from constants import SECONDS_PER_TIME_UNIT
 from core.input import Input
 from core.utils import Utils
 
 
 class Base:
-    def __init__(self, screen_size=(512, 512)):
+    """
+    Window and main loop. The simulation advances in fixed ticks of update(),
+    as many per rendered frame as the elapsed time requires (at most
+    max_ticks_per_frame); render() is then called once per frame.
+    """
+    def __init__(self, screen_size=(512, 512), tick_rate=60, max_ticks_per_frame=5, time_scale=1):
         # Initialize all pygame modules
         pygame.init()
         # Indicate rendering details
@@ -26,8 +32,21 @@ class Base:
         self._clock = pygame.time.Clock()
         # Manage user input
         self._input = Input()
-        # number of seconds application has been running
+        # simulated time since the application started, in units of delta_time
         self._time = 0
+        # Length of a simulation tick, in simulated seconds and in time units
+        self._tick_seconds = 1 / tick_rate
+        # delta_time is in the unit of the simulation (SECONDS_PER_TIME_UNIT)
+        self._delta_time = self._tick_seconds / SECONDS_PER_TIME_UNIT
+        # Ticks allowed per frame; when the simulation cannot keep up it slows
+        # down instead of falling further behind (avoids a spiral of death)
+        self._max_ticks_per_frame = max_ticks_per_frame
+        # simulated seconds per real second; above 1 runs faster than real time
+        self._time_scale = time_scale
+        # simulated seconds not yet consumed by ticks
+        self._accumulator = 0
+        # fraction of a tick between the last tick and the rendered frame, in [0, 1)
+        self._alpha = 0
         # Print the system information
         Utils.print_system_info()
 
@@ -35,6 +54,18 @@ class Base:
     def delta_time(self):
         return self._delta_time
 
+    @property
+    def alpha(self):
+        return self._alpha
+
+    @property
+    def time_scale(self):
+        return self._time_scale
+
+    @time_scale.setter
+    def time_scale(self, value):
+        self._time_scale = value
+
     @property
     def input(self):
         return self._input
@@ -52,25 +83,43 @@ class Base:
         pass
 
     def update(self):
-        """ Implement by extending class """
+        """ Advance the simulation by one tick of delta_time; implement by extending class """
         pass
 
+    def render(self):
+        """ Draw a frame, which lies alpha (0...1) of a tick after the last update; implement by extending class """
+        pass
+
+    def step(self, tick_count=1):
+        """ Run simulation ticks immediately, without rendering (e.g. to test faster than real time) """
+        for _ in range(tick_count):
+            self._time += self._delta_time
+            self.update()
+            # Discrete key events are seen by one tick only
+            self._input.clear_discrete()
+
     def run(self):
         # Startup #
         self.initialize()
         # main loop #
         while self._running:
             # process input #
-            self._input.update()
+            # (key-down/up events are kept until a tick has seen them)
+            self._input.update(reset_discrete=False)
             if self._input.quit:
                 self._running = False
-            # seconds since iteration of run loop
-            self._delta_time = self._clock.get_time() / 150
-            # Increment time application has been running
-            self._time += self._delta_time
+            # simulated seconds since the last iteration of run loop
+            self._accumulator += self._clock.get_time() / 1000 * self._time_scale
             # Update #
-            self.update()
+            tick_count = min(int(self._accumulator / self._tick_seconds), self._max_ticks_per_frame)
+            self.step(tick_count)
+            self._accumulator -= tick_count * self._tick_seconds
+            if tick_count == self._max_ticks_per_frame:
+                # Drop the time that could not be simulated
+                self._accumulator = min(self._accumulator, self._tick_seconds)
+            self._alpha = min(self._accumulator / self._tick_seconds, 1)
             # Render #
+            self.render()
             # Display image on screen
             pygame.display.flip()
             # Pause if necessary to achieve 60 FPS
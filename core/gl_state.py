@@ -0,0 +1,85 @@
+import OpenGL.GL as GL
+
+
+class GLState:
+    """
+    Shadow copy of the OpenGL state set by the renderer.
+    Calls that would not change the current value are skipped,
+    and both issued and skipped state changes are counted.
+    """
+    def __init__(self):
+        self.reset()
+
+    @property
+    def counters(self):
+        """ Return the number of state changes issued and skipped since the last reset """
+        return {"issued": self._issued, "skipped": self._skipped}
+
+    def reset(self):
+        """
+        Forget the tracked state and reset the counters.
+        Must be called whenever OpenGL state may have been changed
+        outside this object (e.g. at the start of every frame).
+        """
+        self._program_ref = None
+        self._vao_ref = None
+        self._active_texture_unit = None
+        # texture reference bound to each texture unit
+        self._texture_dict = {}
+        # enabled/disabled state of capabilities such as GL_CULL_FACE
+        self._capability_dict = {}
+        self._polygon_mode = None
+        self._line_width = None
+        self._point_size = None
+        self._issued = 0
+        self._skipped = 0
+
+    def _changed(self, current, value):
+        if current == value:
+            self._skipped += 1
+            return False
+        self._issued += 1
+        return True
+
+    def use_program(self, program_ref):
+        if self._changed(self._program_ref, program_ref):
+            GL.glUseProgram(program_ref)
+            self._program_ref = program_ref
+
+    def bind_vertex_array(self, vao_ref):
+        if self._changed(self._vao_ref, vao_ref):
+            GL.glBindVertexArray(vao_ref)
+            self._vao_ref = vao_ref
+
+    def bind_texture(self, texture_unit_ref, texture_object_ref):
+        """ Bind a 2D texture to the given texture unit (0...15) """
+        if self._changed(self._texture_dict.get(texture_unit_ref), texture_object_ref):
+            if self._active_texture_unit != texture_unit_ref:
+                GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit_ref)
+                self._active_texture_unit = texture_unit_ref
+            GL.glBindTexture(GL.GL_TEXTURE_2D, texture_object_ref)
+            self._texture_dict[texture_unit_ref] = texture_object_ref
+
+    def set_capability(self, capability, enabled):
+        """ Call glEnable or glDisable for a capability such as GL_CULL_FACE """
+        if self._changed(self._capability_dict.get(capability), enabled):
+            if enabled:
+                GL.glEnable(capability)
+            else:
+                GL.glDisable(capability)
+            self._capability_dict[capability] = enabled
+
+    def polygon_mode(self, mode):
+        if self._changed(self._polygon_mode, mode):
+            GL.glPolygonMode(GL.GL_FRONT_AND_BACK, mode)
+            self._polygon_mode = mode
+
+    def line_width(self, width):
+        if self._changed(self._line_width, width):
+            GL.glLineWidth(width)
+            self._line_width = width
+
+    def point_size(self, size):
+        if self._changed(self._point_size, size):
+            GL.glPointSize(size)
+            self._point_size = size
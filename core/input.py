@@ -11,6 +11,8 @@ class Input:
         self._key_down_list = []
         self._key_pressed_list = []
         self._key_up_list = []
+        # window positions of mouse button presses; discrete, like key-down events
+        self._mouse_down_list = []
 
     @property
     def key_down_list(self):
@@ -24,6 +26,15 @@ class Input:
     def key_up_list(self):
         return self._key_up_list
 
+    @property
+    def mouse_down_list(self):
+        return self._mouse_down_list
+
+    @property
+    def mouse_position(self):
+        """ Current position of the mouse in the window, in pixels from the top left corner """
+        return pygame.mouse.get_pos()
+
     @property
     def quit(self):
         return self._quit
@@ -38,10 +49,17 @@ class Input:
     def is_key_up(self, key_code):
         return key_code in self._key_up_list
 
-    def update(self):
-        # Reset discrete key states
+    def clear_discrete(self):
+        """ Forget key-down, key-up and mouse button events """
         self._key_down_list = []
         self._key_up_list = []
+        self._mouse_down_list = []
+
+    def update(self, reset_discrete=True):
+        # Reset discrete key states; with reset_discrete=False they are kept
+        # until clear_discrete() is called (e.g. until a simulation tick has seen them)
+        if reset_discrete:
+            self.clear_discrete()
         # Iterate over all user input events (such as keyboard or mouse)
         # that occurred since the last time events were checked
         for event in pygame.event.get():
@@ -57,4 +75,6 @@ class Input:
             if event.type == pygame.KEYUP:
                 key_name = pygame.key.name(event.key)
                 self._key_pressed_list.remove(key_name)
-                self._key_up_list.append(key_name)
\ No newline at end of file
+                self._key_up_list.append(key_name)
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                self._mouse_down_list.append(event.pos)
\ No newline at end of file
@@ -1,7 +1,5 @@
 import numpy
-from numpy import subtract, divide, cross
-from numpy.linalg import norm
-from math import sin, cos, tan, pi
+from math import sin, cos, tan, pi, sqrt
 
 
 class Matrix:
@@ -105,20 +103,20 @@ class Matrix:
 
     @staticmethod
     def make_look_at(position, target):
+        # Plain floats: numpy calls cost more than the arithmetic for 3-vectors
         world_up = [0, 1, 0]
-        forward = subtract(target, position)
-        right = cross(forward, world_up)
+        forward = [float(target[i]) - float(position[i]) for i in range(3)]
+        right = _cross(forward, world_up)
         # If forward and world_up vectors are parallel,
         # the right vector is zero.
         # Fix this by perturbing the world_up vector a bit
-        if norm(right) < 0.001:
-            offset = numpy.array([0.001, 0, 0])
-            right = numpy.cross(forward, world_up + offset)
-        up = cross(right, forward)
+        if _length(right) < 0.001:
+            right = _cross(forward, [0.001, 1, 0])
+        up = _cross(right, forward)
         # All vectors should have length 1
-        forward = divide(forward, norm(forward))
-        right = divide(right, norm(right))
-        up = divide(up, norm(up))
+        forward = _normalize(forward)
+        right = _normalize(right)
+        up = _normalize(up)
         return numpy.array(
             [[right[0], up[0], -forward[0], position[0]],
              [right[1], up[1], -forward[1], position[1]],
@@ -134,3 +132,18 @@ class Matrix:
              [0, 2/(top-bottom), 0, -(top+bottom)/(top-bottom)],
              [0, 0, -2/(far-near), -(far+near)/(far-near)], [0, 0, 0, 1]]
         ).astype(float)
+
+
+def _cross(a, b):
+    return [a[1] * b[2] - a[2] * b[1],
+            a[2] * b[0] - a[0] * b[2],
+            a[0] * b[1] - a[1] * b[0]]
+
+
+def _length(v):
+    return sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+
+
+def _normalize(v):
+    length = _length(v)
+    return [v[0] / length, v[1] / length, v[2] / length]
@@ -0,0 +1,99 @@
+import time
+
+import OpenGL.GL as GL
+
+from core.uniform import Uniform
+from core.utils import Utils
+
+
+class ProgramCache:
+    """
+    Process-wide registry of linked shader programs, keyed on their final
+    (preprocessed) vertex and fragment shader source. Materials whose shaders
+    are identical, including their #define variants, share one program and keep
+    their own uniform values. Each holder owns one reference; the program is
+    deleted when the last one is released.
+    """
+    # (vertex shader code, fragment shader code) -> program reference
+    _program_dict = {}
+    # program reference -> [key, reference count]
+    _reference_dict = {}
+    _hits = 0
+    _misses = 0
+    # Seconds spent compiling and linking
+    _compile_time = 0.0
+
+    @staticmethod
+    def preprocess(shader_code, define_dict=None):
+        """ Prepend a #define line for every (name, value) of define_dict, in name order """
+        if not define_dict:
+            return shader_code
+        return "".join(f"#define {name} {value}\n" for name, value in sorted(define_dict.items())) + shader_code
+
+    @staticmethod
+    def get(vertex_shader_code, fragment_shader_code, define_dict=None):
+        """
+        Return a shared program for the shader code with the given #define variants,
+        compiling and linking it if needed. The caller owns one reference and should
+        call release() when done with it.
+        """
+        key = (ProgramCache.preprocess(vertex_shader_code, define_dict),
+               ProgramCache.preprocess(fragment_shader_code, define_dict))
+        program_ref = ProgramCache._program_dict.get(key)
+        if program_ref is None:
+            ProgramCache._misses += 1
+            start_time = time.perf_counter()
+            program_ref = Utils.initialize_program(*key)
+            ProgramCache._compile_time += time.perf_counter() - start_time
+            ProgramCache._program_dict[key] = program_ref
+            ProgramCache._reference_dict[program_ref] = [key, 0]
+        else:
+            ProgramCache._hits += 1
+        ProgramCache.acquire(program_ref)
+        return program_ref
+
+    @staticmethod
+    def acquire(program_ref):
+        """ Add a reference to a shared program; programs not in the cache are ignored """
+        reference = ProgramCache._reference_dict.get(program_ref)
+        if reference is not None:
+            reference[1] += 1
+
+    @staticmethod
+    def release(program_ref):
+        """ Remove a reference; delete the program when none are left """
+        reference = ProgramCache._reference_dict.get(program_ref)
+        if reference is None:
+            return
+        reference[1] -= 1
+        if reference[1] <= 0:
+            del ProgramCache._reference_dict[program_ref]
+            del ProgramCache._program_dict[reference[0]]
+            GL.glDeleteProgram(program_ref)
+            # The reference may be reused by a new program
+            Uniform.forget_uploaded_values(program_ref)
+
+    @staticmethod
+    def clear():
+        """ Forget all programs without deleting them, when the GL context that owned them was destroyed """
+        ProgramCache._program_dict.clear()
+        ProgramCache._reference_dict.clear()
+        Uniform.forget_uploaded_values()
+
+    @staticmethod
+    def statistics():
+        """ Return the number of shared programs, the hit rate of get() and the time spent linking """
+        requests = ProgramCache._hits + ProgramCache._misses
+        return {
+            "programs": len(ProgramCache._program_dict),
+            "hits": ProgramCache._hits,
+            "misses": ProgramCache._misses,
+            "hit_rate": ProgramCache._hits / requests if requests else 0.0,
+            "compile_time": ProgramCache._compile_time,
+        }
+
+    @staticmethod
+    def print_statistics():
+        statistics = ProgramCache.statistics()
+        print(f"Programs: {statistics['programs']} linked for {statistics['hits'] + statistics['misses']} "
+              f"materials in {statistics['compile_time'] * 1000:.0f} ms")
@@ -1,7 +1,15 @@
 import OpenGL.GL as GL
+import numpy as np
 
 
 class Uniform:
+    # Last value sent to each (program, location) pair. Shared by all instances,
+    # since different materials may upload to the same program.
+    _uploaded_value_dict = {}
+    # Number of uniform GL calls issued and skipped because the value was unchanged
+    _issued_count = 0
+    _skipped_count = 0
+
     def __init__(self, data_type, data):
         # type of data:
         # int | bool | float | vec2 | vec3 | vec4
@@ -10,6 +18,12 @@ class Uniform:
         self._data = data
         # reference for variable location in program
         self._variable_ref = None
+        # reference of the program containing the variable
+        self._program_ref = None
+
+    @property
+    def data_type(self):
+        return self._data_type
 
     @property
     def data(self):
@@ -21,6 +35,7 @@ class Uniform:
 
     def locate_variable(self, program_ref, variable_name):
         """ Get and store reference for program variable with given name """
+        self._program_ref = program_ref
         if self._data_type == 'Light':
             self._variable_ref = {
                 "lightType":    GL.glGetUniformLocation(program_ref, variable_name + ".lightType"),
@@ -41,47 +56,116 @@ class Uniform:
         else:
             self._variable_ref = GL.glGetUniformLocation(program_ref, variable_name)
 
-    def upload_data(self):
-        """ Store data in uniform variable previously located """
+    def upload_data(self, gl_state=None):
+        """
+        Store data in uniform variable previously located.
+        If a GLState object is given, texture bindings go through it
+        so that redundant glBindTexture calls are skipped.
+        Values already held by the program location are not sent again.
+        """
         # If the program does not reference the variable, then exit
         if self._variable_ref != -1:
             if self._data_type == 'int':
-                GL.glUniform1i(self._variable_ref, self._data)
+                self._upload(self._variable_ref, self._data, GL.glUniform1i, self._data)
             elif self._data_type == 'bool':
-                GL.glUniform1i(self._variable_ref, self._data)
+                self._upload(self._variable_ref, self._data, GL.glUniform1i, self._data)
             elif self._data_type == 'float':
-                GL.glUniform1f(self._variable_ref, self._data)
+                self._upload(self._variable_ref, self._data, GL.glUniform1f, self._data)
             elif self._data_type == 'vec2':
-                GL.glUniform2f(self._variable_ref, *self._data)
+                self._upload(self._variable_ref, tuple(self._data), GL.glUniform2f, *self._data)
             elif self._data_type == 'vec3':
-                GL.glUniform3f(self._variable_ref, *self._data)
+                self._upload(self._variable_ref, tuple(self._data), GL.glUniform3f, *self._data)
             elif self._data_type == 'vec4':
-                GL.glUniform4f(self._variable_ref, *self._data)
+                self._upload(self._variable_ref, tuple(self._data), GL.glUniform4f, *self._data)
             elif self._data_type == 'mat4':
-                GL.glUniformMatrix4fv(self._variable_ref, 1, GL.GL_TRUE, self._data)
+                self._upload(self._variable_ref, self._matrix_key(self._data),
+                             GL.glUniformMatrix4fv, 1, GL.GL_TRUE, self._data)
             elif self._data_type == "sampler2D":
                 texture_object_ref, texture_unit_ref = self._data
-                # Activate texture unit
-                GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit_ref)
-                # Associate texture object reference to currently active texture unit
-                GL.glBindTexture(GL.GL_TEXTURE_2D, texture_object_ref)
+                self._bind_texture(texture_unit_ref, texture_object_ref, gl_state)
                 # Upload texture unit number (0...15) to uniform variable in shader
-                GL.glUniform1i(self._variable_ref, texture_unit_ref)
+                self._upload(self._variable_ref, texture_unit_ref, GL.glUniform1i, texture_unit_ref)
             elif self._data_type == "Light":
-                GL.glUniform1i(self._variable_ref["lightType"], self._data.light_type)
-                GL.glUniform3f(self._variable_ref["color"], *self._data.color)
-                GL.glUniform3f(self._variable_ref["direction"], *self._data.direction)
-                GL.glUniform3f(self._variable_ref["position"], *self._data.local_position)
-                GL.glUniform3f(self._variable_ref["attenuation"], *self._data.attenuation)
+                self._upload(self._variable_ref["lightType"], self._data.light_type,
+                             GL.glUniform1i, self._data.light_type)
+                self._upload(self._variable_ref["color"], tuple(self._data.color),
+                             GL.glUniform3f, *self._data.color)
+                direction = self._data.direction
+                self._upload(self._variable_ref["direction"], tuple(direction),
+                             GL.glUniform3f, *direction)
+                position = self._data.local_position
+                self._upload(self._variable_ref["position"], tuple(position),
+                             GL.glUniform3f, *position)
+                self._upload(self._variable_ref["attenuation"], tuple(self._data.attenuation),
+                             GL.glUniform3f, *self._data.attenuation)
             elif self._data_type == "Shadow":
-                GL.glUniform3f(self._variable_ref["lightDirection"], *self._data.light_source.direction)
-                GL.glUniformMatrix4fv(self._variable_ref["projectionMatrix"], 1, GL.GL_TRUE, self._data.camera.projection_matrix)
-                GL.glUniformMatrix4fv(self._variable_ref["viewMatrix"], 1, GL.GL_TRUE, self._data.camera.view_matrix)
+                light_direction = self._data.light_source.direction
+                self._upload(self._variable_ref["lightDirection"], tuple(light_direction),
+                             GL.glUniform3f, *light_direction)
+                projection_matrix = self._data.camera.projection_matrix
+                self._upload(self._variable_ref["projectionMatrix"], self._matrix_key(projection_matrix),
+                             GL.glUniformMatrix4fv, 1, GL.GL_TRUE, projection_matrix)
+                view_matrix = self._data.camera.view_matrix
+                self._upload(self._variable_ref["viewMatrix"], self._matrix_key(view_matrix),
+                             GL.glUniformMatrix4fv, 1, GL.GL_TRUE, view_matrix)
                 # Configure depth texture
                 texture_object_ref = self._data.render_target.texture.texture_ref
                 texture_unit_ref = 3
-                GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit_ref)
-                GL.glBindTexture(GL.GL_TEXTURE_2D, texture_object_ref)
-                GL.glUniform1i(self._variable_ref["depthTextureSampler"], texture_unit_ref)
-                GL.glUniform1f(self._variable_ref["strength"], self._data.strength)
-                GL.glUniform1f(self._variable_ref["bias"], self._data.bias)
+                self._bind_texture(texture_unit_ref, texture_object_ref, gl_state)
+                self._upload(self._variable_ref["depthTextureSampler"], texture_unit_ref,
+                             GL.glUniform1i, texture_unit_ref)
+                self._upload(self._variable_ref["strength"], self._data.strength,
+                             GL.glUniform1f, self._data.strength)
+                self._upload(self._variable_ref["bias"], self._data.bias,
+                             GL.glUniform1f, self._data.bias)
+
+    def _upload(self, variable_ref, value_key, gl_function, *args):
+        """
+        Call gl_function(variable_ref, *args) unless the program location
+        already holds the value identified by value_key
+        """
+        if variable_ref == -1:
+            return
+        key = (self._program_ref, variable_ref)
+        if Uniform._uploaded_value_dict.get(key) == value_key:
+            Uniform._skipped_count += 1
+            return
+        gl_function(variable_ref, *args)
+        Uniform._uploaded_value_dict[key] = value_key
+        Uniform._issued_count += 1
+
+    @staticmethod
+    def _matrix_key(matrix):
+        return np.asarray(matrix, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def forget_uploaded_values(program_ref=None):
+        """
+        Forget the values sent to a program (to all programs if None), after it
+        was deleted or its GL context destroyed, so they are sent again
+        """
+        if program_ref is None:
+            Uniform._uploaded_value_dict.clear()
+        else:
+            for key in [key for key in Uniform._uploaded_value_dict if key[0] == program_ref]:
+                del Uniform._uploaded_value_dict[key]
+
+    @staticmethod
+    def counters():
+        """ Return the number of uniform GL calls issued and skipped since the last reset """
+        return {"issued": Uniform._issued_count, "skipped": Uniform._skipped_count}
+
+    @staticmethod
+    def reset_counters():
+        Uniform._issued_count = 0
+        Uniform._skipped_count = 0
+
+    @staticmethod
+    def _bind_texture(texture_unit_ref, texture_object_ref, gl_state):
+        if gl_state is not None:
+            gl_state.bind_texture(texture_unit_ref, texture_object_ref)
+        else:
+            # Activate texture unit
+            GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit_ref)
+            # Associate texture object reference to currently active texture unit
+            GL.glBindTexture(GL.GL_TEXTURE_2D, texture_object_ref)
@@ -1,3 +1,9 @@
+import ctypes
+import hashlib
+import os
+import struct
+import time
+
 import OpenGL.GL as GL
 
 from collections import namedtuple
@@ -7,6 +13,17 @@ class Utils:
     """
     Static methods to load and compile OpenGL shaders and link to create programs
     """
+    # Linked programs are saved with glGetProgramBinary to __shadercache__/<key>.bin,
+    # where the key hashes the shader source and the GL vendor, renderer and version;
+    # later launches load them with glProgramBinary instead of compiling the source
+    PROGRAM_CACHE_DIRECTORY = "__shadercache__"
+    # magic (file identifier including the format version), binary format
+    PROGRAM_CACHE_HEADER = struct.Struct("<8sI")
+    PROGRAM_CACHE_MAGIC = b"RWPROG01"
+    # Programs loaded from binaries, compiled from source and binaries rejected by
+    # the driver, with the seconds spent loading and compiling
+    _program_statistics = {"loaded": 0, "load_time": 0.0, "compiled": 0, "compile_time": 0.0, "rejected": 0}
+
     @staticmethod
     def get_system_info():
         vendor = GL.glGetString(GL.GL_VENDOR).decode('utf-8')
@@ -16,6 +33,12 @@ class Utils:
         Result = namedtuple('SystemInfo', ['vendor', 'renderer', 'opengl', 'glsl'])
         return Result(vendor, renderer, opengl, glsl)
 
+    @staticmethod
+    def has_extension(name):
+        """ True if the current context supports the named extension, e.g. GL_EXT_texture_compression_s3tc """
+        extension_count = GL.glGetIntegerv(GL.GL_NUM_EXTENSIONS)
+        return any(GL.glGetStringi(GL.GL_EXTENSIONS, i).decode('utf-8') == name for i in range(extension_count))
+
     @staticmethod
     def initialize_shader(shader_code, shader_type):
         # Specify required OpenGL/GLSL version
@@ -41,7 +64,30 @@ class Utils:
         return shader_ref
 
     @staticmethod
-    def initialize_program(vertex_shader_code, fragment_shader_code):
+    def initialize_program(vertex_shader_code, fragment_shader_code, use_binary_cache=True):
+        """
+        Return a linked program, loaded from the program binary cache if possible;
+        otherwise compiled, linked and saved to the cache (when the driver supports it)
+        """
+        start_time = time.perf_counter()
+        cache_filename = None
+        if use_binary_cache and Utils.program_binary_supported():
+            cache_filename = Utils.program_cache_path(vertex_shader_code, fragment_shader_code)
+            program_ref = Utils.load_program_binary(cache_filename)
+            if program_ref is not None:
+                Utils._program_statistics["loaded"] += 1
+                Utils._program_statistics["load_time"] += time.perf_counter() - start_time
+                return program_ref
+        program_ref = Utils.link_program(vertex_shader_code, fragment_shader_code,
+                                         retrievable=cache_filename is not None)
+        if cache_filename is not None:
+            Utils.save_program_binary(program_ref, cache_filename)
+        Utils._program_statistics["compiled"] += 1
+        Utils._program_statistics["compile_time"] += time.perf_counter() - start_time
+        return program_ref
+
+    @staticmethod
+    def link_program(vertex_shader_code, fragment_shader_code, retrievable=False):
         vertex_shader_ref = Utils.initialize_shader(vertex_shader_code, GL.GL_VERTEX_SHADER)
         fragment_shader_ref = Utils.initialize_shader(fragment_shader_code, GL.GL_FRAGMENT_SHADER)
         # Create empty program object and store reference to it
@@ -49,6 +95,9 @@ class Utils:
         # Attach previously compiled shader programs
         GL.glAttachShader(program_ref, vertex_shader_ref)
         GL.glAttachShader(program_ref, fragment_shader_ref)
+        if retrievable:
+            # Ask the driver to keep the binary, so glGetProgramBinary can return it
+            GL.glProgramParameteri(program_ref, GL.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL.GL_TRUE)
         # Link vertex shader to fragment shader
         GL.glLinkProgram(program_ref)
         # queries whether program link was successful
@@ -62,9 +111,89 @@ class Utils:
             error_message = '\n' + error_message.decode('utf-8')
             # Raise exception: halt application and print error message
             raise Exception(error_message)
+        # The shaders are freed with the program that they are now linked into
+        GL.glDeleteShader(vertex_shader_ref)
+        GL.glDeleteShader(fragment_shader_ref)
         # Linking was successful; return program reference value
         return program_ref
 
+    @staticmethod
+    def program_binary_supported():
+        """ True if the context can save and load program binaries (OpenGL 4.1 or ARB_get_program_binary) """
+        try:
+            return GL.glGetIntegerv(GL.GL_NUM_PROGRAM_BINARY_FORMATS) > 0
+        except GL.GLError:
+            return False
+
+    @staticmethod
+    def program_cache_path(vertex_shader_code, fragment_shader_code):
+        """ Cache file of a program: a hash of its source and of the driver that compiles it """
+        info = Utils.get_system_info()
+        key = hashlib.sha256("\0".join([vertex_shader_code, fragment_shader_code, info.vendor,
+                                         info.renderer, info.opengl, info.glsl]).encode("utf-8"))
+        return os.path.join(Utils.PROGRAM_CACHE_DIRECTORY, key.hexdigest() + ".bin")
+
+    @staticmethod
+    def load_program_binary(cache_filename):
+        """ Create a program from a cached binary; return None if it is missing or the driver rejects it """
+        try:
+            with open(cache_filename, "rb") as cache_file:
+                data = cache_file.read()
+        except OSError:
+            return None
+        header_size = Utils.PROGRAM_CACHE_HEADER.size
+        if len(data) <= header_size:
+            return None
+        magic, binary_format = Utils.PROGRAM_CACHE_HEADER.unpack(data[0:header_size])
+        if magic != Utils.PROGRAM_CACHE_MAGIC:
+            return None
+        binary = data[header_size:]
+        program_ref = GL.glCreateProgram()
+        try:
+            GL.glProgramBinary(program_ref, binary_format, binary, len(binary))
+            link_success = GL.glGetProgramiv(program_ref, GL.GL_LINK_STATUS)
+        except GL.GLError:
+            link_success = False
+        if not link_success:
+            # E.g. after a driver update; the program is compiled from source again
+            GL.glDeleteProgram(program_ref)
+            Utils._program_statistics["rejected"] += 1
+            return None
+        return program_ref
+
+    @staticmethod
+    def save_program_binary(program_ref, cache_filename):
+        """ Write the binary of a linked program; failures (e.g. read-only directory) are ignored """
+        binary_length = GL.glGetProgramiv(program_ref, GL.GL_PROGRAM_BINARY_LENGTH)
+        if binary_length <= 0:
+            return
+        length = GL.GLsizei()
+        binary_format = GL.GLenum()
+        binary = (ctypes.c_ubyte * binary_length)()
+        GL.glGetProgramBinary(program_ref, binary_length, ctypes.byref(length), ctypes.byref(binary_format), binary)
+        temporary_filename = cache_filename + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+            with open(temporary_filename, "wb") as cache_file:
+                cache_file.write(Utils.PROGRAM_CACHE_HEADER.pack(Utils.PROGRAM_CACHE_MAGIC, binary_format.value))
+                cache_file.write(bytes(binary)[0:length.value])
+            # Replace atomically so a concurrent reader never sees a partial file
+            os.replace(temporary_filename, cache_filename)
+        except OSError:
+            pass
+
+    @staticmethod
+    def program_statistics():
+        """ Programs loaded from binaries, compiled from source and rejected binaries, with the time spent """
+        return dict(Utils._program_statistics)
+
+    @staticmethod
+    def print_program_statistics():
+        statistics = Utils._program_statistics
+        print(f"Program binaries: {statistics['loaded']} loaded in {statistics['load_time'] * 1000:.0f} ms, "
+              f"{statistics['compiled']} compiled in {statistics['compile_time'] * 1000:.0f} ms"
+              + (f", {statistics['rejected']} rejected by the driver" if statistics['rejected'] else ""))
+
     @staticmethod
     def print_system_info():
         info = Utils.get_system_info()
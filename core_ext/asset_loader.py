@@ -0,0 +1,152 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core_ext.texture_cache import TextureCache
+from geometry.decimate import Decimator
+from geometry.geometry_cache import GeometryCache
+from geometry.mesh_cache import MeshCache
+from geometry.objGeo import ObjGeo
+
+
+class AssetLoader:
+    """
+    Loads the models and images of a scene in two stages. Files are read and
+    decoded in a thread pool (OBJ models parsed or mapped from the mesh cache,
+    images decoded or mapped from their baked mip chains), which needs no GL
+    context and can start while the menu is shown. upload() then creates the
+    GPU objects on the GL thread, a few assets per frame within a time budget,
+    so the window keeps drawing while it loads. Each uploaded asset holds one
+    reference in GeometryCache or TextureCache, so the game finds it there.
+
+    Assets are described as (AssetLoader.MODEL, OBJ file), (AssetLoader.MODEL_LEVEL,
+    OBJ file, level of detail), which is generated first if needed (see
+    Decimator.ensure_level), or (AssetLoader.IMAGE, image file, flip). Decoded
+    assets are kept for the whole process: loading again with a new GL context
+    repeats only the uploads.
+    """
+    MODEL = "model"
+    MODEL_LEVEL = "model level"
+    IMAGE = "image"
+    # Seconds of GL uploads per call of upload(), i.e. per frame while loading
+    UPLOAD_TIME_BUDGET = 0.008
+    _executor = None
+    # asset -> future of its decoded data; done futures are kept for reuse
+    _future_dict = {}
+    # Assets of the current load, in upload order
+    _asset_list = []
+    # asset -> geometry or texture uploaded to the current GL context
+    _uploaded_dict = {}
+    # Seconds spent in upload() and the number of calls, since the last clear()
+    _upload_time = 0.0
+    _upload_calls = 0
+
+    @staticmethod
+    def _decode(asset):
+        if asset[0] == AssetLoader.MODEL:
+            return AssetLoader._load_model(asset[1])
+        if asset[0] == AssetLoader.MODEL_LEVEL:
+            return AssetLoader._load_model(Decimator.ensure_level(asset[1], asset[2], AssetLoader._load_model))
+        return TextureCache.decode(asset[1], asset[2])
+
+    @staticmethod
+    def _load_model(filename):
+        return MeshCache.load(filename, ObjGeo.parse_obj)
+
+    @staticmethod
+    def start(asset_list, workers=None):
+        """
+        Add assets to the current load and start decoding them in the background;
+        assets already decoded (or being decoded) are not read again
+        """
+        if AssetLoader._executor is None:
+            AssetLoader._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="AssetLoader")
+        for asset in asset_list:
+            if asset not in AssetLoader._future_dict:
+                AssetLoader._future_dict[asset] = AssetLoader._executor.submit(AssetLoader._decode, asset)
+            if asset not in AssetLoader._asset_list:
+                AssetLoader._asset_list.append(asset)
+
+    @staticmethod
+    def progress():
+        """ (assets decoded, assets uploaded, total) of the current load """
+        asset_list = AssetLoader._asset_list
+        decoded = sum(AssetLoader._future_dict[asset].done() for asset in asset_list)
+        uploaded = sum(asset in AssetLoader._uploaded_dict for asset in asset_list)
+        return decoded, uploaded, len(asset_list)
+
+    @staticmethod
+    def poll(progress_callback=None):
+        """
+        Report progress without uploading (e.g. from the menu, which has no GL context):
+        calls progress_callback(decoded, uploaded, total) and returns True once all is decoded
+        """
+        decoded, uploaded, total = AssetLoader.progress()
+        if progress_callback is not None:
+            progress_callback(decoded, uploaded, total)
+        return decoded == total
+
+    @staticmethod
+    def upload(time_budget=UPLOAD_TIME_BUDGET, progress_callback=None):
+        """
+        Upload decoded assets, in order, on the calling (GL) thread until time_budget
+        seconds have passed; at least one decoded asset is uploaded per call. Errors
+        raised while decoding (e.g. a missing file) are raised here. Calls
+        progress_callback(decoded, uploaded, total); returns True once all is uploaded.
+        """
+        start_time = time.perf_counter()
+        for asset in AssetLoader._asset_list:
+            if asset in AssetLoader._uploaded_dict:
+                continue
+            if time.perf_counter() - start_time > time_budget:
+                break
+            future = AssetLoader._future_dict[asset]
+            if not future.done():
+                continue
+            if future.exception() is not None:
+                # Read the file again on the next start()
+                del AssetLoader._future_dict[asset]
+                raise future.exception()
+            if asset[0] == AssetLoader.MODEL:
+                resource = GeometryCache.get(ObjGeo, asset[1], arrays=future.result())
+            elif asset[0] == AssetLoader.MODEL_LEVEL:
+                resource = GeometryCache.get(ObjGeo, Decimator.level_path(asset[1], asset[2]),
+                                             arrays=future.result())
+            else:
+                resource = TextureCache.get(asset[1], flip=asset[2], decoded=future.result())
+            AssetLoader._uploaded_dict[asset] = resource
+        AssetLoader._upload_time += time.perf_counter() - start_time
+        AssetLoader._upload_calls += 1
+        decoded, uploaded, total = AssetLoader.progress()
+        if progress_callback is not None:
+            progress_callback(decoded, uploaded, total)
+        return uploaded == total
+
+    @staticmethod
+    def clear():
+        """
+        Forget the uploads of the current load, when the GL context that owned them
+        was destroyed (GeometryCache and TextureCache are cleared separately);
+        decoded data is kept, so the next load only uploads again
+        """
+        AssetLoader._asset_list = []
+        AssetLoader._uploaded_dict.clear()
+        AssetLoader._upload_time = 0.0
+        AssetLoader._upload_calls = 0
+
+    @staticmethod
+    def statistics():
+        """ Return the assets of the current load, how many are decoded and uploaded, and the upload time """
+        decoded, uploaded, total = AssetLoader.progress()
+        return {
+            "assets": total,
+            "decoded": decoded,
+            "uploaded": uploaded,
+            "upload_time": AssetLoader._upload_time,
+            "upload_calls": AssetLoader._upload_calls,
+        }
+
+    @staticmethod
+    def print_statistics():
+        statistics = AssetLoader.statistics()
+        print(f"Assets: {statistics['uploaded']} of {statistics['assets']} uploaded in "
+              f"{statistics['upload_time'] * 1000:.0f} ms over {statistics['upload_calls']} frames")
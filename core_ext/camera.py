@@ -1,6 +1,7 @@
 from numpy.linalg import inv
 
 from core.matrix import Matrix
+from core_ext.frustum import Frustum
 from core_ext.object3d import Object3D
 
 
@@ -10,6 +11,8 @@ class Camera(Object3D):
         super().__init__()
         self._projection_matrix = Matrix.make_perspective(angle_of_view, aspect_ratio, near, far)
         self._view_matrix = Matrix.make_identity()  # inverse of self._matrix
+        # Frustum of the current view and projection, built when first needed
+        self._frustum = None
 
     @property
     def projection_matrix(self):
@@ -19,11 +22,21 @@ class Camera(Object3D):
     def view_matrix(self):
         return self._view_matrix
 
+    @property
+    def frustum(self):
+        """ Volume seen by the camera as of the last call to update_view_matrix """
+        if self._frustum is None:
+            self._frustum = Frustum(self._projection_matrix @ self._view_matrix)
+        return self._frustum
+
     def set_perspective(self, angle_of_view=50, aspect_ratio=1, near=0.1, far=1000):
         self._projection_matrix = Matrix.make_perspective(angle_of_view, aspect_ratio, near, far)
+        self._frustum = None
 
     def set_orthographic(self, left=-1, right=1, bottom=-1, top=1, near=-1, far=1):
-        self._projection_matrix = Matrix.make_orthographic(left, right, bottom, top, near, far)
+        self._projection_matrix = Matrix.make_ortographic(left, right, bottom, top, near, far)
+        self._frustum = None
 
     def update_view_matrix(self):
-        self._view_matrix = inv(self.global_matrix)
\ No newline at end of file
+        self._view_matrix = inv(self.global_matrix)
+        self._frustum = None
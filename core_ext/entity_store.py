@@ -0,0 +1,102 @@
+import numpy as np
+
+
+class EntityStore:
+    """
+    State of many simple moving entities in numpy columns (one row per entity):
+    position, velocity, and the frequency, phase, amplitude and base height
+    of a vertical oscillation. Each system updates all rows with one vectorized
+    expression. Rows may be bound to scene nodes, whose positions are then
+    written back in one pass, or read as a block to fill instance buffers.
+    """
+    def __init__(self, capacity=64):
+        self._position = np.zeros((capacity, 3))
+        self._velocity = np.zeros((capacity, 3))
+        self._frequency = np.zeros(capacity)
+        self._phase = np.zeros(capacity)
+        self._amplitude = np.zeros(capacity)
+        self._base_height = np.zeros(capacity)
+        self._alive = np.zeros(capacity, dtype=bool)
+        # scene node bound to each row, or None
+        self._node_list = [None] * capacity
+        # rows in use are below this index
+        self._row_count = 0
+        # rows below row_count that were removed and can be reused
+        self._free_row_list = []
+
+    @property
+    def position(self):
+        return self._position
+
+    @property
+    def velocity(self):
+        return self._velocity
+
+    @property
+    def count(self):
+        """ Number of entities in the store """
+        return self._row_count - len(self._free_row_list)
+
+    def add(self, position_list, frequency=0, phase=0, amplitude=0, base_height=0, velocity=0, node_list=None):
+        """
+        Add entities; every argument except position_list may be a single value
+        or one value per entity. Returns the array of their row indices.
+        """
+        position_list = np.asarray(position_list, dtype=float).reshape(-1, 3)
+        count = len(position_list)
+        rows = self._allocate_rows(count)
+        self._position[rows] = position_list
+        self._velocity[rows] = velocity
+        self._frequency[rows] = frequency
+        self._phase[rows] = phase
+        self._amplitude[rows] = amplitude
+        self._base_height[rows] = base_height
+        self._alive[rows] = True
+        for i, row in enumerate(rows):
+            self._node_list[row] = node_list[i] if node_list is not None else None
+        return rows
+
+    def remove(self, rows):
+        for row in np.atleast_1d(rows):
+            self._alive[row] = False
+            self._node_list[row] = None
+            self._free_row_list.append(int(row))
+
+    def _allocate_rows(self, count):
+        reused = [self._free_row_list.pop() for _ in range(min(count, len(self._free_row_list)))]
+        new_count = count - len(reused)
+        if self._row_count + new_count > len(self._position):
+            self._grow(max(2 * len(self._position), self._row_count + new_count))
+        new_rows = list(range(self._row_count, self._row_count + new_count))
+        self._row_count += new_count
+        return np.array(reused + new_rows, dtype=int)
+
+    def _grow(self, capacity):
+        extra = capacity - len(self._position)
+        self._position = np.vstack([self._position, np.zeros((extra, 3))])
+        self._velocity = np.vstack([self._velocity, np.zeros((extra, 3))])
+        self._frequency = np.concatenate([self._frequency, np.zeros(extra)])
+        self._phase = np.concatenate([self._phase, np.zeros(extra)])
+        self._amplitude = np.concatenate([self._amplitude, np.zeros(extra)])
+        self._base_height = np.concatenate([self._base_height, np.zeros(extra)])
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+        self._node_list.extend([None] * extra)
+
+    # Systems
+
+    def integrate(self, delta_time):
+        """ Move every entity by its velocity """
+        self._position[0:self._row_count] += self._velocity[0:self._row_count] * delta_time
+
+    def oscillate(self, time):
+        """ Set the height of every entity: base height + amplitude * sin(frequency * time + phase) """
+        n = self._row_count
+        self._position[0:n, 1] = self._base_height[0:n] \
+            + self._amplitude[0:n] * np.sin(self._frequency[0:n] * time + self._phase[0:n])
+
+    def write_back(self):
+        """ Copy the positions of all rows bound to scene nodes to those nodes """
+        position_list = self._position[0:self._row_count].tolist()
+        for node, position in zip(self._node_list, position_list):
+            if node is not None:
+                node.set_position(position)
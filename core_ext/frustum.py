@@ -0,0 +1,39 @@
+import numpy as np
+
+
+class Frustum:
+    """
+    The six planes (left, right, bottom, top, near, far) of the volume seen by
+    a camera, extracted from its projection matrix times its view matrix.
+    Each plane is (a, b, c, d) with a unit normal (a, b, c) pointing inside,
+    so a point p is inside the plane when a*x + b*y + c*z + d >= 0.
+    """
+    def __init__(self, view_projection_matrix):
+        m = np.asarray(view_projection_matrix, dtype=float)
+        planes = np.array([
+            m[3] + m[0], m[3] - m[0],
+            m[3] + m[1], m[3] - m[1],
+            m[3] + m[2], m[3] - m[2],
+        ])
+        length = np.linalg.norm(planes[:, 0:3], axis=1, keepdims=True)
+        length[length == 0] = 1
+        self._planes = planes / length
+        self._normals = self._planes[:, 0:3]
+        self._offsets = self._planes[:, 3]
+        self._positive_normals = self._normals > 0
+
+    @property
+    def planes(self):
+        return self._planes
+
+    def intersects_sphere(self, center, radius):
+        """ False only if the sphere lies completely outside one of the planes """
+        distances = self._normals @ center + self._offsets
+        return bool((distances >= -radius).all())
+
+    def intersects_box(self, minimum, maximum):
+        """ False only if the axis-aligned box lies completely outside one of the planes """
+        # Corner of the box farthest along the normal of each plane
+        farthest_corners = np.where(self._positive_normals, maximum, minimum)
+        distances = np.einsum("ij,ij->i", self._normals, farthest_corners) + self._offsets
+        return bool((distances >= 0).all())
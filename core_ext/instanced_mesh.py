@@ -0,0 +1,174 @@
+import OpenGL.GL as GL
+import numpy as np
+
+from core.attribute import Attribute
+from core_ext.mesh import Mesh
+
+
+class InstancedMesh(Mesh):
+    """
+    Draws many copies of one geometry with one material in a single draw call.
+    Each instance has its own model matrix (applied after the matrix of the mesh itself)
+    and color (multiplied with the base color of the material).
+    The material must be created with use_instancing=True.
+    With levels of detail, every instance picks its own level by its distance
+    from the camera; each level is drawn with one draw call of its own.
+    """
+    def __init__(self, geometry, material, matrix_list, color_list=None, usage=GL.GL_DYNAMIC_DRAW):
+        super().__init__(geometry, material)
+        # Row-major instance matrices, shape (instance count, 4, 4)
+        self._instance_matrices = np.array(matrix_list, dtype=np.float32).reshape(-1, 4, 4)
+        instance_count = len(self._instance_matrices)
+        if color_list is None:
+            color_list = np.ones((instance_count, 3))
+        self._instance_colors = np.array(color_list, dtype=np.float32).reshape(-1, 3)
+        self._instance_attribute_dict = {
+            "instanceMatrix": Attribute("mat4", self._column_major_matrices(), divisor=1, usage=usage),
+            "instanceColor": Attribute("vec3", self._instance_colors, divisor=1, usage=usage),
+        }
+        self._associate_instance_attributes(self._vao_ref, self._instance_attribute_dict)
+        self._instances_changed = False
+        # Instance attributes of every level of detail, by VAO
+        self._level_attribute_dict = {self._vao_ref: self._instance_attribute_dict}
+        # Instance rows drawn with each level, or None before the first select_level (all with level 0)
+        self._level_rows = None
+        self._levels_changed = False
+
+    @property
+    def instance_count(self):
+        return len(self._instance_matrices)
+
+    @property
+    def instance_matrices(self):
+        return self._instance_matrices
+
+    @property
+    def instance_positions(self):
+        """ Return a copy of the translation of every instance, shape (instance count, 3) """
+        return self._instance_matrices[:, 0:3, 3].copy()
+
+    @property
+    def instance_colors(self):
+        return self._instance_colors
+
+    @property
+    def world_bounds(self):
+        """
+        Bounds around all drawn instances, in the form of Mesh.world_bounds;
+        recomputed on every call, since instances usually move every frame
+        """
+        geometry_bounds = self._geometry.bounds
+        count = self.instance_count
+        if geometry_bounds is None or count == 0:
+            return None
+        minimum, maximum, _, _ = geometry_bounds
+        matrices = self._instance_matrices[0:count]
+        rotation_scale = matrices[:, 0:3, 0:3]
+        # Box of every instance, as in Mesh.transform_bounds
+        box_center = rotation_scale @ ((minimum + maximum) / 2) + matrices[:, 0:3, 3]
+        half_size = np.abs(rotation_scale) @ ((maximum - minimum) / 2)
+        instance_minimum = (box_center - half_size).min(axis=0)
+        instance_maximum = (box_center + half_size).max(axis=0)
+        center = (instance_minimum + instance_maximum) / 2
+        radius = float(np.linalg.norm(instance_maximum - center))
+        return self.transform_bounds((instance_minimum, instance_maximum, center, radius), self.global_matrix)
+
+    def add_level(self, geometry, distance):
+        """ Instances at least distance away from the camera are drawn with geometry """
+        vao_ref = super().add_level(geometry, distance)
+        usage = self._instance_attribute_dict["instanceMatrix"].usage
+        attribute_dict = {
+            "instanceMatrix": Attribute("mat4", self._column_major_matrices(), divisor=1, usage=usage),
+            "instanceColor": Attribute("vec3", self._instance_colors, divisor=1, usage=usage),
+        }
+        self._associate_instance_attributes(vao_ref, attribute_dict)
+        self._level_attribute_dict[vao_ref] = attribute_dict
+        return vao_ref
+
+    def select_level(self, camera_position):
+        """ Sort the instances into levels of detail by their distance from the camera """
+        if len(self._level_list) == 1:
+            return
+        matrix = self.global_matrix
+        positions = self._instance_matrices[0:self.instance_count, 0:3, 3] @ matrix[0:3, 0:3].T + matrix[0:3, 3]
+        distances = np.linalg.norm(positions - camera_position, axis=1)
+        level_index = np.searchsorted([level[0] for level in self._level_list], distances, side="right") - 1
+        level_rows = [np.flatnonzero(level_index == i) for i in range(len(self._level_list))]
+        # Instance buffers are only rewritten if instances moved or changed level
+        if self._instances_changed or self._level_rows is None \
+                or any(not np.array_equal(old, new) for old, new in zip(self._level_rows, level_rows)):
+            self._level_rows = level_rows
+            self._levels_changed = True
+
+    def set_instance_matrices(self, matrix_list):
+        self._instance_matrices[:] = np.asarray(matrix_list, dtype=np.float32).reshape(-1, 4, 4)
+        self._instances_changed = True
+
+    def set_instance_positions(self, position_list):
+        """ Set the translation of every instance at once from an array of shape (instance count, 3) """
+        self._instance_matrices[:, 0:3, 3] = position_list
+        self._instances_changed = True
+
+    def set_instance_colors(self, color_list):
+        self._instance_colors[:] = np.asarray(color_list, dtype=np.float32).reshape(-1, 3)
+        self._instances_changed = True
+
+    def draw(self, draw_style):
+        if self._level_rows is None:
+            if self._instances_changed:
+                self._upload_instance_data()
+            self._draw_instances(draw_style, self._geometry, self.instance_count)
+            return
+        # Farther levels first, each with its own VAO; level 0 last,
+        # so the VAO bound by the renderer is bound again at the end
+        for (_, geometry, vao_ref), rows in reversed(list(zip(self._level_list, self._level_rows))):
+            if len(rows) == 0 and vao_ref != self._vao_ref:
+                continue
+            GL.glBindVertexArray(vao_ref)
+            if self._levels_changed and len(rows) > 0:
+                self._upload_level_data(self._level_attribute_dict[vao_ref], rows)
+            if len(rows) > 0:
+                self._draw_instances(draw_style, geometry, len(rows))
+        self._levels_changed = False
+        self._instances_changed = False
+
+    def release(self):
+        """ Also free the instance buffers of every level of detail """
+        for attribute_dict in self._level_attribute_dict.values():
+            for attribute_object in attribute_dict.values():
+                attribute_object.delete()
+        self._level_attribute_dict = {}
+        super().release()
+
+    @staticmethod
+    def _draw_instances(draw_style, geometry, instance_count):
+        if geometry.index_count is not None:
+            GL.glDrawElementsInstanced(draw_style, geometry.index_count, GL.GL_UNSIGNED_INT, None, instance_count)
+        else:
+            GL.glDrawArraysInstanced(draw_style, 0, geometry.vertex_count, instance_count)
+
+    def _associate_instance_attributes(self, vao_ref, attribute_dict):
+        # Instance attributes are stored in the same VAO as the geometry attributes
+        GL.glBindVertexArray(vao_ref)
+        for variable_name, attribute_object in attribute_dict.items():
+            attribute_object.associate_variable(self._material.program_ref, variable_name)
+        GL.glBindVertexArray(0)
+
+    def _upload_level_data(self, attribute_dict, rows):
+        """ Pack the instances of one level at the start of its instance buffers """
+        matrices = np.ascontiguousarray(self._instance_matrices[rows].transpose(0, 2, 1)).reshape(-1, 16)
+        attribute_dict["instanceMatrix"].set_elements(0, matrices)
+        attribute_dict["instanceColor"].set_elements(0, self._instance_colors[rows])
+        for attribute_object in attribute_dict.values():
+            attribute_object.upload_data()
+
+    def _column_major_matrices(self):
+        # GLSL reads a mat4 attribute column by column
+        return np.ascontiguousarray(self._instance_matrices.transpose(0, 2, 1)).reshape(-1, 16)
+
+    def _upload_instance_data(self):
+        self._instance_attribute_dict["instanceMatrix"].data = self._column_major_matrices()
+        self._instance_attribute_dict["instanceColor"].data = self._instance_colors
+        for attribute_object in self._instance_attribute_dict.values():
+            attribute_object.upload_data()
+        self._instances_changed = False
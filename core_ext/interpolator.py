@@ -0,0 +1,101 @@
+import numpy as np
+
+
+class TransformInterpolator:
+    """
+    Smooths motion between fixed simulation ticks: while a frame is rendered,
+    the local transforms of the registered objects are blended between their
+    values at the last two ticks. Positions and scales are interpolated
+    linearly and orientations along the shorter arc between them (normalized
+    quaternion interpolation, which is close to a slerp for the small turns
+    made during one tick).
+    """
+    def __init__(self, object_list=()):
+        self._object_list = []
+        # local matrices at the previous and at the last tick, shape (object count, 4, 4)
+        self._previous_matrices = np.zeros((0, 4, 4))
+        self._current_matrices = np.zeros((0, 4, 4))
+        # the local matrix objects replaced by apply(), put back by restore()
+        self._simulated_matrix_list = []
+        for object3d in object_list:
+            self.add(object3d)
+
+    def add(self, object3d):
+        matrix = np.array(object3d.local_matrix, dtype=float).reshape(1, 4, 4)
+        self._object_list.append(object3d)
+        self._previous_matrices = np.concatenate([self._previous_matrices, matrix])
+        self._current_matrices = np.concatenate([self._current_matrices, matrix])
+
+    def _read_matrices(self):
+        # Copied, since the simulation may change the local matrices in place
+        return np.array([object3d.local_matrix for object3d in self._object_list], dtype=float).reshape(-1, 4, 4)
+
+    def save_previous(self):
+        """ Call at the start of every simulation tick """
+        self._previous_matrices = self._read_matrices()
+
+    def apply(self, alpha):
+        """ Move the objects to their interpolated transforms; undo with restore() after rendering """
+        self._current_matrices = self._read_matrices()
+        self._simulated_matrix_list = [object3d.local_matrix for object3d in self._object_list]
+        blended_matrices = self.blend(self._previous_matrices, self._current_matrices, alpha)
+        for object3d, matrix in zip(self._object_list, blended_matrices):
+            object3d.local_matrix = matrix
+
+    def restore(self):
+        """ Put the objects back at their simulated transforms """
+        for object3d, matrix in zip(self._object_list, self._simulated_matrix_list):
+            object3d.local_matrix = matrix
+        self._simulated_matrix_list = []
+
+    @staticmethod
+    def blend(previous_matrices, current_matrices, alpha):
+        """ Interpolate arrays of rotation, scale and translation matrices, shape (N, 4, 4) """
+        previous_scales = np.linalg.norm(previous_matrices[:, 0:3, 0:3], axis=1)
+        current_scales = np.linalg.norm(current_matrices[:, 0:3, 0:3], axis=1)
+        previous_quaternions = TransformInterpolator._to_quaternions(
+            previous_matrices[:, 0:3, 0:3] / previous_scales[:, np.newaxis, :])
+        current_quaternions = TransformInterpolator._to_quaternions(
+            current_matrices[:, 0:3, 0:3] / current_scales[:, np.newaxis, :])
+        # q and -q are the same rotation; use the one on the shorter arc
+        sign = np.where(np.sum(previous_quaternions * current_quaternions, axis=1) < 0, -1.0, 1.0)
+        quaternions = previous_quaternions + alpha * (sign[:, np.newaxis] * current_quaternions - previous_quaternions)
+        quaternions /= np.linalg.norm(quaternions, axis=1, keepdims=True)
+        scales = previous_scales + alpha * (current_scales - previous_scales)
+        blended_matrices = np.zeros_like(current_matrices)
+        blended_matrices[:, 0:3, 0:3] = TransformInterpolator._to_rotations(quaternions) * scales[:, np.newaxis, :]
+        blended_matrices[:, 0:3, 3] = previous_matrices[:, 0:3, 3] \
+            + alpha * (current_matrices[:, 0:3, 3] - previous_matrices[:, 0:3, 3])
+        blended_matrices[:, 3, 3] = 1
+        return blended_matrices
+
+    @staticmethod
+    def _to_quaternions(rotations):
+        """ Unit quaternions (w, x, y, z), shape (N, 4), of rotation matrices, shape (N, 3, 3) """
+        r = rotations
+        # Each row is 4 * (w, x, y, z) times one of its components; the row of the
+        # largest component is the most accurate
+        candidates = np.stack([
+            np.stack([1 + r[:, 0, 0] + r[:, 1, 1] + r[:, 2, 2], r[:, 2, 1] - r[:, 1, 2],
+                      r[:, 0, 2] - r[:, 2, 0], r[:, 1, 0] - r[:, 0, 1]], axis=1),
+            np.stack([r[:, 2, 1] - r[:, 1, 2], 1 + r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2],
+                      r[:, 0, 1] + r[:, 1, 0], r[:, 0, 2] + r[:, 2, 0]], axis=1),
+            np.stack([r[:, 0, 2] - r[:, 2, 0], r[:, 0, 1] + r[:, 1, 0],
+                      1 - r[:, 0, 0] + r[:, 1, 1] - r[:, 2, 2], r[:, 1, 2] + r[:, 2, 1]], axis=1),
+            np.stack([r[:, 1, 0] - r[:, 0, 1], r[:, 0, 2] + r[:, 2, 0],
+                      r[:, 1, 2] + r[:, 2, 1], 1 - r[:, 0, 0] - r[:, 1, 1] + r[:, 2, 2]], axis=1),
+        ], axis=1)
+        diagonal = np.stack([1 + r[:, 0, 0] + r[:, 1, 1] + r[:, 2, 2], 1 + r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2],
+                             1 - r[:, 0, 0] + r[:, 1, 1] - r[:, 2, 2], 1 - r[:, 0, 0] - r[:, 1, 1] + r[:, 2, 2]], axis=1)
+        quaternions = candidates[np.arange(len(r)), np.argmax(diagonal, axis=1)]
+        return quaternions / np.linalg.norm(quaternions, axis=1, keepdims=True)
+
+    @staticmethod
+    def _to_rotations(quaternions):
+        """ Rotation matrices, shape (N, 3, 3), of unit quaternions (w, x, y, z) """
+        w, x, y, z = quaternions.T
+        return np.stack([
+            np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=1),
+            np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=1),
+            np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=1),
+        ], axis=1)
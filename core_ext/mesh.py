@@ -1,6 +1,9 @@
 import OpenGL.GL as GL
+import numpy as np
 
+from core.program_cache import ProgramCache
 from core_ext.object3d import Object3D
+from geometry.geometry_cache import GeometryCache
 
 
 class Mesh(Object3D):
@@ -14,19 +17,31 @@ class Mesh(Object3D):
         self._material = material
         # Should this object be rendered?
         self._visible = True
-        # Set up associations between attributes stored in geometry
-        # and shader program stored in material
-        self._vao_ref = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self._vao_ref)
-        for variable_name, attribute_object in geometry.attribute_dict.items():
-            attribute_object.associate_variable(material.program_ref, variable_name)
-        # Unbind this vertex array object
-        GL.glBindVertexArray(0)
+        # May the renderer skip this mesh when its bounds are outside the view?
+        self._frustum_culled = True
+        # Static meshes never move once the level is built, so StaticBatcher may merge them
+        self._static = False
+        # World-space bounds, with the global matrix version and geometry bounds they were computed from
+        self._world_bounds = None
+        self._world_bounds_key = None
+        self._vao_ref = self._create_vertex_array(geometry)
+        # Shared geometries and programs stay on the GPU while any mesh uses them;
+        # the material keeps its own reference to the program (see Material.release)
+        GeometryCache.acquire(geometry)
+        ProgramCache.acquire(material.program_ref)
+        # Levels of detail, (distance, geometry, VAO) sorted by distance;
+        # level 0 is the geometry given here, used from distance 0
+        self._level_list = [(0, geometry, self._vao_ref)]
 
     @property
     def geometry(self):
+        """ Geometry of the level of detail selected last """
         return self._geometry
 
+    @property
+    def level_list(self):
+        return self._level_list
+
     @property
     def material(self):
         return self._material
@@ -38,3 +53,112 @@ class Mesh(Object3D):
     @property
     def visible(self):
         return self._visible
+
+    @property
+    def frustum_culled(self):
+        """ Set to False for meshes whose vertex shader moves vertices outside the geometry bounds """
+        return self._frustum_culled
+
+    @frustum_culled.setter
+    def frustum_culled(self, frustum_culled):
+        self._frustum_culled = frustum_culled
+
+    @property
+    def static(self):
+        return self._static
+
+    @static.setter
+    def static(self, static):
+        self._static = static
+
+    @property
+    def world_bounds(self):
+        """
+        (minimum, maximum, center, radius): the bounding box of the geometry as
+        an axis-aligned box in world space, and its bounding sphere in world
+        space; None if the geometry has no positions. Cached until the mesh moves.
+        """
+        matrix = self.global_matrix
+        geometry_bounds = self._geometry.bounds
+        key = (self._global_matrix_version, id(geometry_bounds))
+        if key != self._world_bounds_key:
+            if geometry_bounds is None:
+                self._world_bounds = None
+            else:
+                self._world_bounds = self.transform_bounds(geometry_bounds, matrix)
+            self._world_bounds_key = key
+        return self._world_bounds
+
+    @staticmethod
+    def transform_bounds(bounds, matrix):
+        """ Transform (minimum, maximum, center, radius) by a matrix into world space """
+        minimum, maximum, center, radius = bounds
+        rotation_scale = matrix[0:3, 0:3]
+        translation = matrix[0:3, 3]
+        # The transformed box is enclosed by the box of half size |M| * (half size)
+        box_center = rotation_scale @ ((minimum + maximum) / 2) + translation
+        half_size = np.abs(rotation_scale) @ ((maximum - minimum) / 2)
+        # The radius grows with the largest scale of the matrix
+        scale = np.sqrt((rotation_scale ** 2).sum(axis=0).max())
+        return (box_center - half_size, box_center + half_size,
+                rotation_scale @ center + translation, radius * scale)
+
+    def _create_vertex_array(self, geometry):
+        """
+        Set up associations between attributes stored in geometry
+        and shader program stored in material
+        """
+        vao_ref = GL.glGenVertexArrays(1)
+        GL.glBindVertexArray(vao_ref)
+        for variable_name, attribute_object in geometry.attribute_dict.items():
+            attribute_object.associate_variable(self._material.program_ref, variable_name)
+        # The element buffer binding of indexed geometry is part of the VAO state
+        if geometry.index_buffer_ref is not None:
+            GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, geometry.index_buffer_ref)
+        # Unbind this vertex array object
+        GL.glBindVertexArray(0)
+        return vao_ref
+
+    def add_level(self, geometry, distance):
+        """
+        Add a level of detail: geometry (usually with fewer vertices) is drawn
+        instead when the mesh is at least distance away from the camera.
+        As for the geometry of the constructor, the mesh acquires a reference of
+        its own to a shared geometry and gives it back in release(); a caller that
+        got the geometry from GeometryCache.get() still releases its reference.
+        Returns the VAO of the new level.
+        """
+        vao_ref = self._create_vertex_array(geometry)
+        GeometryCache.acquire(geometry)
+        self._level_list.append((distance, geometry, vao_ref))
+        self._level_list.sort(key=lambda level: level[0])
+        return vao_ref
+
+    def select_level(self, camera_position):
+        """ Pick the level of detail for the distance from the camera to the center of the mesh bounds """
+        if len(self._level_list) == 1:
+            return
+        bounds = self.world_bounds
+        center = bounds[2] if bounds is not None else self.global_position
+        distance = float(np.linalg.norm(np.subtract(center, camera_position)))
+        for level_distance, geometry, vao_ref in self._level_list:
+            if distance >= level_distance:
+                self._geometry = geometry
+                self._vao_ref = vao_ref
+
+    def draw(self, draw_style):
+        """ Issue the draw call; the VAO and program must already be bound """
+        if self._geometry.index_count is not None:
+            GL.glDrawElements(draw_style, self._geometry.index_count, GL.GL_UNSIGNED_INT, None)
+        else:
+            GL.glDrawArrays(draw_style, 0, self._geometry.vertex_count)
+
+    def release(self):
+        """
+        Free the VAOs of this mesh and its references to shared geometries and to
+        the program of its material. The mesh cannot be drawn afterwards.
+        """
+        for _, geometry, vao_ref in self._level_list:
+            GL.glDeleteVertexArrays(1, [vao_ref])
+            GeometryCache.release(geometry)
+        ProgramCache.release(self._material.program_ref)
@@ -9,6 +9,13 @@ class Object3D:
         self._matrix = Matrix.make_identity()
         self._parent = None
         self._children_list = []
+        # cached transform with respect to the root of the scene graph;
+        # recalculated only when this node or one of its ancestors changes
+        self._global_matrix = None
+        self._global_matrix_dirty = True
+        # incremented every time the global matrix is recalculated,
+        # so data derived from it can be cached
+        self._global_matrix_version = 0
 
     @property
     def children_list(self):
@@ -17,42 +24,60 @@ class Object3D:
     @children_list.setter
     def children_list(self, children_list):
         self._children_list = children_list
+        for child in self._children_list:
+            child.mark_global_matrix_dirty()
+        self.topology_changed()
 
     @property
     def descendant_list(self):
         """ Return a single list containing all descendants """
         # master list of all descendant nodes
         descendant_list = []
-        # nodes to be added to descendant list,
+        # stack of nodes to be added to descendant list,
         # and whose children will be added to this list
         nodes_to_process = [self]
         # continue processing nodes while any are left
-        while len(nodes_to_process) > 0:
-            # remove first node from list
-            node = nodes_to_process.pop(0)
+        while nodes_to_process:
+            # remove last node from stack
+            node = nodes_to_process.pop()
             # add this node to descendant list
             descendant_list.append(node)
-            # children of this node must also be processed
-            nodes_to_process = node._children_list + nodes_to_process
+            # children of this node must also be processed;
+            # pushed in reverse so the first child is processed next
+            nodes_to_process.extend(reversed(node._children_list))
         return descendant_list
 
     @property
     def global_matrix(self):
         """
         Calculate the transformation of this Object3D
-        relative to the root Object3D of the scene graph
+        relative to the root Object3D of the scene graph.
+        The cached matrix is returned as a read-only array: changing it in place
+        would corrupt the cache of this node and of its descendants, so
+        transformations must go through local_matrix or apply_matrix instead.
         """
-        if self._parent is None:
-            return self._matrix
-        else:
-            return self._parent.global_matrix @ self._matrix
+        if self._global_matrix_dirty:
+            if self._parent is None:
+                # a view, so the local matrix itself stays writable
+                self._global_matrix = self._matrix.view()
+            else:
+                self._global_matrix = self._parent.global_matrix @ self._matrix
+            self._global_matrix.setflags(write=False)
+            self._global_matrix_dirty = False
+            self._global_matrix_version += 1
+        return self._global_matrix
+
+    @property
+    def global_matrix_version(self):
+        return self._global_matrix_version
 
     @property
     def global_position(self):
         """ Return the global or world position of the object """
-        return [self.global_matrix.item((0, 3)),
-                self.global_matrix.item((1, 3)),
-                self.global_matrix.item((2, 3))]
+        global_matrix = self.global_matrix
+        return [global_matrix.item((0, 3)),
+                global_matrix.item((1, 3)),
+                global_matrix.item((2, 3))]
 
     @property
     def local_matrix(self):
@@ -61,6 +86,7 @@ class Object3D:
     @local_matrix.setter
     def local_matrix(self, matrix):
         self._matrix = matrix
+        self.mark_global_matrix_dirty()
 
     @property
     def local_position(self):
@@ -80,6 +106,21 @@ class Object3D:
     @parent.setter
     def parent(self, parent):
         self._parent = parent
+        self.mark_global_matrix_dirty()
+
+    def mark_global_matrix_dirty(self):
+        """
+        Invalidate the cached global matrix of this node and all its descendants.
+        A dirty node always has dirty descendants, so the walk stops early
+        at nodes that are already invalidated.
+        """
+        nodes_to_process = [self]
+        while nodes_to_process:
+            node = nodes_to_process.pop()
+            if node._global_matrix_dirty and node is not self:
+                continue
+            node._global_matrix_dirty = True
+            nodes_to_process.extend(node._children_list)
 
     @property
     def rotation_matrix(self):
@@ -101,10 +142,21 @@ class Object3D:
     def add(self, child):
         self._children_list.append(child)
         child.parent = self
+        self.topology_changed(child, True)
 
     def remove(self, child):
         self._children_list.remove(child)
         child.parent = None
+        self.topology_changed(child, False)
+
+    def topology_changed(self, node=None, added=True):
+        """
+        Notify the root of the scene graph that the subtree rooted at node was
+        added (or removed) somewhere in the tree; node is None when the change
+        is not a single subtree. The root may override this to refresh caches.
+        """
+        if self._parent is not None:
+            self._parent.topology_changed(node, added)
 
     # apply geometric transformations
     def apply_matrix(self, matrix, local=True):
@@ -114,6 +166,7 @@ class Object3D:
         else:
             # global transform
             self._matrix = matrix @ self._matrix
+        self.mark_global_matrix_dirty()
 
     def translate(self, x, y, z, local=True):
         m = Matrix.make_translation(x, y, z)
@@ -137,12 +190,14 @@ class Object3D:
 
     def set_position(self, position):
         """ Set the local position of the object """
-        self._matrix.itemset((0, 3), position[0])
-        self._matrix.itemset((1, 3), position[1])
-        self._matrix.itemset((2, 3), position[2])
+        self._matrix[0, 3] = position[0]
+        self._matrix[1, 3] = position[1]
+        self._matrix[2, 3] = position[2]
+        self.mark_global_matrix_dirty()
 
     def look_at(self, target_position):
         self._matrix = Matrix.make_look_at(self.global_position, target_position)
+        self.mark_global_matrix_dirty()
 
     def set_direction(self, direction):
         position = self.local_position
@@ -168,6 +223,7 @@ class Object3D:
         else:
             self._matrix[:3, :3] = rotation_matrix[:3, :3]
         self._matrix[:, 3] = translation
+        self.mark_global_matrix_dirty()
 
 
     def scale(self, sx, sy=None, sz=None, local=True):
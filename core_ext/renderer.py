@@ -1,9 +1,11 @@
 import OpenGL.GL as GL
+import numpy as np
 import pygame
 
 from HUD import HUD
-from core_ext.mesh import Mesh
-from light.light import Light
+from core.gl_state import GLState
+from core.uniform import Uniform
+from core_ext.instanced_mesh import InstancedMesh
 from light.shadow import Shadow
 
 
@@ -16,20 +18,56 @@ class Renderer:
         self._window_size = pygame.display.get_surface().get_size()
         self._shadows_enabled = False
         self.hud = HUD()
+        # Skips redundant OpenGL state changes and counts them
+        self._gl_state = GLState()
+        # Draw order for each scene, stored as (scene version, opaque meshes, transparent meshes)
+        self._render_queue_dict = {}
+        self._state_counters = self._gl_state.counters
+        self._uniform_counters = Uniform.counters()
+        # Skip meshes whose bounds are outside the camera (or shadow camera) frustum
+        self._frustum_culling = True
+        self._cull_counters = self._new_cull_counters()
 
     @property
     def window_size(self):
         return self._window_size
 
+    @property
+    def state_counters(self):
+        """ State changes issued and skipped during the last call to render """
+        return self._state_counters
+
+    @property
+    def uniform_counters(self):
+        """ Uniform GL calls issued and skipped (value unchanged) during the last call to render """
+        return self._uniform_counters
+
+    @property
+    def frustum_culling(self):
+        return self._frustum_culling
+
+    @frustum_culling.setter
+    def frustum_culling(self, frustum_culling):
+        self._frustum_culling = frustum_culling
+
+    @property
+    def cull_counters(self):
+        """ Meshes drawn and culled in the main and shadow passes during the last call to render """
+        return self._cull_counters
+
     @property
     def shadow_object(self):
         return self._shadow_object
 
-    def render(self, scene, camera, clear_color=True, clear_depth=True, render_target=None):
-        # Filter descendents
-        descendant_list = scene.descendant_list
-        mesh_filter = lambda x: isinstance(x, Mesh)
-        mesh_list = list(filter(mesh_filter, descendant_list))
+    def render(self, scene, camera, clear_color=True, clear_depth=True, render_target=None, draw_hud=True):
+        # State may have been changed outside the renderer since the last frame
+        self._gl_state.reset()
+        Uniform.reset_counters()
+        # Opaque meshes sorted by program, texture and VAO, then transparent
+        # meshes back to front; light registry kept by the scene
+        render_queue = self._get_render_queue(scene, camera.global_position)
+        light_list = scene.light_list
+        cull_counters = self._new_cull_counters()
 
         # shadow pass
         if self._shadows_enabled:
@@ -42,23 +80,34 @@ class Renderer:
             GL.glClear(GL.GL_DEPTH_BUFFER_BIT)
             # Everything in the scene gets rendered with depthMaterial so
             # only need to call glUseProgram & set matrices once
-            GL.glUseProgram(self._shadow_object.material.program_ref)
+            self._gl_state.use_program(self._shadow_object.material.program_ref)
             self._shadow_object.update_internal()
-            for mesh in mesh_list:
+            shadow_uniform_dict = self._shadow_object.material.uniform_dict
+            # Camera matrices of the shadow are the same for every mesh
+            shadow_uniform_dict["viewMatrix"].upload_data()
+            shadow_uniform_dict["projectionMatrix"].upload_data()
+            shadow_frustum = self._shadow_object.camera.frustum if self._frustum_culling else None
+            for mesh in render_queue:
                 # Skip invisible meshes
                 if not mesh.visible:
                     continue
                 # Only triangle-based meshes cast shadows
                 if mesh.material.setting_dict["drawStyle"] != GL.GL_TRIANGLES:
                     continue
+                # The depth material has no per-instance transform
+                if isinstance(mesh, InstancedMesh):
+                    continue
+                # Skip meshes outside the volume seen by the light
+                if not self._in_frustum(mesh, shadow_frustum):
+                    cull_counters["shadow_culled"] += 1
+                    continue
+                cull_counters["shadow_drawn"] += 1
                 # Bind VAO
-                GL.glBindVertexArray(mesh.vao_ref)
+                self._gl_state.bind_vertex_array(mesh.vao_ref)
                 # Update transform data
-                self._shadow_object.material.uniform_dict["modelMatrix"].data = mesh.global_matrix
-                # Update uniforms (matrix data) stored in shadow material
-                for var_name, uniform_obj in self._shadow_object.material.uniform_dict.items():
-                    uniform_obj.upload_data()
-                GL.glDrawArrays(GL.GL_TRIANGLES, 0, mesh.geometry.vertex_count)
+                shadow_uniform_dict["modelMatrix"].data = mesh.global_matrix
+                shadow_uniform_dict["modelMatrix"].upload_data()
+                mesh.draw(GL.GL_TRIANGLES)
 
         # Activate render target
         if render_target is None:
@@ -77,45 +126,140 @@ class Renderer:
         if clear_depth:
             GL.glClear(GL.GL_DEPTH_BUFFER_BIT)
         # blending
-        GL.glEnable(GL.GL_BLEND)
+        self._gl_state.set_capability(GL.GL_BLEND, True)
         GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
         # Update camera view (calculate inverse)
         camera.update_view_matrix()
-        # Extract list of all Mesh instances in scene
-        descendant_list = scene.descendant_list
-        mesh_list = list(filter(lambda x: isinstance(x, Mesh), descendant_list))
-        # Extract list of all Light instances in scene
-        light_list = list(filter(lambda x: isinstance(x, Light), descendant_list))
-        for mesh in mesh_list:
+        frustum = camera.frustum if self._frustum_culling else None
+        camera_position = np.array(camera.global_position)
+        # Programs that already received camera and light data during this frame
+        program_ref_set = set()
+        previous_material = None
+        for mesh in render_queue:
             # If this object is not visible, continue to next object in list
             if not mesh.visible:
                 continue
-            GL.glUseProgram(mesh.material.program_ref)
+            if not self._in_frustum(mesh, frustum):
+                cull_counters["culled"] += 1
+                continue
+            cull_counters["drawn"] += 1
+            # Level of detail for the distance from the camera (may change the VAO)
+            mesh.select_level(camera_position)
+            material = mesh.material
+            self._gl_state.use_program(material.program_ref)
             # Bind VAO
-            GL.glBindVertexArray(mesh.vao_ref)
+            self._gl_state.bind_vertex_array(mesh.vao_ref)
+            if material.program_ref not in program_ref_set:
+                self._upload_frame_uniforms(material, camera, light_list)
+                program_ref_set.add(material.program_ref)
+            if material is not previous_material:
+                # Update uniforms stored in material
+                for variable_name, uniform_object in material.uniform_dict.items():
+                    # modelMatrix is set and uploaded for every mesh below
+                    if variable_name != "modelMatrix" and not self._is_frame_uniform(variable_name, uniform_object):
+                        uniform_object.upload_data(self._gl_state)
+                # Update render settings
+                material.update_render_settings(self._gl_state)
+                previous_material = material
             # Update uniform values stored outside of material
-            mesh.material.uniform_dict["modelMatrix"].data = mesh.global_matrix
-            mesh.material.uniform_dict["viewMatrix"].data = camera.view_matrix
-            mesh.material.uniform_dict["projectionMatrix"].data = camera.projection_matrix
-            # If material uses light data, add lights from list
-            if "light0" in mesh.material.uniform_dict.keys():
-                for light_number in range(len(light_list)):
-                    light_name = "light" + str(light_number)
-                    light_instance = light_list[light_number]
-                    mesh.material.uniform_dict[light_name].data = light_instance
-            # Add camera position if needed (specular lighting)
-            if "viewPosition" in mesh.material.uniform_dict.keys():
-                mesh.material.uniform_dict["viewPosition"].data = camera.global_position
-            # Add shadow data if enabled and used by shader
-            if self._shadows_enabled and "shadow0" in mesh.material.uniform_dict.keys():
-                mesh.material.uniform_dict["shadow0"].data = self._shadow_object
-            # Update uniforms stored in material
-            for uniform_object in mesh.material.uniform_dict.values():
-                uniform_object.upload_data()
-            # Update render settings
-            mesh.material.update_render_settings()
-            GL.glDrawArrays(mesh.material.setting_dict["drawStyle"], 0, mesh.geometry.vertex_count)
-        self.render_hud()
+            material.uniform_dict["modelMatrix"].data = mesh.global_matrix
+            material.uniform_dict["modelMatrix"].upload_data()
+            mesh.draw(material.setting_dict["drawStyle"])
+        self._state_counters = self._gl_state.counters
+        self._uniform_counters = Uniform.counters()
+        self._cull_counters = cull_counters
+        if draw_hud:
+            self.render_hud()
+
+    def _upload_frame_uniforms(self, material, camera, light_list):
+        """
+        Upload the uniforms that are the same for every mesh during a frame
+        (camera, lights and shadow); called once per program per frame
+        """
+        uniform_dict = material.uniform_dict
+        uniform_dict["viewMatrix"].data = camera.view_matrix
+        uniform_dict["projectionMatrix"].data = camera.projection_matrix
+        # If material uses light data, add lights from list
+        if "light0" in uniform_dict.keys():
+            for light_number in range(len(light_list)):
+                light_name = "light" + str(light_number)
+                light_instance = light_list[light_number]
+                uniform_dict[light_name].data = light_instance
+        # Add camera position if needed (specular lighting)
+        if "viewPosition" in uniform_dict.keys():
+            uniform_dict["viewPosition"].data = camera.global_position
+        # Add shadow data if enabled and used by shader
+        if self._shadows_enabled and "shadow0" in uniform_dict.keys():
+            uniform_dict["shadow0"].data = self._shadow_object
+        for variable_name, uniform_object in uniform_dict.items():
+            if self._is_frame_uniform(variable_name, uniform_object):
+                uniform_object.upload_data(self._gl_state)
+
+    @staticmethod
+    def _new_cull_counters():
+        return {"drawn": 0, "culled": 0, "shadow_drawn": 0, "shadow_culled": 0}
+
+    @staticmethod
+    def _in_frustum(mesh, frustum):
+        """ True unless culling is on (frustum given) and the bounds of the mesh are outside the frustum """
+        if frustum is None or not mesh.frustum_culled:
+            return True
+        bounds = mesh.world_bounds
+        if bounds is None:
+            return True
+        minimum, maximum, center, radius = bounds
+        # The sphere test is cheaper, the box test tighter
+        return frustum.intersects_sphere(center, radius) and frustum.intersects_box(minimum, maximum)
+
+    @staticmethod
+    def _is_frame_uniform(variable_name, uniform_object):
+        return variable_name in ("viewMatrix", "projectionMatrix", "viewPosition") \
+            or uniform_object.data_type in ("Light", "Shadow")
+
+    def _get_render_queue(self, scene, camera_position):
+        """
+        Return the opaque meshes of the scene sorted by program, then texture, then VAO,
+        so that consecutive draws share as much OpenGL state as possible, followed by
+        the transparent meshes from the farthest to the nearest, so they blend over
+        what is behind them. The opaque sort is stable and only redone when the
+        scene tree changes; the transparent meshes are sorted every frame.
+        """
+        version, opaque_list, transparent_list = self._render_queue_dict.get(scene, (None, None, None))
+        if version != scene.version:
+            opaque_list = []
+            transparent_list = []
+            for mesh in scene.mesh_list:
+                if mesh.material.setting_dict["transparent"]:
+                    transparent_list.append(mesh)
+                else:
+                    opaque_list.append(mesh)
+            opaque_list.sort(key=self._sort_key)
+            self._render_queue_dict[scene] = (scene.version, opaque_list, transparent_list)
+        if len(transparent_list) > 1:
+            camera_position = np.array(camera_position)
+            transparent_list = sorted(transparent_list, reverse=True,
+                                      key=lambda mesh: self._distance_squared(mesh, camera_position))
+        return opaque_list + transparent_list
+
+    @staticmethod
+    def _sort_key(mesh):
+        texture_ref = 0
+        for uniform_object in mesh.material.uniform_dict.values():
+            if uniform_object.data_type == "sampler2D":
+                texture_ref = int(uniform_object.data[0])
+                break
+        # The VAO of a mesh with levels of detail changes as the camera moves,
+        # and the sort is not redone then
+        vao_ref = int(mesh.vao_ref) if len(mesh.level_list) == 1 else 0
+        return int(mesh.material.program_ref), texture_ref, vao_ref
+
+    @staticmethod
+    def _distance_squared(mesh, camera_position):
+        """ Squared distance from the camera to the center of the mesh bounds (or its position) """
+        bounds = mesh.world_bounds
+        center = bounds[2] if bounds is not None else mesh.global_position
+        offset = np.subtract(center, camera_position)
+        return float(offset @ offset)
 
     def enable_shadows(self, shadow_light, strength=0.5, resolution=(512, 512)):
         self._shadows_enabled = True
@@ -123,7 +267,7 @@ class Renderer:
 
     def render_hud(self):
         # Disable depth test for HUD rendering
-        GL.glDisable(GL.GL_DEPTH_TEST)
+        self._gl_state.set_capability(GL.GL_DEPTH_TEST, False)
         self.hud.render()
         # Re-enable depth test for 3D rendering
-        GL.glEnable(GL.GL_DEPTH_TEST)
\ No newline at end of file
+        self._gl_state.set_capability(GL.GL_DEPTH_TEST, True)
\ No newline at end of file
@@ -1,4 +1,6 @@
+from core_ext.mesh import Mesh
 from core_ext.object3d import Object3D
+from light.light import Light
 
 
 class Scene(Object3D):
@@ -6,3 +8,59 @@ class Scene(Object3D):
 
     def __init__(self):
         super().__init__()
+        # incremented every time a node is added to or removed from the tree
+        self._version = 0
+        # registries of the meshes and lights in the tree, kept up to date
+        # as subtrees are added and removed
+        self._mesh_list = []
+        self._light_list = []
+        # set when the registries must be rebuilt from the whole tree
+        self._registries_stale = False
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def mesh_list(self):
+        """ Return all Mesh instances in the scene, in the order they were added """
+        self._update_registries()
+        return self._mesh_list
+
+    @property
+    def light_list(self):
+        """ Return all Light instances in the scene, in the order they were added """
+        self._update_registries()
+        return self._light_list
+
+    def topology_changed(self, node=None, added=True):
+        self._version += 1
+        if node is None or self._registries_stale:
+            self._registries_stale = True
+            return
+        # Only the added or removed subtree is visited
+        descendant_list = node.descendant_list
+        mesh_list = [descendant for descendant in descendant_list if isinstance(descendant, Mesh)]
+        light_list = [descendant for descendant in descendant_list if isinstance(descendant, Light)]
+        if added:
+            self._mesh_list.extend(mesh_list)
+            self._light_list.extend(light_list)
+        else:
+            self._mesh_list = self._without(self._mesh_list, mesh_list)
+            self._light_list = self._without(self._light_list, light_list)
+
+    @staticmethod
+    def _without(node_list, removed_list):
+        if not removed_list:
+            return node_list
+        removed = set(map(id, removed_list))
+        return [node for node in node_list if id(node) not in removed]
+
+    def _update_registries(self):
+        """ Rebuild the registries from the whole tree, if a change could not be applied incrementally """
+        if not self._registries_stale:
+            return
+        descendant_list = self.descendant_list
+        self._mesh_list = [node for node in descendant_list if isinstance(node, Mesh)]
+        self._light_list = [node for node in descendant_list if isinstance(node, Light)]
+        self._registries_stale = False
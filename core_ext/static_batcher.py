@@ -0,0 +1,49 @@
+from core_ext.instanced_mesh import InstancedMesh
+from core_ext.mesh import Mesh
+from geometry.geometry import Geometry
+
+
+class StaticBatcher:
+    """
+    Merge the static meshes of a scene that share a material into one mesh
+    each: the world transform of every mesh is baked into its vertices, so the
+    merged mesh has an identity matrix, one set of buffers and one draw call.
+    Run once, after the level is built; the merged meshes are removed from
+    their parents and released.
+    """
+    @staticmethod
+    def can_batch(mesh):
+        """ Static, visible, plain meshes with 3D positions and one level of detail """
+        position_attribute = mesh.geometry.attribute_dict.get("vertexPosition")
+        return mesh.static and mesh.visible and not isinstance(mesh, InstancedMesh) \
+            and len(mesh.level_list) == 1 and position_attribute is not None \
+            and position_attribute.data_type == "vec3"
+
+    @staticmethod
+    def batch_key(mesh):
+        """ Meshes can be merged if they share the material and have the same attributes """
+        attribute_dict = mesh.geometry.attribute_dict
+        return id(mesh.material), tuple(sorted((name, attribute.data_type) for name, attribute in attribute_dict.items()))
+
+    @staticmethod
+    def batch(scene):
+        """ Merge the static meshes of the scene; returns the list of merged meshes added to it """
+        group_dict = {}
+        for mesh in scene.mesh_list:
+            if StaticBatcher.can_batch(mesh):
+                group_dict.setdefault(StaticBatcher.batch_key(mesh), []).append(mesh)
+        batch_list = []
+        for mesh_list in group_dict.values():
+            # A single mesh already takes a single draw call
+            if len(mesh_list) < 2:
+                continue
+            geometry = Geometry.combine([mesh.geometry for mesh in mesh_list],
+                                        [mesh.global_matrix for mesh in mesh_list])
+            batch_mesh = Mesh(geometry, mesh_list[0].material)
+            batch_mesh.static = True
+            scene.add(batch_mesh)
+            batch_list.append(batch_mesh)
+            for mesh in mesh_list:
+                mesh.parent.remove(mesh)
+                mesh.release()
+        return batch_list
@@ -1,14 +1,26 @@
 import OpenGL.GL as GL
+import numpy as np
 import pygame
+from OpenGL.GL.EXT.texture_compression_s3tc import GL_COMPRESSED_RGB_S3TC_DXT1_EXT
+from PIL import Image
 
 
 class Texture:
-    def __init__(self, file_name=None, property_dict={}):
+    # Minification filters that sample from mipmaps
+    MIPMAP_FILTERS = (GL.GL_NEAREST_MIPMAP_NEAREST, GL.GL_LINEAR_MIPMAP_NEAREST,
+                      GL.GL_NEAREST_MIPMAP_LINEAR, GL.GL_LINEAR_MIPMAP_LINEAR)
+
+    def __init__(self, file_name=None, property_dict={}, pixel_data=None):
         # Pygame object for storing pixel data;
         # can load from image or manipulate directly
         self._surface = None
+        # Alternatively, RGBA pixels as a numpy array of shape (height, width, 4),
+        # bottom row first (see decode_image)
+        self._pixel_data = pixel_data
         # reference of available texture from GPU
         self._texture_ref = GL.glGenTextures(1)
+        # Size of the uploaded texture, including mipmaps
+        self._byte_size = 0
         # default property values
         self._property_dict = {
             "magFilter": GL.GL_LINEAR,
@@ -19,6 +31,7 @@ class Texture:
         self.set_properties(property_dict)
         if file_name is not None:
             self.load_image(file_name)
+        if file_name is not None or pixel_data is not None:
             self.upload_data()
 
     @property
@@ -28,14 +41,38 @@ class Texture:
     @surface.setter
     def surface(self, surface):
         self._surface = surface
+        self._pixel_data = None
+
+    @property
+    def pixel_data(self):
+        return self._pixel_data
 
     @property
     def texture_ref(self):
         return self._texture_ref
 
+    @property
+    def byte_size(self):
+        """ GPU memory of the uploaded texture, including mipmaps """
+        return self._byte_size
+
+    @staticmethod
+    def decode_image(file_name, flip=True):
+        """
+        Decode an image file into RGBA pixels, a numpy array of shape (height, width, 4),
+        bottom row first as OpenGL expects (top row first if flip is False).
+        The pixels are decoded straight into one buffer, without Python objects per pixel.
+        """
+        with Image.open(file_name) as image:
+            image = image.convert("RGBA")
+        if flip:
+            image = image.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+        return np.asarray(image)
+
     def load_image(self, file_name):
         """ Load image from file """
-        self._surface = pygame.image.load(file_name)
+        self._surface = None
+        self._pixel_data = Texture.decode_image(file_name)
 
     def set_properties(self, property_dict):
         """ Set property values """
@@ -48,17 +85,52 @@ class Texture:
 
     def upload_data(self):
         """ Upload pixel data to GPU """
-        # Store image dimensions
-        width = self._surface.get_width()
-        height = self._surface.get_height()
-        # Convert image data to string buffer
-        pixel_data = pygame.image.tostring(self._surface, "RGBA", True)
+        if self._pixel_data is not None:
+            # Store image dimensions
+            height, width = self._pixel_data.shape[0:2]
+            pixel_data = np.ascontiguousarray(self._pixel_data, dtype=np.uint8)
+        else:
+            width = self._surface.get_width()
+            height = self._surface.get_height()
+            # Convert image data to string buffer
+            pixel_data = pygame.image.tostring(self._surface, "RGBA", True)
         # Specify texture used by the following functions
         GL.glBindTexture(GL.GL_TEXTURE_2D, self._texture_ref)
         # Send pixel data to texture buffer
         GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, width, height, 0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, pixel_data)
-        # Generate mipmap image from uploaded pixel data
-        GL.glGenerateMipmap(GL.GL_TEXTURE_2D)
+        self._byte_size = width * height * 4
+        # Generate mipmap image from uploaded pixel data,
+        # unless the minification filter never samples them
+        if self._property_dict["minFilter"] in Texture.MIPMAP_FILTERS:
+            GL.glGenerateMipmap(GL.GL_TEXTURE_2D)
+            # The whole chain adds about a third of the base level
+            self._byte_size = self._byte_size * 4 // 3
+        self._set_parameters()
+
+    def upload_levels(self, level_list, compressed=False):
+        """
+        Upload a precomputed mip chain, e.g. memory-mapped by TextureBaker.read:
+        a list of (width, height, data), level 0 first; data is RGBA pixels,
+        or BC1 (S3TC DXT1) blocks if compressed. Only level 0 is uploaded
+        if the minification filter does not use mipmaps.
+        """
+        if self._property_dict["minFilter"] not in Texture.MIPMAP_FILTERS:
+            level_list = level_list[0:1]
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self._texture_ref)
+        self._byte_size = 0
+        for level, (width, height, data) in enumerate(level_list):
+            if compressed:
+                GL.glCompressedTexImage2D(GL.GL_TEXTURE_2D, level, GL_COMPRESSED_RGB_S3TC_DXT1_EXT,
+                                          width, height, 0, data.nbytes, data)
+            else:
+                GL.glTexImage2D(GL.GL_TEXTURE_2D, level, GL.GL_RGBA, width, height, 0,
+                                GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, data)
+            self._byte_size += data.nbytes
+        # Levels past the last one uploaded would make the texture incomplete
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAX_LEVEL, len(level_list) - 1)
+        self._set_parameters()
+
+    def _set_parameters(self):
         # Specify technique for magnifying/minifying textures
         GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, self._property_dict["magFilter"])
         GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, self._property_dict["minFilter"])
@@ -66,4 +138,9 @@ class Texture:
         GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, self._property_dict["wrap"])
         GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, self._property_dict["wrap"])
         # Set default border color to white; important for rendering shadows
-        GL.glTexParameterfv(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_BORDER_COLOR, [1, 1, 1, 1])
\ No newline at end of file
+        GL.glTexParameterfv(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_BORDER_COLOR, [1, 1, 1, 1])
+
+    def delete_texture(self):
+        """ Free the texture on the GPU """
+        GL.glDeleteTextures(1, [self._texture_ref])
+        self._byte_size = 0
@@ -0,0 +1,239 @@
+"""
+Offline mipmap baking for textures.
+
+An image is decoded once, its whole mip chain is computed (box filter, as
+glGenerateMipmap does) and written to __texcache__/<name>.tex next to the
+image; the runtime loader memory-maps that file and uploads every level
+directly, with no image decoding and no glGenerateMipmap. Opaque images can
+be stored compressed as BC1 (DXT1, 4 bits per pixel instead of 32); where
+the driver lacks S3TC they are decompressed at load time. A baked file is
+only used while the modification time and size of the image match its header.
+
+Bake every texture loaded by ObjectCreator, in the row order it uses:
+    python -m core_ext.texture_baker [--compress] [--top-down image ...]
+"""
+import argparse
+import os
+import struct
+
+import numpy as np
+from PIL import Image
+
+from core_ext.texture import Texture
+
+
+class TextureBaker:
+    # file identifier including the format version
+    MAGIC = b"RWTEX001"
+    # magic, source mtime (ns), source size (bytes), flipped rows, format, width, height, level count
+    HEADER = struct.Struct("<8sqqIIIII")
+    DIRECTORY = "__texcache__"
+    FORMAT_RGBA8 = 0
+    FORMAT_BC1 = 1
+
+    @staticmethod
+    def cache_path(filename, flip=True):
+        """ images/sky.jpg -> images/__texcache__/sky.jpg.tex (sky.jpg.topdown.tex if not flipped) """
+        directory, name = os.path.split(filename)
+        suffix = ".tex" if flip else ".topdown.tex"
+        return os.path.join(directory, TextureBaker.DIRECTORY, name + suffix)
+
+    @staticmethod
+    def level_sizes(width, height):
+        """ (width, height) of every level of a full mip chain, down to 1x1 """
+        size_list = [(width, height)]
+        while width > 1 or height > 1:
+            width, height = max(1, width // 2), max(1, height // 2)
+            size_list.append((width, height))
+        return size_list
+
+    @staticmethod
+    def level_byte_size(width, height, data_format):
+        if data_format == TextureBaker.FORMAT_BC1:
+            return ((width + 3) // 4) * ((height + 3) // 4) * 8
+        return width * height * 4
+
+    @staticmethod
+    def mip_chain(pixel_data):
+        """
+        Every level of RGBA pixels of shape (height, width, 4), each one box-filtered
+        in floating point from the previous one; for odd sizes the box covers the whole
+        previous level, so the image does not shift as the last row/column is dropped
+        """
+        level_list = [np.ascontiguousarray(pixel_data, dtype=np.uint8)]
+        for width, height in TextureBaker.level_sizes(pixel_data.shape[1], pixel_data.shape[0])[1:]:
+            previous = level_list[-1]
+            level = np.stack([np.asarray(Image.fromarray(previous[:, :, i].astype(np.float32), "F")
+                                         .resize((width, height), Image.Resampling.BOX))
+                              for i in range(4)], axis=-1)
+            level_list.append((level + 0.5).astype(np.uint8))
+        return level_list
+
+    @staticmethod
+    def _blocks(pixel_data):
+        """ RGB pixels as 4x4 blocks of shape (block rows, block columns, 16, 3), edges repeated to fill """
+        height, width = pixel_data.shape[0:2]
+        padded = np.pad(pixel_data[:, :, 0:3], ((0, -height % 4), (0, -width % 4), (0, 0)), mode="edge")
+        block_rows, block_columns = padded.shape[0] // 4, padded.shape[1] // 4
+        return padded.reshape(block_rows, 4, block_columns, 4, 3).transpose(0, 2, 1, 3, 4) \
+            .reshape(block_rows, block_columns, 16, 3)
+
+    @staticmethod
+    def _color_565(color):
+        color = color.astype(np.uint32)
+        return ((color[..., 0] * 31 + 127) // 255 << 11) | ((color[..., 1] * 63 + 127) // 255 << 5) \
+            | ((color[..., 2] * 31 + 127) // 255)
+
+    @staticmethod
+    def _palette(color0, color1):
+        """ The four colors of BC1 blocks in four-color mode, shape (..., 4, 3) """
+        endpoint_list = []
+        for color in (color0, color1):
+            red = (color >> 11) & 31
+            green = (color >> 5) & 63
+            blue = color & 31
+            # Expand to 8 bits by repeating the high bits, as the hardware does
+            endpoint_list.append(np.stack([(red << 3) | (red >> 2), (green << 2) | (green >> 4),
+                                           (blue << 3) | (blue >> 2)], axis=-1).astype(np.float32))
+        first, second = endpoint_list
+        return np.stack([first, second, (2 * first + second) / 3, (first + 2 * second) / 3], axis=-2)
+
+    @staticmethod
+    def compress_bc1(pixel_data):
+        """
+        Encode RGB pixels as BC1 blocks (two RGB565 endpoints and 2-bit indices per
+        4x4 block), using the corners of the color bounding box of each block as endpoints
+        """
+        blocks = TextureBaker._blocks(pixel_data)
+        color0 = TextureBaker._color_565(blocks.max(axis=2))
+        color1 = TextureBaker._color_565(blocks.min(axis=2))
+        # Four-color mode needs color0 > color1; blocks of one color use index 0 only
+        palette = TextureBaker._palette(color0, color1)
+        distances = ((blocks[:, :, :, None, :].astype(np.float32) - palette[:, :, None, :, :]) ** 2).sum(axis=-1)
+        indices = distances.argmin(axis=-1).astype(np.uint32)
+        indices[color0 == color1] = 0
+        shifts = np.arange(16, dtype=np.uint32) * 2
+        index_bits = np.bitwise_or.reduce(indices << shifts, axis=-1)
+        result = np.empty(color0.shape + (4,), dtype="<u2")
+        result[..., 0] = color0
+        result[..., 1] = color1
+        result[..., 2] = index_bits & 0xFFFF
+        result[..., 3] = index_bits >> 16
+        return result.reshape(-1).view(np.uint8)
+
+    @staticmethod
+    def decompress_bc1(data, width, height):
+        """ Decode BC1 blocks to RGBA pixels of shape (height, width, 4) """
+        block_rows, block_columns = (height + 3) // 4, (width + 3) // 4
+        words = np.frombuffer(data, dtype="<u2").reshape(block_rows, block_columns, 4).astype(np.uint32)
+        palette = TextureBaker._palette(words[..., 0], words[..., 1])
+        index_bits = words[..., 2] | (words[..., 3] << 16)
+        indices = (index_bits[..., None] >> (np.arange(16, dtype=np.uint32) * 2)) & 3
+        colors = np.take_along_axis(palette, indices[..., None].astype(np.intp), axis=-2)
+        pixels = colors.reshape(block_rows, block_columns, 4, 4, 3).transpose(0, 2, 1, 3, 4) \
+            .reshape(block_rows * 4, block_columns * 4, 3)[0:height, 0:width]
+        result = np.full((height, width, 4), 255, dtype=np.uint8)
+        result[:, :, 0:3] = (pixels + 0.5).astype(np.uint8)
+        return result
+
+    @staticmethod
+    def read(filename, flip=True, compression_supported=True):
+        """
+        Memory-map the baked mip chain of an image; return None if it is missing or stale.
+        Returns (level list, compressed) where every level is (width, height, data) and
+        data is BC1 blocks if compressed, RGBA pixels otherwise. Compressed levels are
+        decompressed here unless compression_supported.
+        """
+        cache_filename = TextureBaker.cache_path(filename, flip)
+        try:
+            stat = os.stat(filename)
+            with open(cache_filename, "rb") as cache_file:
+                header = cache_file.read(TextureBaker.HEADER.size)
+        except OSError:
+            return None
+        if len(header) != TextureBaker.HEADER.size:
+            return None
+        magic, mtime_ns, size, flipped, data_format, width, height, level_count = TextureBaker.HEADER.unpack(header)
+        if magic != TextureBaker.MAGIC or mtime_ns != stat.st_mtime_ns or size != stat.st_size \
+                or flipped != flip or data_format not in (TextureBaker.FORMAT_RGBA8, TextureBaker.FORMAT_BC1):
+            return None
+        size_list = TextureBaker.level_sizes(width, height)[0:level_count]
+        expected_size = TextureBaker.HEADER.size + sum(TextureBaker.level_byte_size(w, h, data_format)
+                                                       for w, h in size_list)
+        if os.path.getsize(cache_filename) != expected_size:
+            return None
+        compressed = data_format == TextureBaker.FORMAT_BC1
+        level_list = []
+        offset = TextureBaker.HEADER.size
+        for level_width, level_height in size_list:
+            byte_size = TextureBaker.level_byte_size(level_width, level_height, data_format)
+            data = np.memmap(cache_filename, dtype=np.uint8, mode="r", offset=offset, shape=(byte_size,))
+            if compressed and not compression_supported:
+                data = TextureBaker.decompress_bc1(data, level_width, level_height)
+            elif not compressed:
+                data = data.reshape(level_height, level_width, 4)
+            level_list.append((level_width, level_height, data))
+            offset += byte_size
+        return level_list, compressed and compression_supported
+
+    @staticmethod
+    def is_baked(filename, flip=True):
+        """ True if the image has an up-to-date baked file (without mapping its levels) """
+        return TextureBaker.read(filename, flip, compression_supported=True) is not None
+
+    @staticmethod
+    def bake(filename, flip=True, compress=False, cache_filename=None):
+        """
+        Decode an image, compute its mip chain and write it to the baked file.
+        Images with transparent pixels are never compressed (BC1 here stores RGB only).
+        Returns the format written.
+        """
+        stat = os.stat(filename)
+        pixel_data = Texture.decode_image(filename, flip)
+        data_format = TextureBaker.FORMAT_RGBA8
+        if compress and (pixel_data[:, :, 3] == 255).all():
+            data_format = TextureBaker.FORMAT_BC1
+        level_list = TextureBaker.mip_chain(pixel_data)
+        height, width = pixel_data.shape[0:2]
+        header = TextureBaker.HEADER.pack(TextureBaker.MAGIC, stat.st_mtime_ns, stat.st_size, flip,
+                                          data_format, width, height, len(level_list))
+        cache_filename = cache_filename or TextureBaker.cache_path(filename, flip)
+        temporary_filename = cache_filename + ".tmp"
+        os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+        with open(temporary_filename, "wb") as cache_file:
+            cache_file.write(header)
+            for level in level_list:
+                if data_format == TextureBaker.FORMAT_BC1:
+                    cache_file.write(TextureBaker.compress_bc1(level).tobytes())
+                else:
+                    cache_file.write(level.tobytes())
+        # Replace atomically so a concurrent reader never sees a partial file
+        os.replace(temporary_filename, cache_filename)
+        return data_format
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--compress", action="store_true", help="store opaque images as BC1 (DXT1)")
+    parser.add_argument("--top-down", action="store_true",
+                        help="keep the top row first, as LambertMaterial and PhongMaterial load images")
+    parser.add_argument("image_list", nargs="*", help="image files (default: every texture of ObjectCreator)")
+    arguments = parser.parse_args()
+    if arguments.image_list:
+        job_list = [(filename, not arguments.top_down) for filename in arguments.image_list]
+    else:
+        from all_objects import ObjectCreator
+        job_list = [(filename, True) for filename in ObjectCreator.TEXTURE_FILE_LIST] \
+            + [(filename, False) for filename in ObjectCreator.MATERIAL_TEXTURE_FILE_LIST]
+    for filename, flip in job_list:
+        data_format = TextureBaker.bake(filename, flip, arguments.compress)
+        cache_filename = TextureBaker.cache_path(filename, flip)
+        with Image.open(filename) as image:
+            rgba_size = image.width * image.height * 4
+        print(f"{cache_filename}: {'BC1' if data_format == TextureBaker.FORMAT_BC1 else 'RGBA8'}, "
+              f"{os.path.getsize(cache_filename) / 2 ** 20:.2f} MiB "
+              f"(RGBA8 with generated mipmaps: {rgba_size * 4 // 3 / 2 ** 20:.2f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
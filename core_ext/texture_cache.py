@@ -0,0 +1,140 @@
+import os
+import time
+
+from core.utils import Utils
+from core_ext.texture import Texture
+from core_ext.texture_baker import TextureBaker
+
+
+class TextureCache:
+    """
+    Process-wide registry of textures loaded from image files, keyed on the path,
+    the orientation of the pixels and the texture properties. Each image file is
+    uploaded once per key; each holder owns one reference, and the texture is freed
+    when the last one is released. Images baked by TextureBaker are uploaded with
+    their mip chain straight from the memory-mapped file. Reading an image (decode())
+    makes no GL calls, so it can run in worker threads (see AssetLoader); the GL
+    upload in get() always happens on the calling thread.
+    """
+    # key -> texture
+    _texture_dict = {}
+    # id(texture) -> [key, reference count]
+    _reference_dict = {}
+    # path -> seconds spent reading or decoding the image
+    _decode_time_dict = {}
+    # path -> seconds spent decoding and uploading
+    _load_time_dict = {}
+    _hits = 0
+    _misses = 0
+    # Whether the context supports BC1 textures; None until first needed
+    _compression_supported = None
+
+    @staticmethod
+    def decode(file_name, flip=True):
+        """
+        Read an image file without GL calls: map its baked mip chain if it is up to date,
+        otherwise decode its pixels. Returns (baked, pixel_data), one of them None, where
+        baked is the result of TextureBaker.read; pass it to get() as decoded.
+        """
+        path = os.path.abspath(file_name)
+        start_time = time.perf_counter()
+        # BC1 levels are kept compressed here and decompressed in get() if the context lacks S3TC
+        baked = TextureBaker.read(path, flip, compression_supported=True)
+        pixel_data = Texture.decode_image(path, flip) if baked is None else None
+        TextureCache._decode_time_dict[path] = time.perf_counter() - start_time
+        return baked, pixel_data
+
+    @staticmethod
+    def compression_supported():
+        """ True if the current context samples BC1 (S3TC DXT1) textures """
+        if TextureCache._compression_supported is None:
+            TextureCache._compression_supported = Utils.has_extension("GL_EXT_texture_compression_s3tc")
+        return TextureCache._compression_supported
+
+    @staticmethod
+    def get(file_name, property_dict=None, flip=True, decoded=None):
+        """
+        Return a shared texture of the image file, creating it if needed, from the result
+        of decode() if given. The caller owns one reference and should call release()
+        when done with it.
+        """
+        path = os.path.abspath(file_name)
+        key = (path, flip, tuple(sorted((property_dict or {}).items())))
+        texture = TextureCache._texture_dict.get(key)
+        if texture is None:
+            TextureCache._misses += 1
+            baked, pixel_data = decoded if decoded is not None else TextureCache.decode(path, flip)
+            start_time = time.perf_counter()
+            if baked is not None:
+                level_list, compressed = baked
+                if compressed and not TextureCache.compression_supported():
+                    level_list = [(width, height, TextureBaker.decompress_bc1(data, width, height))
+                                  for width, height, data in level_list]
+                    compressed = False
+                texture = Texture(property_dict=property_dict)
+                texture.upload_levels(level_list, compressed)
+            else:
+                texture = Texture(property_dict=property_dict, pixel_data=pixel_data)
+            TextureCache._load_time_dict[path] = TextureCache._decode_time_dict.get(path, 0.0) \
+                + time.perf_counter() - start_time
+            TextureCache._texture_dict[key] = texture
+            TextureCache._reference_dict[id(texture)] = [key, 0]
+        else:
+            TextureCache._hits += 1
+        TextureCache.acquire(texture)
+        return texture
+
+    @staticmethod
+    def acquire(texture):
+        """ Add a reference to a shared texture; textures not in the cache are ignored """
+        reference = TextureCache._reference_dict.get(id(texture))
+        if reference is not None:
+            reference[1] += 1
+
+    @staticmethod
+    def release(texture):
+        """ Remove a reference; free the texture on the GPU when none are left """
+        reference = TextureCache._reference_dict.get(id(texture))
+        if reference is None:
+            return
+        reference[1] -= 1
+        if reference[1] <= 0:
+            del TextureCache._reference_dict[id(texture)]
+            del TextureCache._texture_dict[reference[0]]
+            texture.delete_texture()
+
+    @staticmethod
+    def clear():
+        """
+        Forget all textures without freeing them, when the GL context that owned
+        them was destroyed
+        """
+        TextureCache._texture_dict.clear()
+        TextureCache._reference_dict.clear()
+        TextureCache._compression_supported = None
+
+    @staticmethod
+    def statistics():
+        """
+        Return the number of shared textures, their resident GPU bytes, the hit rate
+        of get(), and for every texture its path, load time in seconds and GPU bytes
+        """
+        texture_dict = TextureCache._texture_dict
+        requests = TextureCache._hits + TextureCache._misses
+        return {
+            "textures": len(texture_dict),
+            "bytes": sum(texture.byte_size for texture in texture_dict.values()),
+            "hits": TextureCache._hits,
+            "misses": TextureCache._misses,
+            "hit_rate": TextureCache._hits / requests if requests else 0.0,
+            "texture_list": [(os.path.relpath(key[0]), TextureCache._load_time_dict.get(key[0], 0.0),
+                              texture.byte_size) for key, texture in texture_dict.items()],
+        }
+
+    @staticmethod
+    def print_statistics():
+        statistics = TextureCache.statistics()
+        for path, seconds, byte_size in statistics["texture_list"]:
+            print(f"Texture {path}: {seconds * 1000:.1f} ms, {byte_size / 2 ** 20:.2f} MiB")
+        print(f"Textures: {statistics['textures']} ({statistics['bytes'] / 2 ** 20:.2f} MiB on the GPU), "
+              f"{statistics['hits']} of {statistics['hits'] + statistics['misses']} requests shared")
@@ -20,8 +20,6 @@ class MovementRig(Object3D):
         # Control rate of movement
         self._units_per_second = units_per_second
         self._degrees_per_second = degrees_per_second
-        self.jump_velocity  = 0
-        self.is_jumping = False
 
     # Adding and removing objects applies to look attachment.
     # Override functions from the Object3D class.
@@ -31,56 +29,6 @@ class MovementRig(Object3D):
     def remove(self, child):
         self._look_attachment.remove(child)
 
-    def updateJetSki(self, input_object, delta_time, withBoost):
-        if withBoost:
-            move_amount = JETSKI_SPEED * JETSKI_SPEED_BOOST * delta_time
-        else:
-            move_amount = JETSKI_SPEED * delta_time
-
-        if self.is_jumping:
-            move_amount += AIR_SPEED_BOOST
-
-        rotate_amount = self._degrees_per_second * (math.pi / 180) * delta_time
-
-        if input_object.is_key_pressed("w"):
-            self.translate(-move_amount, 0, 0)
-        if input_object.is_key_pressed("s"):
-            self.translate(move_amount, 0, 0)
-            if input_object.is_key_pressed("a"):
-                self.rotate_y(-rotate_amount)
-            if input_object.is_key_pressed("d"):
-                self.rotate_y(rotate_amount)
-        else:   
-            if input_object.is_key_pressed("a"):
-                self.rotate_y(rotate_amount)
-            if input_object.is_key_pressed("d"):
-                self.rotate_y(-rotate_amount)   
-
-        if input_object.is_key_pressed("l") and not self.is_jumping:
-            self.is_jumping = True
-            self.jump_velocity = JETSKI_JUMP_STRENGTH
-
-        if self.is_jumping:
-            self.update_jump(delta_time)
-
-    def update_jump(self, delta_time):
-        jetski_pos = self.get_position()
-        jetski_pos[1] += self.jump_velocity * delta_time
-        self.jump_velocity += BALL_GRAVITY * delta_time
-        if jetski_pos[1] <= GROUND:
-            jetski_pos[1] = GROUND
-            self.is_jumping = False
-            self.jump_velocity = 0
-        self.set_position(jetski_pos)
-
-       
-    def updateBall(self, delta_time):
-        self.translate(self.velocity[0] * delta_time, self.velocity[1] * delta_time, self.velocity[2] * delta_time)
-
-    def updateOpponent(self, delta_time, x, y):
-        self.set_position( [self.global_position[0], y, self.global_position[2]])
-        self.translate(-x * delta_time,0,0)
-
     def get_position(self):
         return self.global_position
 
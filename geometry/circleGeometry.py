@@ -27,7 +27,4 @@ class CircleGeometry(Geometry):
 
         self.add_attribute("vec3", "vertexPosition", positions)
         self.set_indices(indices)
-        self.count_vertices()
-
-    def set_indices(self, indices):
-        self.indices = indices
\ No newline at end of file
+        self.count_vertices()
\ No newline at end of file
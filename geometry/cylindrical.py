@@ -1,4 +1,6 @@
-from math import sin, cos, pi
+from math import pi
+
+import numpy as np
 
 from core.matrix import Matrix
 from geometry.parametric import ParametricGeometry
@@ -10,10 +12,10 @@ class CylindricalGeometry(ParametricGeometry):
                  radial_segments=32, height_segments=4,
                  closed_top=True, closed_bottom=True):
         def surface_function(u, v):
-            return [(v * radius_top + (1 - v) * radius_bottom) * sin(u),
+            return [(v * radius_top + (1 - v) * radius_bottom) * np.sin(u),
                     height * (v - 0.5),
-                    (v * radius_top + (1 - v) * radius_bottom) * cos(u)]
-        super().__init__(0, 2*pi, radial_segments, 0, 1, height_segments, surface_function)
+                    (v * radius_top + (1 - v) * radius_bottom) * np.cos(u)]
+        super().__init__(0, 2*pi, radial_segments, 0, 1, height_segments, surface_function, vectorized=True)
 
         if closed_top:
             top_geometry = PolygonGeometry(radial_segments, radius_top)
@@ -21,6 +23,7 @@ class CylindricalGeometry(ParametricGeometry):
                       @ Matrix.make_rotation_y(-pi/2) \
                       @ Matrix.make_rotation_x(-pi/2)
             top_geometry.apply_matrix(transform)
+            top_geometry.apply_normal_matrix(transform)
             self.merge(top_geometry)
         if closed_bottom:
             bottom_geometry = PolygonGeometry(radial_segments, radius_bottom)
@@ -28,4 +31,5 @@ class CylindricalGeometry(ParametricGeometry):
                       @ Matrix.make_rotation_y(-pi/2) \
                       @ Matrix.make_rotation_x(-pi/2)
             bottom_geometry.apply_matrix(transform)
+            bottom_geometry.apply_normal_matrix(transform)
             self.merge(bottom_geometry)
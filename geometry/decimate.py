@@ -0,0 +1,156 @@
+"""
+Offline level-of-detail generation for OBJ models by vertex clustering.
+
+The bounding box of a model is divided into a grid; all vertices in a cell
+are merged into one (average position, UV and normal), and triangles that
+collapse or repeat are removed. The grid size is searched so that each
+level keeps about the given fraction of the triangles. Level n of
+models/name.obj is written to models/__lodcache__/name.lod<n>.obj.
+
+The game generates missing or outdated levels when it loads the models
+(see ensure_level), so the generated files are not versioned.
+Parametric geometries (spheres, cylinders, ...) need no decimation: fewer
+segments give their lower levels directly.
+
+Generate levels with 25% and 5% of the triangles for every model under models/
+ahead of time, or with other ratios:
+    python -m geometry.decimate [--ratios 0.25 0.05] [model.obj ...]
+"""
+import argparse
+import os
+import threading
+
+import numpy as np
+
+
+class Decimator:
+    DIRECTORY = "__lodcache__"
+    # Fraction of the triangles kept by level 1, 2, ...
+    RATIO_LIST = [0.25, 0.05]
+
+    @staticmethod
+    def level_path(filename, level):
+        """ models/ring.obj, 1 -> models/__lodcache__/ring.lod1.obj """
+        directory, name = os.path.split(filename)
+        base_name, extension = os.path.splitext(name)
+        return os.path.join(directory, Decimator.DIRECTORY, f"{base_name}.lod{level}{extension}")
+
+    @staticmethod
+    def cluster(position_data, uv_data, normal_data, indices, resolution):
+        """
+        Merge the vertices in each cell of a grid with resolution cells along
+        the longest side of the bounding box. Returns decimated arrays in the
+        same form as ObjGeo.parse_obj.
+        """
+        minimum = position_data.min(axis=0)
+        size = (position_data.max(axis=0) - minimum).max()
+        cell_size = size / resolution if size > 0 else 1
+        cells = np.floor((position_data - minimum) / cell_size).astype(np.int64)
+        # New vertex index of every old vertex
+        _, cluster_index, cluster_sizes = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+        cluster_index = cluster_index.ravel()
+        cluster_count = len(cluster_sizes)
+
+        def average(data):
+            total = np.zeros((cluster_count, data.shape[1]))
+            np.add.at(total, cluster_index, data)
+            return total / cluster_sizes[:, None]
+
+        new_position_data = average(position_data)
+        new_uv_data = average(uv_data)
+        new_normal_data = average(normal_data)
+        length = np.linalg.norm(new_normal_data, axis=1, keepdims=True)
+        length[length == 0] = 1
+        new_normal_data /= length
+
+        triangles = cluster_index[indices.reshape(-1, 3)]
+        # Drop triangles with two corners in the same cell
+        keep = (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) \
+            & (triangles[:, 0] != triangles[:, 2])
+        triangles = triangles[keep]
+        # Drop repeated triangles (same corners, in any order)
+        _, first_index = np.unique(np.sort(triangles, axis=1), axis=0, return_index=True)
+        triangles = triangles[np.sort(first_index)]
+        return (new_position_data.astype(np.float32), new_uv_data.astype(np.float32),
+                new_normal_data.astype(np.float32), triangles.astype(np.uint32).ravel())
+
+    @staticmethod
+    def decimate(position_data, uv_data, normal_data, indices, ratio):
+        """ Cluster with the finest grid that keeps at most ratio of the triangles """
+        target = ratio * len(indices) // 3
+        low, high = 1, 1024
+        best = Decimator.cluster(position_data, uv_data, normal_data, indices, low)
+        # The triangle count grows with the resolution, so bisect on it
+        while low < high:
+            resolution = (low + high + 1) // 2
+            result = Decimator.cluster(position_data, uv_data, normal_data, indices, resolution)
+            if len(result[3]) // 3 <= target:
+                low = resolution
+                best = result
+            else:
+                high = resolution - 1
+        return best
+
+    @staticmethod
+    def write_obj(filename, position_data, uv_data, normal_data, indices):
+        """ Write arrays as an OBJ file where every vertex uses the same index for v, vt and vn """
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        # Levels may be generated by several threads; each writes its own temporary file
+        temporary_filename = f"{filename}.{threading.get_ident()}.tmp"
+        with open(temporary_filename, "w") as obj_file:
+            obj_file.write("".join(f"v {x:.6f} {y:.6f} {z:.6f}\n" for x, y, z in position_data.tolist()))
+            obj_file.write("".join(f"vt {u:.6f} {v:.6f}\n" for u, v in uv_data.tolist()))
+            obj_file.write("".join(f"vn {x:.6f} {y:.6f} {z:.6f}\n" for x, y, z in normal_data.tolist()))
+            obj_file.write("".join(f"f {a}/{a}/{a} {b}/{b}/{b} {c}/{c}/{c}\n"
+                                   for a, b, c in (indices.reshape(-1, 3) + 1).tolist()))
+        # Replace atomically so a concurrent reader never sees a partial file
+        os.replace(temporary_filename, filename)
+
+    @staticmethod
+    def is_up_to_date(filename, level):
+        """ True if level n of the model exists and is newer than the model """
+        level_filename = Decimator.level_path(filename, level)
+        return os.path.exists(level_filename) \
+            and os.path.getmtime(level_filename) >= os.path.getmtime(filename)
+
+    @staticmethod
+    def ensure_level(filename, level, parse_function, ratio_list=RATIO_LIST):
+        """
+        Return the path of level n of an OBJ model, first generating it (keeping
+        ratio_list[n - 1] of the triangles) if it is missing or older than the model
+        """
+        if not Decimator.is_up_to_date(filename, level):
+            result = Decimator.decimate(*parse_function(filename), ratio_list[level - 1])
+            Decimator.write_obj(Decimator.level_path(filename, level), *result)
+        return Decimator.level_path(filename, level)
+
+    @staticmethod
+    def generate_levels(filename, ratio_list, parse_function):
+        """ Write one decimated file per ratio, level 1 for the first ratio """
+        arrays = parse_function(filename)
+        triangle_count = len(arrays[3]) // 3
+        print(f"{filename}: {triangle_count} triangles")
+        for level, ratio in enumerate(ratio_list, start=1):
+            result = Decimator.decimate(*arrays, ratio)
+            level_filename = Decimator.level_path(filename, level)
+            Decimator.write_obj(level_filename, *result)
+            print(f"  {level_filename}: {len(result[3]) // 3} triangles "
+                  f"({len(result[3]) / max(1, len(arrays[3])):.0%})")
+
+
+def main():
+    from geometry.objGeo import ObjGeo
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratios", type=float, nargs="+", default=Decimator.RATIO_LIST,
+                        help="fraction of the triangles kept by each level")
+    parser.add_argument("model_list", nargs="*", help="OBJ files (default: every model under models/)")
+    arguments = parser.parse_args()
+    model_list = arguments.model_list or sorted(os.path.join("models", name) for name in os.listdir("models")
+                                                if name.endswith(".obj"))
+    for filename in model_list:
+        Decimator.generate_levels(filename, arguments.ratios, ObjGeo.parse_obj)
+
+
+if __name__ == "__main__":
+    main()
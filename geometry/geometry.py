@@ -1,3 +1,6 @@
+import OpenGL.GL as GL
+import numpy as np
+
 from core.attribute import Attribute
 
 
@@ -9,6 +12,11 @@ class Geometry:
         self._attribute_dict = {}
         # number of vertices
         self._vertex_count = None
+        # Optional vertex indices; when present, meshes draw with glDrawElements
+        self._indices = None
+        self._index_buffer_ref = None
+        # Bounding box and sphere of the vertex positions, computed when first needed
+        self._bounds = None
 
     @property
     def attribute_dict(self):
@@ -18,33 +26,176 @@ class Geometry:
     def vertex_count(self):
         return self._vertex_count
 
-    def add_attribute(self, data_type, variable_name, data):
-        self._attribute_dict[variable_name] = Attribute(data_type, data)
+    @property
+    def indices(self):
+        return self._indices
+
+    @property
+    def index_buffer_ref(self):
+        return self._index_buffer_ref
+
+    @property
+    def index_count(self):
+        """ Number of indices to draw, or None for non-indexed geometry """
+        if self._indices is None:
+            return None
+        return len(self._indices)
+
+    @property
+    def bounding_box(self):
+        """
+        (minimum corner, maximum corner) of the vertex positions in local space,
+        or None without positions. Computed once; see reset_bounds.
+        """
+        bounds = self.bounds
+        return None if bounds is None else bounds[0:2]
+
+    @property
+    def bounding_sphere(self):
+        """ (center, radius) around the vertex positions in local space, or None without positions """
+        bounds = self.bounds
+        return None if bounds is None else bounds[2:4]
+
+    def reset_bounds(self):
+        """ Recompute the bounding volumes when next needed; call after changing vertex positions """
+        self._bounds = None
+
+    @property
+    def bounds(self):
+        """ (minimum, maximum, center, radius) of the bounding box and sphere, or None """
+        if self._bounds is None and "vertexPosition" in self._attribute_dict:
+            position_data = self._attribute_dict["vertexPosition"].data
+            if len(position_data) > 0:
+                # 2D positions lie in the plane z = 0
+                positions = np.zeros((len(position_data), 3))
+                positions[:, 0:position_data.shape[1]] = position_data[:, 0:3]
+                minimum = positions.min(axis=0)
+                maximum = positions.max(axis=0)
+                # The sphere is centered on the box, which is close to the smallest sphere for most models
+                center = (minimum + maximum) / 2
+                radius = float(np.sqrt(((positions - center) ** 2).sum(axis=1).max()))
+                self._bounds = (minimum, maximum, center, radius)
+        return self._bounds
+
+    def add_attribute(self, data_type, variable_name, data, usage=GL.GL_STATIC_DRAW):
+        """ Use usage=GL_DYNAMIC_DRAW or GL_STREAM_DRAW for data that changes often """
+        self._attribute_dict[variable_name] = Attribute(data_type, data, usage=usage)
+        if variable_name == "vertexPosition":
+            self._bounds = None
+
+    @property
+    def buffer_count(self):
+        """ Number of GPU buffers owned by this geometry """
+        return len(self._attribute_dict) + (self._index_buffer_ref is not None)
+
+    @property
+    def byte_size(self):
+        """ Total size of the data stored in GPU buffers """
+        byte_size = sum(attribute.byte_size for attribute in self._attribute_dict.values())
+        if self._indices is not None:
+            byte_size += self._indices.nbytes
+        return byte_size
+
+    def delete_buffers(self):
+        """ Free all GPU buffers; the geometry cannot be drawn afterwards """
+        for attribute in self._attribute_dict.values():
+            attribute.delete()
+        if self._index_buffer_ref is not None:
+            GL.glDeleteBuffers(1, [self._index_buffer_ref])
+            self._index_buffer_ref = None
+
+    def set_indices(self, indices):
+        """ Store vertex indices (three per triangle) in an element buffer on the GPU """
+        self._indices = np.asarray(indices, dtype=np.uint32).ravel()
+        if self._index_buffer_ref is None:
+            self._index_buffer_ref = GL.glGenBuffers(1)
+        # Element buffer bindings are stored in a VAO, so the upload goes through
+        # GL_ARRAY_BUFFER; the buffer is bound as element buffer by each Mesh
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self._index_buffer_ref)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, self._indices, GL.GL_STATIC_DRAW)
+
+    # Attributes holding directions that are transformed like normals
+    NORMAL_VARIABLE_NAMES = ("vertexNormal", "faceNormal")
+
+    @staticmethod
+    def transform_points(data, matrix):
+        """ Transform an array of points, shape (N, 3), by a 4x4 matrix """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        # Add the homogeneous fourth coordinate and transform all points with one product
+        homogeneous_data = np.empty((len(data), 4), dtype=np.float32)
+        homogeneous_data[:, 0:3] = data
+        homogeneous_data[:, 3] = 1
+        return (homogeneous_data @ matrix.T)[:, 0:3]
+
+    @staticmethod
+    def transform_normals(data, matrix):
+        """ Transform an array of normals, shape (N, 3), by a 4x4 matrix and normalize them """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        # Normals are only affected by the rotation (and scale) part of the matrix
+        normal_matrix = np.linalg.inv(matrix[0:3, 0:3]).T
+        normal_data = data @ normal_matrix.T
+        length = np.linalg.norm(normal_data, axis=1, keepdims=True)
+        length[length == 0] = 1
+        return normal_data / length
 
     def apply_matrix(self, matrix, variable_name="vertexPosition"):
-        """ Transform the data in an attribute using a matrix """
-        old_position_data = self._attribute_dict[variable_name].data
-        new_position_data = []
-        for old_pos in old_position_data:
-            # Avoid changing list references
-            new_pos = old_pos.copy()
-            # Add the homogeneous fourth coordinate
-            new_pos.append(1)
-            # Multiply by matrix
-            new_pos = matrix @ new_pos
-            # Remove the homogeneous coordinate
-            new_pos = list(new_pos[0:3])
-            # Add to the new data list
-            new_position_data.append(new_pos)
-        self._attribute_dict[variable_name].data = new_position_data
+        """
+        Transform the data in an attribute using a matrix.
+        Only that attribute changes; see apply_normal_matrix for the normals.
+        """
+        attribute = self._attribute_dict[variable_name]
+        attribute.data = self.transform_points(attribute.data, matrix)
         # New data must be uploaded
-        self._attribute_dict[variable_name].upload_data()
+        attribute.upload_data()
+        if variable_name == "vertexPosition":
+            self._bounds = None
+
+    def apply_normal_matrix(self, matrix, variable_name="vertexNormal"):
+        """ Transform the normals in an attribute to match positions transformed by the same matrix """
+        attribute = self._attribute_dict[variable_name]
+        attribute.data = self.transform_normals(attribute.data, matrix)
+        attribute.upload_data()
+
+    @staticmethod
+    def combine(geometry_list, matrix_list):
+        """
+        Return a new geometry with the vertices of all geometries, each
+        transformed by its matrix (positions and normals). All geometries must
+        have the same attributes; the result is indexed if any of them is.
+        """
+        geometry = Geometry()
+        first_geometry = geometry_list[0]
+        for variable_name, attribute_object in first_geometry.attribute_dict.items():
+            data_list = []
+            for other_geometry, matrix in zip(geometry_list, matrix_list):
+                data = other_geometry.attribute_dict[variable_name].data
+                if variable_name == "vertexPosition":
+                    data = Geometry.transform_points(data, matrix)
+                elif variable_name in Geometry.NORMAL_VARIABLE_NAMES:
+                    data = Geometry.transform_normals(data, matrix)
+                data_list.append(data)
+            geometry.add_attribute(attribute_object.data_type, variable_name, np.concatenate(data_list))
+        if any(other_geometry.indices is not None for other_geometry in geometry_list):
+            index_list = []
+            offset = 0
+            for other_geometry in geometry_list:
+                vertex_count = len(list(other_geometry.attribute_dict.values())[0].data)
+                indices = other_geometry.indices
+                if indices is None:
+                    indices = np.arange(vertex_count, dtype=np.uint32)
+                index_list.append(indices + offset)
+                offset += vertex_count
+            geometry.set_indices(np.concatenate(index_list))
+        geometry.count_vertices()
+        return geometry
 
     def count_vertices(self):
         # Number of vertices may be calculated from the length of
         # any Attribute object's array of data
         attribute = list(self._attribute_dict.values())[0]
         self._vertex_count = len(attribute.data)
+        # Called after the vertex data changed, so the bounds may be outdated
+        self._bounds = None
 
     def merge(self, other_geometry):
         """
@@ -52,6 +203,10 @@ class Geometry:
         Requires both geometries to have attributes with same names.
         """
         for variable_name, attribute_object in self._attribute_dict.items():
-            attribute_object.data += other_geometry._attribute_dict[variable_name].data
+            attribute_object.data = np.concatenate([
+                attribute_object.data,
+                other_geometry._attribute_dict[variable_name].data
+            ])
             # New data must be uploaded
             attribute_object.upload_data()
+        self.count_vertices()
@@ -0,0 +1,77 @@
+class GeometryCache:
+    """
+    Process-wide registry of shared geometries, keyed on their construction arguments.
+    Identical geometries share one set of GPU buffers. Each holder (a caller of get(),
+    or a Mesh) owns one reference; the buffers are freed when the last one is released.
+    """
+    # key -> geometry
+    _geometry_dict = {}
+    # id(geometry) -> [key, reference count]
+    _reference_dict = {}
+    _hits = 0
+    _misses = 0
+
+    @staticmethod
+    def get(geometry_class, *args, **kwargs):
+        """
+        Return a shared instance of geometry_class(*args, **kwargs), creating it if needed.
+        The caller owns one reference and should call release() when done with it.
+        Classes may define a static cache_key(*args, **kwargs) method (e.g. to include
+        the modification time of a source file); by default the arguments are the key.
+        """
+        if hasattr(geometry_class, "cache_key"):
+            key = (geometry_class, geometry_class.cache_key(*args, **kwargs))
+        else:
+            key = (geometry_class, args, tuple(sorted(kwargs.items())))
+        geometry = GeometryCache._geometry_dict.get(key)
+        if geometry is None:
+            GeometryCache._misses += 1
+            geometry = geometry_class(*args, **kwargs)
+            GeometryCache._geometry_dict[key] = geometry
+            GeometryCache._reference_dict[id(geometry)] = [key, 0]
+        else:
+            GeometryCache._hits += 1
+        GeometryCache.acquire(geometry)
+        return geometry
+
+    @staticmethod
+    def acquire(geometry):
+        """ Add a reference to a shared geometry; geometries not in the cache are ignored """
+        reference = GeometryCache._reference_dict.get(id(geometry))
+        if reference is not None:
+            reference[1] += 1
+
+    @staticmethod
+    def release(geometry):
+        """ Remove a reference; free the GPU buffers when none are left """
+        reference = GeometryCache._reference_dict.get(id(geometry))
+        if reference is None:
+            return
+        reference[1] -= 1
+        if reference[1] <= 0:
+            del GeometryCache._reference_dict[id(geometry)]
+            del GeometryCache._geometry_dict[reference[0]]
+            geometry.delete_buffers()
+
+    @staticmethod
+    def clear():
+        """
+        Forget all geometries without freeing them, when the GL context that owned
+        their buffers was destroyed
+        """
+        GeometryCache._geometry_dict.clear()
+        GeometryCache._reference_dict.clear()
+
+    @staticmethod
+    def statistics():
+        """ Return the number of shared geometries, their GPU buffers and bytes, and the hit rate of get() """
+        geometry_list = list(GeometryCache._geometry_dict.values())
+        requests = GeometryCache._hits + GeometryCache._misses
+        return {
+            "geometries": len(geometry_list),
+            "buffers": sum(geometry.buffer_count for geometry in geometry_list),
+            "bytes": sum(geometry.byte_size for geometry in geometry_list),
+            "hits": GeometryCache._hits,
+            "misses": GeometryCache._misses,
+            "hit_rate": GeometryCache._hits / requests if requests else 0.0,
+        }
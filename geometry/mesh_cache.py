@@ -0,0 +1,111 @@
+"""
+Compiled binary cache for OBJ models.
+
+The first load of an OBJ file writes its parsed vertex and index arrays to
+__meshcache__/<name>.mesh next to the model; later loads memory-map that
+file instead of parsing the text again. A cache file is only used while
+the modification time and size of the source file match its header.
+
+Precompile every model under models/:
+    python -m geometry.mesh_cache [model.obj ...]
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+
+
+class MeshCache:
+    # file identifier including the format version
+    MAGIC = b"RWMESH01"
+    # magic, source mtime (ns), source size (bytes), vertex count, index count
+    HEADER = struct.Struct("<8sqqII")
+    DIRECTORY = "__meshcache__"
+
+    @staticmethod
+    def cache_path(filename):
+        directory, name = os.path.split(filename)
+        return os.path.join(directory, MeshCache.DIRECTORY, name + ".mesh")
+
+    @staticmethod
+    def load(filename, parse_function):
+        """
+        Return (position_data, uv_data, normal_data, indices) for an OBJ file,
+        from the cache if it is up to date, otherwise by calling
+        parse_function(filename) and writing the result to the cache
+        """
+        stat = os.stat(filename)
+        arrays = MeshCache.read(MeshCache.cache_path(filename), stat.st_mtime_ns, stat.st_size)
+        if arrays is None:
+            arrays = parse_function(filename)
+            MeshCache.write(MeshCache.cache_path(filename), stat.st_mtime_ns, stat.st_size, *arrays)
+        return arrays
+
+    @staticmethod
+    def read(cache_filename, source_mtime_ns, source_size):
+        """ Memory-map a cache file; return None if it is missing or stale """
+        try:
+            with open(cache_filename, "rb") as cache_file:
+                header = cache_file.read(MeshCache.HEADER.size)
+        except OSError:
+            return None
+        if len(header) != MeshCache.HEADER.size:
+            return None
+        magic, mtime_ns, size, vertex_count, index_count = MeshCache.HEADER.unpack(header)
+        if magic != MeshCache.MAGIC or mtime_ns != source_mtime_ns or size != source_size:
+            return None
+        layout = [(np.float32, (vertex_count, 3)),
+                  (np.float32, (vertex_count, 2)),
+                  (np.float32, (vertex_count, 3)),
+                  (np.uint32, (index_count,))]
+        expected_size = MeshCache.HEADER.size + sum(4 * int(np.prod(shape)) for _, shape in layout)
+        if os.path.getsize(cache_filename) != expected_size:
+            return None
+        arrays = []
+        offset = MeshCache.HEADER.size
+        for dtype, shape in layout:
+            if np.prod(shape) == 0:
+                arrays.append(np.zeros(shape, dtype=dtype))
+            else:
+                arrays.append(np.memmap(cache_filename, dtype=dtype, mode="r", offset=offset, shape=shape))
+            offset += 4 * int(np.prod(shape))
+        return tuple(arrays)
+
+    @staticmethod
+    def write(cache_filename, source_mtime_ns, source_size, position_data, uv_data, normal_data, indices):
+        """ Write a cache file; failures (e.g. read-only directory) are ignored """
+        header = MeshCache.HEADER.pack(MeshCache.MAGIC, source_mtime_ns, source_size,
+                                       len(position_data), len(indices))
+        temporary_filename = cache_filename + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+            with open(temporary_filename, "wb") as cache_file:
+                cache_file.write(header)
+                for array, dtype in [(position_data, np.float32), (uv_data, np.float32),
+                                     (normal_data, np.float32), (indices, np.uint32)]:
+                    cache_file.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+            # Replace atomically so a concurrent reader never sees a partial file
+            os.replace(temporary_filename, cache_filename)
+        except OSError:
+            pass
+
+    @staticmethod
+    def precompile(filename_list, parse_function):
+        """ (Re)build the cache of every file in the list """
+        for filename in filename_list:
+            stat = os.stat(filename)
+            arrays = parse_function(filename)
+            MeshCache.write(MeshCache.cache_path(filename), stat.st_mtime_ns, stat.st_size, *arrays)
+            print(f"{filename}: {len(arrays[0])} vertices, {len(arrays[3])} indices")
+
+
+if __name__ == "__main__":
+    from geometry.objGeo import ObjGeo
+
+    if len(sys.argv) > 1:
+        model_list = sys.argv[1:]
+    else:
+        model_list = sorted(os.path.join("models", name) for name in os.listdir("models")
+                            if name.endswith(".obj"))
+    MeshCache.precompile(model_list, ObjGeo.parse_obj)
@@ -1,44 +1,140 @@
-import random
+import os
+
+import numpy as np
 
 from geometry.geometry import Geometry
+from geometry.mesh_cache import MeshCache
+
 
 class ObjGeo(Geometry):
-    """Subclass of Geometry for loading OBJ files and applying colors per face."""
-    
-    def __init__(self, filename):
+    """
+    Subclass of Geometry for loading Wavefront OBJ files.
+    Each distinct v/vt/vn combination becomes one vertex, and faces
+    are stored as triangles in an index buffer.
+    """
+
+    def __init__(self, filename, use_cache=True, arrays=None):
         super().__init__()  # Initialize the Geometry base class
-        self.load_from_obj(filename)  # Load data from the OBJ file upon instantiation
-
-    def load_from_obj(self, filename):
-        """Reads vertices and UVs from an OBJ file, duplicates vertices per face for unique coloring."""
-        original_vertices = []
-        uvs = []  # Assuming we might also have UVs to process similarly
-        face_vertices = []  # To store duplicated vertices per face
-        face_colors = []  # Colors assigned per face
-        face_uvs = []  # UVs duplicated per face
-        
+        self.load_from_obj(filename, use_cache, arrays)  # Load data from the OBJ file upon instantiation
+
+    def load_from_obj(self, filename, use_cache=True, arrays=None):
+        """
+        Reads positions, UVs, normals and faces from an OBJ file.
+        Polygons are triangulated as fans; if the file has no normals,
+        smooth normals are generated from the faces.
+        With use_cache, the parsed arrays are read from / written to the binary mesh cache.
+        Arrays already parsed from the file (e.g. by AssetLoader) are only uploaded.
+        """
+        if arrays is not None:
+            position_data, uv_data, normal_data, indices = arrays
+        elif use_cache:
+            position_data, uv_data, normal_data, indices = MeshCache.load(filename, self.parse_obj)
+        else:
+            position_data, uv_data, normal_data, indices = self.parse_obj(filename)
+        self.add_attribute("vec3", "vertexPosition", position_data)
+        self.add_attribute("vec2", "vertexUV", uv_data)
+        self.add_attribute("vec3", "vertexNormal", normal_data)
+        self.set_indices(indices)
+        self.count_vertices()
+
+    @staticmethod
+    def cache_key(filename, use_cache=True, arrays=None):
+        """ Key used by GeometryCache: the file and its current version """
+        stat = os.stat(filename)
+        return os.path.abspath(filename), stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def parse_obj(filename):
+        """
+        Parse an OBJ file into numpy arrays: per-vertex positions (N, 3), UVs (N, 2),
+        normals (N, 3) as float32, and triangle indices (M,) as uint32
+        """
+        positions = []
+        uvs = []
+        normals = []
+        # index of each distinct "v/vt/vn" string in vertex_list
+        vertex_index_dict = {}
+        vertex_list = []
+        indices = []
+
         with open(filename, 'r') as obj_file:
             for line in obj_file:
-                if line.startswith('v '):  # Vertex position
-                    original_vertices.append([float(value) for value in line.strip().split()[1:]])
-                elif line.startswith('vt '):  # Texture coordinate
-                    uvs.append([float(value) for value in line.strip().split()[1:]])
-                elif line.startswith('f '):  # Face
-                    # Generate a random color for this face
-                    face_color = [random.random() for _ in range(3)]
-                    indices = [int(part.split('/')[0]) - 1 for part in line.strip().split()[1:]]
-                    for index in indices:
-                        face_vertices.append(original_vertices[index])
-                        face_colors.append(face_color)
-                        if index < len(uvs):  # Check if there's a corresponding UV
-                            face_uvs.append(uvs[index])
-                        else:
-                            face_uvs.append([0.0, 0.0])  # Default UV if none is available
-
-        # Now we have duplicated vertices per face, with each set of face vertices having a unique color
-        self.add_attribute("vec3", "vertexPosition", face_vertices)
-        self.add_attribute("vec3", "vertexColor", face_colors)
-        if face_uvs:  # Add UVs only if we have them
-            self.add_attribute("vec2", "vertexUV", face_uvs)
-
-        self.count_vertices()  # Update the vertex count based on duplicated vertices
+                values = line.split()
+                if not values:
+                    continue
+                keyword = values[0]
+                if keyword == 'v':  # Vertex position
+                    positions.append(values[1:4])
+                elif keyword == 'vt':  # Texture coordinate
+                    uvs.append(values[1:3])
+                elif keyword == 'vn':  # Vertex normal
+                    normals.append(values[1:4])
+                elif keyword == 'f':  # Face
+                    face = []
+                    for token in values[1:]:
+                        if '-' in token:
+                            # Relative indices refer to the elements read so far
+                            token = ObjGeo._resolve_relative_indices(
+                                token, len(positions), len(uvs), len(normals))
+                        vertex_index = vertex_index_dict.get(token)
+                        if vertex_index is None:
+                            vertex_index = len(vertex_list)
+                            vertex_index_dict[token] = vertex_index
+                            vertex_list.append(token)
+                        face.append(vertex_index)
+                    # Triangulate the polygon as a fan around its first vertex
+                    for i in range(1, len(face) - 1):
+                        indices.extend((face[0], face[i], face[i + 1]))
+
+        position_array = np.array(positions, dtype=np.float32).reshape(-1, 3)
+        uv_array = np.array(uvs, dtype=np.float32).reshape(-1, 2)
+        normal_array = np.array(normals, dtype=np.float32).reshape(-1, 3)
+
+        # Convert "v/vt/vn" strings to zero-based indices; -1 marks a missing element
+        triplets = np.full((len(vertex_list), 3), -1, dtype=np.int64)
+        for row, token in enumerate(vertex_list):
+            for column, value in enumerate(token.split('/')[:3]):
+                if value:
+                    triplets[row, column] = int(value) - 1
+        position_index, uv_index, normal_index = triplets.T
+
+        position_data = position_array[position_index]
+        uv_data = np.zeros((len(vertex_list), 2), dtype=np.float32)
+        has_uv = uv_index >= 0
+        uv_data[has_uv] = uv_array[uv_index[has_uv]]
+        index_array = np.array(indices, dtype=np.uint32)
+
+        if len(normal_array) > 0 and np.all(normal_index >= 0):
+            normal_data = normal_array[normal_index]
+        else:
+            normal_data = ObjGeo.compute_smooth_normals(position_data, position_index, index_array)
+        return position_data, uv_data, normal_data, index_array
+
+    @staticmethod
+    def compute_smooth_normals(position_data, position_index, index_array):
+        """
+        Area-weighted vertex normals. Vertices sharing a position in the file
+        (e.g. split only by their UVs) get the same normal.
+        """
+        triangles = index_array.reshape(-1, 3).astype(np.int64)
+        p0 = position_data[triangles[:, 0]]
+        p1 = position_data[triangles[:, 1]]
+        p2 = position_data[triangles[:, 2]]
+        # Length of the cross product is twice the area of the triangle
+        face_normals = np.cross(p1 - p0, p2 - p0)
+        accumulated = np.zeros((position_index.max(initial=-1) + 1, 3), dtype=np.float64)
+        for corner in range(3):
+            np.add.at(accumulated, position_index[triangles[:, corner]], face_normals)
+        normal_data = accumulated[position_index]
+        length = np.linalg.norm(normal_data, axis=1, keepdims=True)
+        length[length == 0] = 1
+        return (normal_data / length).astype(np.float32)
+
+    @staticmethod
+    def _resolve_relative_indices(token, position_count, uv_count, normal_count):
+        count_list = [position_count, uv_count, normal_count]
+        parts = token.split('/')
+        for i, value in enumerate(parts[:3]):
+            if value.startswith('-'):
+                parts[i] = str(count_list[i] + int(value) + 1)
+        return '/'.join(parts)
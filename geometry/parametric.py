@@ -1,64 +1,84 @@
+import numpy as np
+
 from geometry.geometry import Geometry
 
 
 class ParametricGeometry(Geometry):
+    """
+    Geometry of a surface [x, y, z] = surface_function(u, v).
+    With vectorized=True, surface_function receives numpy arrays of u and v values
+    and must return the three coordinate arrays (scalars are broadcast);
+    otherwise it is called once per point with floats.
+    """
     def __init__(self,
                  u_start, u_end, u_resolution,
                  v_start, v_end, v_resolution,
-                 surface_function):
+                 surface_function,
+                 vectorized=False):
         super().__init__()
-        # Generate set of points on function
-        delta_u = (u_end - u_start) / u_resolution
-        delta_v = (v_end - v_start) / v_resolution
-
-        positions = []
-        for u_index in range(u_resolution + 1):
-            xyz_array = []
-            for v_index in range(v_resolution + 1):
-                u = u_start + u_index * delta_u
-                v = v_start + v_index * delta_v
-                xyz_array.append(surface_function(u, v))
-            positions.append(xyz_array)
-
-        uvs = []
-        for u_index in range(u_resolution + 1):
-            uv_array = []
-            for v_index in range(v_resolution + 1):
-                u = u_index / u_resolution
-                v = v_index / v_resolution
-                uv_array.append([u, v])
-            uvs.append(uv_array)
+        # Generate grid of points on function, shape (u_resolution + 1, v_resolution + 1, 3)
+        u_values = np.linspace(u_start, u_end, u_resolution + 1)
+        v_values = np.linspace(v_start, v_end, v_resolution + 1)
+        u_grid, v_grid = np.meshgrid(u_values, v_values, indexing="ij")
+        positions = self._evaluate(surface_function, u_grid, v_grid, vectorized)
+        normals = self._calculate_normals(surface_function, u_grid, v_grid, vectorized,
+                                          u_end - u_start, v_end - v_start)
+        uvs = np.stack(np.meshgrid(np.linspace(0, 1, u_resolution + 1),
+                                   np.linspace(0, 1, v_resolution + 1),
+                                   indexing="ij"), axis=-1)
 
-        # Store vertex data
-        position_data = []
-        color_data = []
-        uv_data = []
+        # Group vertex data into triangles: each grid cell (x, y) gives
+        # triangles p0-p1-p2 and p0-p2-p3, where
+        # p0 = (x, y), p1 = (x+1, y), p2 = (x+1, y+1), p3 = (x, y+1)
+        x_index, y_index = np.meshgrid(np.arange(u_resolution), np.arange(v_resolution), indexing="ij")
+        x_index = x_index[..., np.newaxis] + np.array([0, 1, 1, 0, 1, 0])
+        y_index = y_index[..., np.newaxis] + np.array([0, 0, 1, 0, 1, 1])
+        position_data = positions[x_index, y_index].reshape(-1, 3)
+        normal_data = normals[x_index, y_index].reshape(-1, 3)
+        uv_data = uvs[x_index, y_index].reshape(-1, 2)
         # default vertex colors
         c1, c2, c3 = [1, 0, 0], [0, 1, 0], [0, 0, 1]
         c4, c5, c6 = [0, 1, 1], [1, 0, 1], [1, 1, 0]
+        color_data = np.tile([c1, c2, c3, c4, c5, c6], (u_resolution * v_resolution, 1))
 
-        # Group vertex data into triangles
-        # Note: .copy() is necessary to avoid storing references
-        for x_index in range(u_resolution):
-            for y_index in range(v_resolution):
-                # position data
-                p0 = positions[x_index + 0][y_index + 0]
-                p1 = positions[x_index + 1][y_index + 0]
-                p3 = positions[x_index + 0][y_index + 1]
-                p2 = positions[x_index + 1][y_index + 1]
-                position_data += [p0.copy(), p1.copy(), p2.copy(),
-                                  p0.copy(), p2.copy(), p3.copy()]
-                # color data
-                color_data += [c1, c2, c3, c4, c5, c6]
-                # uv data (texture coordinates)
-                uv_a = uvs[x_index + 0][y_index + 0]
-                uv_b = uvs[x_index + 1][y_index + 0]
-                uv_d = uvs[x_index + 0][y_index + 1]
-                uv_c = uvs[x_index + 1][y_index + 1]
-                uv_data += [uv_a, uv_b, uv_c,
-                            uv_a, uv_c, uv_d]
-
-        self.add_attribute("vec3", "vertexPosition",  position_data)
+        self.add_attribute("vec3", "vertexPosition", position_data)
         self.add_attribute("vec3", "vertexColor", color_data)
         self.add_attribute("vec2", "vertexUV", uv_data)
+        self.add_attribute("vec3", "vertexNormal", normal_data)
         self.count_vertices()
+
+    @staticmethod
+    def _evaluate(surface_function, u, v, vectorized):
+        """ Return surface points for arrays of parameters, shape u.shape + (3,) """
+        if vectorized:
+            x, y, z = np.broadcast_arrays(*surface_function(u, v))
+            return np.stack([x, y, z], axis=-1).astype(float)
+        # Fallback: call the function once per point
+        point_list = [surface_function(float(u_value), float(v_value))
+                      for u_value, v_value in zip(u.ravel(), v.ravel())]
+        return np.array(point_list, dtype=float).reshape(u.shape + (3,))
+
+    @staticmethod
+    def _calculate_normals(surface_function, u, v, vectorized, u_range, v_range):
+        """
+        Unit normals from central finite differences, cross(dP/du, dP/dv).
+        Where dP/du vanishes (e.g. the poles of a sphere), it is taken at a
+        parameter v moved slightly towards the inside of the v range.
+        """
+        h_u = 1e-4 * u_range
+        h_v = 1e-4 * v_range
+        evaluate = ParametricGeometry._evaluate
+        tangent_v = evaluate(surface_function, u, v + h_v, vectorized) \
+                  - evaluate(surface_function, u, v - h_v, vectorized)
+        tangent_u = evaluate(surface_function, u + h_u, v, vectorized) \
+                  - evaluate(surface_function, u - h_u, v, vectorized)
+        degenerate = np.linalg.norm(tangent_u, axis=-1) < 1e-12
+        if np.any(degenerate):
+            v_inside = v[degenerate] + np.where(v[degenerate] < v.mean(), 1, -1) * 1e-3 * v_range
+            u_degenerate = u[degenerate]
+            tangent_u[degenerate] = evaluate(surface_function, u_degenerate + h_u, v_inside, vectorized) \
+                                  - evaluate(surface_function, u_degenerate - h_u, v_inside, vectorized)
+        normals = np.cross(tangent_u, tangent_v)
+        length = np.linalg.norm(normals, axis=-1, keepdims=True)
+        length[length == 0] = 1
+        return normals / length
@@ -13,6 +13,7 @@ class PolygonGeometry(Geometry):
         position_data = []
         color_data = []
         uv_data = []
+        normal_data = []
         uv_center = [0.5, 0.5]
         for n in range(sides):
             position_data.append([0, 0, 0])
@@ -24,9 +25,11 @@ class PolygonGeometry(Geometry):
             uv_data.append(uv_center)
             uv_data.append([cos(n * a) * 0.5 + 0.5, sin(n * a) * 0.5 + 0.5])
             uv_data.append([cos((n + 1) * a) * 0.5 + 0.5, sin((n + 1) * a) * 0.5 + 0.5])
+            normal_data += [[0, 0, 1], [0, 0, 1], [0, 0, 1]]
         self.add_attribute("vec3", "vertexPosition", position_data)
         self.add_attribute("vec3", "vertexColor", color_data)
         self.add_attribute("vec2", "vertexUV", uv_data)
+        self.add_attribute("vec3", "vertexNormal", normal_data)
         self.count_vertices()
 
     @staticmethod
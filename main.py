@@ -6,18 +6,42 @@ from pygame import freetype
 from boost_particles import ParticleSystem
 from constants import *
 from core.base import Base
+from core.program_cache import ProgramCache
+from core.utils import Utils
+from core_ext.asset_loader import AssetLoader
 from core_ext.camera import Camera
+from core_ext.interpolator import TransformInterpolator
+from core_ext.mesh import Mesh
 from core_ext.renderer import Renderer
 from core_ext.scene import Scene
+from core_ext.texture import Texture
+from core_ext.texture_cache import TextureCache
 from extras.movement_rig import MovementRig
+from geometry.rectangle import RectangleGeometry
 from all_objects import ObjectCreator
 from light.ambient import AmbientLight
 from light.directional import DirectionalLight
 from light.point import PointLight
 from main_menu import MainMenu
+from material.texture import TextureMaterial
+from simulation.match import MatchSimulation
+from simulation.match_settings import MatchSettings
+from simulation.match_state import Controls
 
 class Main(Base):
+    """
+    The whole application in one window and GL context: the menu, the loading
+    screen and the match are states of the same main loop. The level is loaded
+    once (its GL uploads continue while the menu is shown); leaving a match
+    only pauses it, and playing again resets the match state in place.
+    """
+    # Application states
+    MENU = "menu"
+    LOADING = "loading"
+    PLAYING = "playing"
+
     def initialize(self):
+        self.start_time = time.perf_counter()
         pygame.init()
         pygame.freetype.init()
         pygame.mixer.init()
@@ -31,17 +55,20 @@ class Main(Base):
         self.camera_rig = MovementRig()
         self.camera_rig.add(self.camera)
         self.scene.add(self.camera_rig)
-        self.objects = ObjectCreator(self)
+        # Match rules and state; the models are attached to the rigs of the simulation
+        self.match = MatchSimulation()
+        # box id -> (box rig, circle rig) of boost boxes on the field
+        self.boost_box_rigs = {}
+        # Models and images are decoded in the background and uploaded a few per
+        # frame by render(); the objects are created once all are loaded
+        AssetLoader.start(ObjectCreator.asset_list())
+        self.objects = None
+        # Was a match played since the level was loaded? Escape in the menu then goes back to it
+        self.match_played = False
         self.camera_follow_mode = True
         self.last_time_fps = time.time()
-        self.last_time_box = time.time()
         self.frame_count = 0
         self.fps = 0
-        self.boost = 100
-        self.objects.create_boost_box()
-        self.boostsCounter = 0
-        self.score = 0
-        self.opponent_score = 0
         self.boost_camera = 0
         ambient_light = AmbientLight(color=[0.65, 0.65, 0.65])
         self.scene.add(ambient_light)
@@ -51,6 +78,103 @@ class Main(Base):
         if not LOW_SPEC:
             self.particle_system = ParticleSystem()
             self.scene.add(self.particle_system)
+        self.create_menu()
+        self.app_state = Main.MENU
+
+    def create_objects(self):
+        """ Build the level once its assets are uploaded; ObjectCreator then finds them all in the caches """
+        self.objects = ObjectCreator(self)
+        self.interpolator = TransformInterpolator([self.objects.ball, self.objects.jetSki,
+                                                   self.objects.opponent, self.camera_rig])
+        AssetLoader.print_statistics()
+        TextureCache.print_statistics()
+        ProgramCache.print_statistics()
+        # Shader programs are loaded from binaries on every launch after the first
+        Utils.print_program_statistics()
+        print(f"Started in {(time.perf_counter() - self.start_time) * 1000:.0f} ms")
+
+    ########################################################################################
+    ########################################################################################
+    # MENU
+    ########################################################################################
+    ########################################################################################
+
+    def create_menu(self):
+        """ The menu is drawn with pygame into a surface, shown on a screen-sized rectangle of a scene of its own """
+        self.menu = MainMenu()
+        self.menu_texture = Texture(property_dict={"minFilter": GL.GL_LINEAR, "wrap": GL.GL_CLAMP_TO_EDGE})
+        self.menu_scene = Scene()
+        self.menu_camera = Camera()
+        self.menu_camera.set_orthographic()
+        self.menu_scene.add(Mesh(RectangleGeometry(width=2, height=2), TextureMaterial(texture=self.menu_texture)))
+
+    def update_menu(self):
+        for position in self.input.mouse_down_list:
+            action = self.menu.click(self.menu.window_to_menu(position, self.renderer.window_size))
+            if action == "play":
+                self.play()
+            elif action == "quit":
+                self._running = False
+        # Back to the paused match
+        if self.input.is_key_down("escape") and self.match_played:
+            self.app_state = Main.PLAYING
+
+    def render_menu(self):
+        self.menu.draw(self.menu.window_to_menu(self.input.mouse_position, self.renderer.window_size))
+        AssetLoader.poll(self.menu.draw_loading_progress)
+        self.menu_texture.surface = self.menu.screen
+        self.menu_texture.upload_data()
+        self.renderer.render(self.menu_scene, self.menu_camera, draw_hud=False)
+
+    def play(self):
+        """ Start a match: right away if the level is loaded, otherwise once the loading screen is done """
+        if self.objects is None:
+            self.app_state = Main.LOADING
+            return
+        # Also before the first match: the match was created with the settings of
+        # the launch, before a difficulty could be chosen in the menu
+        self.restart_match()
+        self.match_played = True
+        self.app_state = Main.PLAYING
+
+    def restart_match(self):
+        """ Reset the match state; the scene, its meshes and all GPU resources stay """
+        # Models of the boxes spawned so far are created, then removed with the others
+        self.handle_match_events()
+        # The settings are read again, e.g. the difficulty chosen in the menu
+        self.match.reset(MatchSettings())
+        self.handle_match_events()
+        if not LOW_SPEC:
+            self.particle_system.particle_buffer.clear()
+            self.particle_system.update(0)
+        self.boost_camera = 0
+        self.interpolator.save_previous()
+
+    ########################################################################################
+    ########################################################################################
+    # LOADING SCREEN
+    ########################################################################################
+    ########################################################################################
+
+    def render_loading_progress(self, decoded, uploaded, total):
+        """ Progress bar (reading and uploading count half each) with the percentage above it """
+        fraction = (decoded + uploaded) / (2 * total) if total else 1
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        right = LOADING_BAR_LEFT + (LOADING_BAR_RIGHT - LOADING_BAR_LEFT) * fraction
+        self.renderer.hud.update_boost_vertices([
+            LOADING_BAR_LEFT, LOADING_BAR_BOTTOM, 0.0,  # Bottom left
+            right, LOADING_BAR_BOTTOM, 0.0,  # Bottom right
+            right, LOADING_BAR_TOP, 0.0,  # Top right
+            right, LOADING_BAR_TOP, 0.0,  # Top right
+            LOADING_BAR_LEFT, LOADING_BAR_BOTTOM, 0.0,  # Bottom left
+            LOADING_BAR_LEFT, LOADING_BAR_TOP, 0.0  # Top left
+        ])
+        self.renderer.render_hud()
+        text_surface, _ = self.font.render(f"Loading {fraction:.0%}", (255, 255, 255), size=48)
+        text_data = pygame.image.tostring(text_surface, "RGBA", True)
+        GL.glWindowPos2d(SCREEN_WIDTH / 2 - text_surface.get_width() / 2, SCREEN_HEIGHT / 2 + 40)
+        GL.glDrawPixels(text_surface.get_width(), text_surface.get_height(), GL.GL_RGBA, GL.GL_UNSIGNED_BYTE,
+                        text_data)
 
 
     ########################################################################################
@@ -69,79 +193,6 @@ class Main(Base):
             self.camera_rig.follow_target_look_at(self.objects.jetSki, self.objects.ball, CAMERA_FOLLOW_OFFSET_Y,
                                                   CAMERA_OFFSET_DISTANCE + self.boost_camera )
 
-    ########################################################################################
-    ########################################################################################
-    # BALL COLLISION SYSTEM
-    ########################################################################################
-    ########################################################################################
-
-    def check_ball_collision_with(self, jetski_pos):
-        ball_pos = self.objects.ball.global_position
-
-        distance = math.sqrt(
-            (jetski_pos[0] - ball_pos[0]) ** 2 + (jetski_pos[1] - ball_pos[1]) ** 2 + (jetski_pos[2] - ball_pos[2]) ** 2)
-
-        if distance < HITBOX_BUFFER:
-            direction = [
-                ball_pos[0] - jetski_pos[0],
-                ball_pos[1] - jetski_pos[1]-0.1,
-                ball_pos[2] - jetski_pos[2]
-            ]
-            magnitude = math.sqrt(direction[0] ** 2 + direction[1] ** 2 + direction[2] ** 2)
-            if magnitude != 0:
-                direction = [d / magnitude for d in direction]
-
-            self.objects.ball_velocity = [d * BALL_SPEED for d in direction]
-
-    def ball_collisions(self):
-        self.check_ball_collision_with(self.objects.opponent.global_position)
-        self.check_ball_collision_with(self.objects.jetSki.global_position)
-        ball_pos = self.objects.ball.get_position()
-
-        if ball_pos[1] > BALL_GROUND:
-            self.objects.ball_velocity[1] += BALL_GRAVITY * self.delta_time
-        if self.objects.ball_velocity[1] < 0 and ball_pos[1] <= BALL_GROUND:
-            self.objects.ball.set_position([ball_pos[0], BALL_GROUND, ball_pos[2]])
-            self.objects.ball_velocity[1] = -self.objects.ball_velocity[1] * BALL_BOUNCE
-
-        self.objects.ball_velocity = [v * BALL_ATTRITION for v in self.objects.ball_velocity]
-        self.objects.ball.velocity = self.objects.ball_velocity
-        self.objects.ball.updateBall(self.delta_time)
-
-    ########################################################################################
-    ########################################################################################
-    # WALL COLLISION SYSTEM
-    ########################################################################################
-    ########################################################################################
-
-    def check_wall_collisions(self):
-        ball_pos = self.objects.ball.global_position
-        next_ball_pos = [ball_pos[i] + self.objects.ball.velocity[i] * self.delta_time for i in range(3)]
-
-        collided_with_horizontal_wall = False
-        collided_with_vertical_wall = False
-
-        for wall in self.objects.walls:
-            (min_x, max_x), (min_z, max_z) = wall.bounds
-
-            if wall in self.objects.walls[:2]:
-                if min_x * 2 <= next_ball_pos[0] <= max_x * 2:
-                    if next_ball_pos[2] < min_z or next_ball_pos[2] > max_z:
-                        self.objects.ball_velocity[2] = -self.objects.ball_velocity[2]  # Invert Z velocity
-                        collided_with_horizontal_wall = True
-                        break
-            else:
-                if min_z * 2 <= next_ball_pos[2] <= max_z * 2:
-                    if next_ball_pos[0] < min_x or next_ball_pos[0] > max_x:
-                        self.objects.ball_velocity[0] = -self.objects.ball_velocity[0]  # Invert X velocity
-                        collided_with_vertical_wall = True
-                        break
-
-        # Handle collision at the corners
-        if collided_with_horizontal_wall and collided_with_vertical_wall:
-            self.objects.ball_velocity[0] = -self.objects.ball_velocity[0]
-            self.objects.ball.velocity[2] = -self.objects.ball.velocity[2]
-
     ########################################################################################
     ########################################################################################
     # SHOW FPS
@@ -160,21 +211,6 @@ class Main(Base):
             self.tick_count = 0
             self.last_time_fps = current_time
 
-    ########################################################################################
-    ########################################################################################
-    # JETSKI MOVEMENT
-    ########################################################################################
-    ########################################################################################
-
-    def jetski_control(self):
-        if self.input.is_key_pressed("k") and self.boost > 0:
-            self.boost -= BOOST_COST
-            self.objects.jetSki.updateJetSki(self.input, self.delta_time, True)
-            if not LOW_SPEC:
-                self.particle_system.emit(self.objects.jetSki.get_position())
-        else:
-            self.objects.jetSki.updateJetSki(self.input, self.delta_time, False)
-
     ########################################################################################
     ########################################################################################
     # CIRCLE THAT FOLLOWS BALL ON THE GROUND
@@ -198,7 +234,7 @@ class Main(Base):
         return out_min + (x - in_min) * (out_max - out_min) / (in_max - in_min)
 
     def update_bar_boost(self):
-        width = self.map_value(self.boost)
+        width = self.map_value(self.match.state.boost)
         new_vertices = [
             BAR_BOOST_LEFT, BAR_BOOST_BOTTOM, 0.0,  # Bottom left
             width, BAR_BOOST_BOTTOM, 0.0,  # Bottom right
@@ -244,148 +280,25 @@ class Main(Base):
 
     ########################################################################################
     ########################################################################################
-    # BOOST SPAWN
-    ########################################################################################
-    ########################################################################################
-
-    def boost_box_logic(self):
-        if len(self.objects.boost_boxes) < BOOST_IN_MAP_LIMIT:
-            current_time = time.time()
-            elapsed_time = current_time - self.last_time_box
-            if elapsed_time >= TIME_DELAY_SPAWN_BOOST:
-                self.last_time_box = current_time
-                self.objects.create_boost_box()
-        self.check_boost_box_collision()
-
-    def check_boost_box_collision(self):
-        jetski_pos = self.objects.jetSki.global_position
-        for boost_box_rig, circle_rig, _ in self.objects.boost_boxes:  # Extract the rig from the tuple
-            box_pos = boost_box_rig.global_position
-            distance = math.sqrt((jetski_pos[0] - box_pos[0]) ** 2 + (jetski_pos[2] - box_pos[2]) ** 2)
-            if distance < HITBOX_BUFFER:
-                self.boost += BOOST_AMOUNT
-                self.boost = min(self.boost, MAX_BOOST)
-                self.objects.remove_box(boost_box_rig,circle_rig)  # Pass the rig to remove_box
-                break
-
-    ########################################################################################
-    ########################################################################################
-    # CHECK FOR GOALS
+    # MATCH EVENTS
     ########################################################################################
     ########################################################################################
 
-    def check_goal_hitboxes(self):
-        ball_pos = self.objects.ball.global_position
-        next_ball_pos = [ball_pos[i] + self.objects.ball.velocity[i] * self.delta_time for i in range(3)]
-
-        for i, hitBox in enumerate(self.objects.hitBoxes):
-            (min_x, max_x), (min_z, max_z) = hitBox.bounds
-            if i == 0:
-                if min_x <= next_ball_pos[0] <= max_x and min_z - 3 <= next_ball_pos[2] <= max_z - 3:
-                    self.goalScored(True)
-                    break
-            elif i == 1:
-                if min_x <= next_ball_pos[0] <= max_x and min_z + 3 <= next_ball_pos[2] <= max_z + 3:
-                    self.goalScored(False)
-                    break
-
-
-    def goalScored(self, playerScored):
-        self.objects.ball.set_position(BALL_START_POSITION)
-        self.objects.ball_velocity = [0, 0, 0]
-        self.objects.jetSki.set_position(PLAYER_START_POSITION)
-        self.objects.jetSki.set_rotate_y(math.pi * 1.75)
-        self.objects.opponent.set_position(OPPONENT_START_POSITION)
-        self.objects.opponent.set_rotate_y(math.pi * 1.75)
-        self.boost = 50
-        if playerScored:
-            self.score += 1
-        else:
-            self.opponent_score += 1
-
-    ########################################################################################
-    ########################################################################################
-    # OPPONENT AI
-    ########################################################################################
-    ########################################################################################
-
-    def opponentAI(self):
-        ball_position = self.objects.ball.global_position
-        opponent_position = self.objects.opponent.global_position
-        player_goal_position = [0.5, 0.5, FIELD_LENGTH / 2]
-
-        direction_to_goal = [
-            player_goal_position[0] - ball_position[0],
-            player_goal_position[1] - ball_position[1],
-            player_goal_position[2] - ball_position[2]
-        ]
-
-        magnitude = math.sqrt(direction_to_goal[0]**2 + direction_to_goal[1]**2 + direction_to_goal[2]**2)
-        direction_to_goal = [d / magnitude for d in direction_to_goal]
-
-        hit_position = [
-            ball_position[0] - direction_to_goal[0],
-            ball_position[1] - direction_to_goal[1],
-            ball_position[2] - direction_to_goal[2]
-        ]
-
-        self.objects.opponent.look_at(hit_position)
-        self.objects.opponent.rotate_y(math.pi * 1.5)
-        self.objects.opponent.updateOpponent(self.delta_time, JETSKI_SPEED * OPPONENT_DIFFICULTY, GROUND)
-
-        # Check if the opponent is close enough to the ball to hit it
-        distance_to_ball = math.sqrt(
-            (opponent_position[0] - ball_position[0]) ** 2 +
-            (opponent_position[1] - ball_position[1]) ** 2 +
-            (opponent_position[2] - ball_position[2]) ** 2
-        )
-
-        if distance_to_ball < HITBOX_BUFFER:
-            # Calculate the direction to apply to the ball
-            direction = [
-                ball_position[0] - opponent_position[0],
-                ball_position[1] - opponent_position[1],
-                ball_position[2] - opponent_position[2]
-            ]
-            magnitude = math.sqrt(direction[0] ** 2 + direction[1] ** 2 + direction[2] ** 2)
-            if magnitude != 0:
-                direction = [d / magnitude for d in direction]
-
-            self.objects.ball_velocity = [d * BALL_SPEED for d in direction]
-
+    def handle_match_events(self):
+        """ Create and remove the models of boost boxes spawned or collected in the simulation """
+        for event in self.match.pop_events():
+            if event[0] == "boost_box_spawned":
+                box = event[1]
+                self.boost_box_rigs[box.box_id] = self.objects.create_boost_box(box.position)
+            elif event[0] in ("boost_box_collected", "boost_box_removed"):
+                box = event[1]
+                self.objects.remove_box(*self.boost_box_rigs.pop(box.box_id))
 
     def rotate_blue_red_labels(self):
         self.objects.blue.rotate_y(0.1 * self.delta_time)
         self.objects.red.rotate_y(0.1 * self.delta_time)
     
 
-    ########################################################################################
-    ########################################################################################
-    # SPECTATORS MOVEMENT
-    ########################################################################################
-    ########################################################################################
-
-    def update_sine_wave_spectators(self):
-        for sphere_rig, frequency in self.objects.spheres:
-            original_position = sphere_rig.global_position
-            new_y = GROUND + 0.2 + SPECTATORS_JUMP_AMPLITUDE * math.sin(frequency * time.time())
-            sphere_rig.set_position([original_position[0], new_y, original_position[2]])
-
-    ########################################################################################
-    ########################################################################################
-    # SPECTATORS MOVEMENT
-    ########################################################################################
-    ########################################################################################
-
-    def update_sine_wave_boost_box(self):
-        for boost_box_rig, _, frequency in self.objects.boost_boxes:
-            original_position = boost_box_rig.global_position
-            new_y = BOOST_GROUND + BOOST_JUMP_AMPLITUDE * math.sin(frequency * time.time())
-            boost_box_rig.set_position([original_position[0], new_y, original_position[2]])
-
-
-
-
     ########################################################################################
     ########################################################################################
     # MAIN
@@ -393,38 +306,57 @@ class Main(Base):
     ########################################################################################
 
     def update(self):
-        self.jetski_control()
-        self.ball_collisions()
-        self.check_wall_collisions()
+        """ One fixed simulation tick; the match only advances while it is played """
+        if self.app_state == Main.MENU:
+            self.update_menu()
+            return
+        if self.app_state == Main.LOADING:
+            return
+        self.interpolator.save_previous()
+        self.match.tick(Controls.from_input(self.input), self.delta_time)
+        self.handle_match_events()
         self.camera_updates()
-        self.check_goal_hitboxes()
-        self.showFPS()
-        self.circle_following_ball_ground()
-        self.boost_box_logic()
 
         if not LOW_SPEC:
+            if self.match.state.jet_ski.boosting:
+                self.particle_system.emit(self.objects.jetSki.get_position())
             self.particle_system.update(self.delta_time)
+        if LABELS_TURN:
             self.rotate_blue_red_labels()
-            self.update_sine_wave_spectators()
-            self.update_sine_wave_boost_box()
-            self.objects.update_sine_wave_field()
 
-        if self.fps > 25: # fixes weird bug for some reason
-            self.opponentAI()
+        if self.input.is_key_down("escape"):
+            self.quit_to_main_menu()
+
+    def render(self):
+        if self.objects is None:
+            # GL uploads run on this thread, within a time budget per frame, while the menu
+            # or the loading screen is shown
+            loading = self.app_state == Main.LOADING
+            if AssetLoader.upload(progress_callback=self.render_loading_progress if loading else None):
+                self.create_objects()
+                if loading:
+                    self.play()
+        if self.app_state == Main.MENU:
+            self.render_menu()
+            return
+        if self.app_state == Main.LOADING:
+            return
+        # Draw moving objects between their positions at the last two ticks
+        self.interpolator.apply(self.alpha)
+        self.showFPS()
+        self.circle_following_ball_ground()
+
+        if not LOW_SPEC:
+            self.objects.update_entities(time.time())
 
         self.renderer.hud.update_boost_vertices(self.update_bar_boost())
         self.renderer.render(self.scene, self.camera)
-        self.render_scores(self.score, self.opponent_score)
-
-        if self.input.is_key_down("escape"):
-            self.quit_to_main_menu()
+        self.render_scores(self.match.state.score, self.match.state.opponent_score)
+        self.interpolator.restore()
 
     def quit_to_main_menu(self):
-        pygame.display.quit()
-        pygame.display.init()
-        pygame.freetype.init()
-        menu = MainMenu()
-        menu.run()
+        """ Pause the match and show the menu; the window, the GL context and the scene stay """
+        self.app_state = Main.MENU
 
 def run_game():
     Main(screen_size=[SCREEN_WIDTH, SCREEN_HEIGHT]).run()
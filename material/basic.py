@@ -3,20 +3,23 @@ from core.uniform import Uniform
 
 
 class BasicMaterial(Material):
-    def __init__(self, vertex_shader_code=None, fragment_shader_code=None, use_vertex_colors=True):
+    def __init__(self, vertex_shader_code=None, fragment_shader_code=None, use_vertex_colors=True,
+                 use_instancing=False):
         if vertex_shader_code is None:
             vertex_shader_code = """
                 uniform mat4 projectionMatrix;
                 uniform mat4 viewMatrix;
-                uniform mat4 modelMatrix;
+                uniform mat4 modelMatrix;""" + self.instancing_shader_code(use_instancing) + """
                 in vec3 vertexPosition;
                 in vec3 vertexColor;
                 out vec3 color;    
+                out vec3 instanceTint;
                         
                 void main()
                 {
-                    gl_Position = projectionMatrix * viewMatrix * modelMatrix * vec4(vertexPosition, 1.0);
+                    gl_Position = projectionMatrix * viewMatrix * getWorldMatrix() * vec4(vertexPosition, 1.0);
                     color = vertexColor;
+                    instanceTint = getInstanceColor();
                 }
             """
         if fragment_shader_code is None:
@@ -24,14 +27,15 @@ class BasicMaterial(Material):
                 uniform vec3 baseColor;
                 uniform bool useVertexColors;
                 in vec3 color;
+                in vec3 instanceTint;
                 out vec4 fragColor;
                 
                 void main()
                 {
-                    fragColor = vec4(baseColor, 1.0);
+                    fragColor = vec4(baseColor * instanceTint, 1.0);
                     if (useVertexColors) 
                     {
-                        fragColor = vec4(color, 1.0);
+                        fragColor = vec4(color * instanceTint, 1.0);
                     }
                 }
             """
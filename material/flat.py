@@ -8,12 +8,11 @@ class FlatMaterial(LightedMaterial):
     Flat material with at least one light source (or more)
     """
     def __init__(self, texture=None, property_dict=None, number_of_light_sources=1):
-        super().__init__(number_of_light_sources)
+        # Shader variant; materials with the same one share a program
+        define_dict = {"USE_TEXTURE": 1} if texture is not None else {}
+        super().__init__(number_of_light_sources, define_dict)
         self.add_uniform("vec3", "baseColor", [1.0, 1.0, 1.0])
-        if texture is None:
-            self.add_uniform("bool", "useTexture", False)
-        else:
-            self.add_uniform("bool", "useTexture", True)
+        if texture is not None:
             self.add_uniform("sampler2D", "textureSampler", [texture.texture_ref, 1])
         self.locate_uniforms()
 
@@ -94,7 +93,6 @@ class FlatMaterial(LightedMaterial):
     def fragment_shader_code(self):
         return """
             uniform vec3 baseColor;
-            uniform bool useTexture;
             uniform sampler2D textureSampler;
             in vec2 UV;
             in vec3 light;
@@ -102,20 +100,18 @@ class FlatMaterial(LightedMaterial):
             void main()
             {
                 vec4 color = vec4(baseColor, 1.0);
-                if (useTexture)
-                    color *= texture(textureSampler, UV);
+                #ifdef USE_TEXTURE
+                color *= texture(textureSampler, UV);
+                #endif
                 color *= vec4(light, 1);
                 fragColor = color;
             }
         """
 
-    def update_render_settings(self):
-        if self.setting_dict["doubleSide"]:
-            GL.glDisable(GL.GL_CULL_FACE)
-        else:
-            GL.glEnable(GL.GL_CULL_FACE)
+    def update_render_settings(self, gl_state):
+        gl_state.set_capability(GL.GL_CULL_FACE, not self.setting_dict["doubleSide"])
         if self.setting_dict["wireframe"]:
-            GL.glPolygonMode(GL.GL_FRONT_AND_BACK, GL.GL_LINE)
+            gl_state.polygon_mode(GL.GL_LINE)
         else:
-            GL.glPolygonMode(GL.GL_FRONT_AND_BACK, GL.GL_FILL)
-        GL.glLineWidth(self.setting_dict["lineWidth"])
+            gl_state.polygon_mode(GL.GL_FILL)
+        gl_state.line_width(self.setting_dict["lineWidth"])
@@ -1,8 +1,7 @@
 import OpenGL.GL as GL
 
+from core_ext.texture_cache import TextureCache
 from material.lighted import LightedMaterial
-import numpy as np
-from PIL import Image
 
 
 class LambertMaterial(LightedMaterial):
@@ -14,28 +13,30 @@ class LambertMaterial(LightedMaterial):
                  property_dict=None,
                  number_of_light_sources=2,
                  bump_texture=None,
-                 use_shadow=False):
-        super().__init__(number_of_light_sources)
+                 use_shadow=False,
+                 use_instancing=False):
+        # Needed by vertex_shader_code, which is read by the parent constructor
+        self._use_instancing = use_instancing
+        # Shader variants; materials with the same ones share a program
+        define_dict = {}
+        if texture_path is not None:
+            define_dict["USE_TEXTURE"] = 1
+        if bump_texture is not None:
+            define_dict["USE_BUMP_TEXTURE"] = 1
+        if use_shadow:
+            define_dict["USE_SHADOW"] = 1
+        super().__init__(number_of_light_sources, define_dict)
         self.add_uniform("vec3", "baseColor", [1.0, 1.0, 1.0])
 
-        if texture_path is None:
-            self.add_uniform("bool", "useTexture", False)
-        else:
+        if texture_path is not None:
             texture = self.load_texture(texture_path)
-            self.add_uniform("bool", "useTexture", True)
             self.add_uniform("sampler2D", "textureSampler", [texture, 1])
 
-        if bump_texture is None:
-            self.add_uniform("bool", "useBumpTexture", False)
-        else:
-            self.add_uniform("bool", "useBumpTexture", True)
+        if bump_texture is not None:
             self.add_uniform("sampler2D", "bumpTextureSampler", [bump_texture.texture_ref, 2])
             self.add_uniform("float", "bumpStrength", 1.0)
 
-        if not use_shadow:
-            self.add_uniform("bool", "useShadow", False)
-        else:
-            self.add_uniform("bool", "useShadow", True)
+        if use_shadow:
             self.add_uniform("Shadow", "shadow0", None)
 
         self.locate_uniforms()
@@ -53,13 +54,14 @@ class LambertMaterial(LightedMaterial):
         return """
             uniform mat4 projectionMatrix;
             uniform mat4 viewMatrix;
-            uniform mat4 modelMatrix;
+            uniform mat4 modelMatrix;""" + self.instancing_shader_code(self._use_instancing) + """
             in vec3 vertexPosition;
             in vec2 vertexUV;
             in vec3 vertexNormal;
             out vec3 position;
             out vec2 UV;
             out vec3 normal;
+            out vec3 instanceTint;
             
             struct Shadow
             {
@@ -76,22 +78,24 @@ class LambertMaterial(LightedMaterial):
                 float bias;
             };
             
-            uniform bool useShadow;
             uniform Shadow shadow0;
             out vec3 shadowPosition0;
 
             void main()
             {
-                gl_Position = projectionMatrix * viewMatrix * modelMatrix * vec4(vertexPosition, 1);
-                position = vec3(modelMatrix * vec4(vertexPosition, 1));
+                mat4 worldMatrix = getWorldMatrix();
+                gl_Position = projectionMatrix * viewMatrix * worldMatrix * vec4(vertexPosition, 1);
+                position = vec3(worldMatrix * vec4(vertexPosition, 1));
                 UV = vertexUV;
-                normal = normalize(mat3(modelMatrix) * vertexNormal);
+                normal = normalize(mat3(worldMatrix) * vertexNormal);
+                instanceTint = getInstanceColor();
                 
-                if (useShadow)
+                #ifdef USE_SHADOW
                 {
-                    vec4 temp0 = shadow0.projectionMatrix * shadow0.viewMatrix * modelMatrix * vec4(vertexPosition, 1);
+                    vec4 temp0 = shadow0.projectionMatrix * shadow0.viewMatrix * worldMatrix * vec4(vertexPosition, 1);
                     shadowPosition0 = vec3(temp0);
                 }            
+                #endif
             }
         """
 
@@ -142,14 +146,13 @@ class LambertMaterial(LightedMaterial):
             }
             
             uniform vec3 baseColor;
-            uniform bool useTexture;
             uniform sampler2D textureSampler;
-            uniform bool useBumpTexture;
             uniform sampler2D bumpTextureSampler;
             uniform float bumpStrength;
             in vec3 position;
             in vec2 UV;
             in vec3 normal;
+            in vec3 instanceTint;
             out vec4 fragColor;
             
             struct Shadow
@@ -167,27 +170,28 @@ class LambertMaterial(LightedMaterial):
                 float bias;
             };
             
-            uniform bool useShadow;
             uniform Shadow shadow0;
             in vec3 shadowPosition0;
 
             void main()
             {
-                vec4 color = vec4(baseColor, 1.0);
-                if (useTexture) 
+                vec4 color = vec4(baseColor * instanceTint, 1.0);
+                #ifdef USE_TEXTURE
                 {
                     color *= texture(textureSampler, UV );
                 }
+                #endif
                 vec3 calcNormal = normal;
-                if (useBumpTexture) 
+                #ifdef USE_BUMP_TEXTURE
                 {
                     calcNormal += bumpStrength * vec3(texture(bumpTextureSampler, UV));
                 }
+                #endif
                 // Calculate total effect of lights on color
                 vec3 light = vec3(0, 0, 0);""" + self.adding_lights_in_shader_code + """
                 color *= vec4(light, 1);
                 
-                if (useShadow)
+                #ifdef USE_SHADOW
                 {
                     // determine if surface is facing towards light direction
                     float cosAngle = dot(normalize(normal), -normalize(shadow0.lightDirection));
@@ -205,43 +209,23 @@ class LambertMaterial(LightedMaterial):
                         color *= vec4(s, s, s, 1);
                     }
                 }               
+                #endif
                 
                 fragColor = color;
             }
         """
 
-    def update_render_settings(self):
-        if self.setting_dict["doubleSide"]:
-            GL.glDisable(GL.GL_CULL_FACE)
-        else:
-            GL.glEnable(GL.GL_CULL_FACE)
+    def update_render_settings(self, gl_state):
+        gl_state.set_capability(GL.GL_CULL_FACE, not self.setting_dict["doubleSide"])
         if self.setting_dict["wireframe"]:
-            GL.glPolygonMode(GL.GL_FRONT_AND_BACK, GL.GL_LINE)
+            gl_state.polygon_mode(GL.GL_LINE)
         else:
-            GL.glPolygonMode(GL.GL_FRONT_AND_BACK, GL.GL_FILL)
-        GL.glLineWidth(self.setting_dict["lineWidth"])
+            gl_state.polygon_mode(GL.GL_FILL)
+        gl_state.line_width(self.setting_dict["lineWidth"])
 
 
     def load_texture(self, image_path):
-        # Load image using PIL
-        image = Image.open(image_path)
-        # Convert the image to RGBA format
-        image = image.convert('RGBA')
-        # Convert image data to a numpy array
-        image_data = np.array(list(image.getdata()), np.uint8)
-        
-        # Generate a texture ID
-        texture_id = GL.glGenTextures(1)
-        # Bind the texture ID
-        GL.glBindTexture(GL.GL_TEXTURE_2D, texture_id)
-        
-        # Set texture parameters
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_REPEAT)
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_REPEAT)
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
-        
-        # Upload the texture data to the GPU
-        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, image.width, image.height, 0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, image_data)
-        
-        return texture_id
\ No newline at end of file
+        # Shared with every other material using the same image; the rows are
+        # uploaded top first, as this material always has
+        texture = TextureCache.get(image_path, flip=False)
+        return texture.texture_ref
@@ -2,27 +2,31 @@ from material.material import Material
 
 
 class LightedMaterial(Material):
-    def __init__(self, number_of_light_sources=1):
+    # Light uniforms declared in the shader code; the number actually used is
+    # the NUMBER_OF_LIGHT_SOURCES #define, so the code is the same for every count
+    MAX_LIGHT_SOURCES = 8
+    # Text lines with light uniforms and their contributions, inserted into shader code
+    declaring_light_uniforms_in_shader_code = "\n" + "\n".join(
+        f"\t\t\t#if NUMBER_OF_LIGHT_SOURCES > {i}\n\t\t\tuniform Light light{i};\n\t\t\t#endif"
+        for i in range(MAX_LIGHT_SOURCES)) + "\n"
+    adding_lights_in_shader_code = "\n" + "\n".join(
+        f"\t\t\t\t#if NUMBER_OF_LIGHT_SOURCES > {i}\n"
+        f"\t\t\t\tlight += calculateLight(light{i}, position, calcNormal);\n\t\t\t\t#endif"
+        for i in range(MAX_LIGHT_SOURCES))
+
+    def __init__(self, number_of_light_sources=1, define_dict=None):
+        if number_of_light_sources > LightedMaterial.MAX_LIGHT_SOURCES:
+            raise Exception(f"At most {LightedMaterial.MAX_LIGHT_SOURCES} light sources are supported")
         self._number_of_light_sources = number_of_light_sources
+        define_dict = dict(define_dict or {}, NUMBER_OF_LIGHT_SOURCES=number_of_light_sources)
         # Properties vertex_shader_code and fragment_shader_code
         # will be defined in inherited classes FlatMaterial, LambertMaterial,
         # and PhongMaterial
-        super().__init__(self.vertex_shader_code, self.fragment_shader_code)
+        super().__init__(self.vertex_shader_code, self.fragment_shader_code, define_dict)
         # Add light uniforms to self._uniform_dict
         for i in range(self._number_of_light_sources):
             self.add_uniform("Light", f"light{i}", None)
 
-    @property
-    def declaring_light_uniforms_in_shader_code(self):
-        """ Create a text line with light uniforms to be inserted into a shader code """
-        return "\n" + "\n".join(f"\t\t\tuniform Light light{i};"
-                                for i in range(self._number_of_light_sources)) + "\n"
-
-    @property
-    def adding_lights_in_shader_code(self):
-        return "\n" + "\n".join(f"\t\t\t\tlight += calculateLight(light{i}, position, calcNormal);"
-                                for i in range(self._number_of_light_sources))
-
     @property
     def vertex_shader_code(self):
         raise NotImplementedError("Implement this property for an inheriting class")
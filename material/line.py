@@ -14,8 +14,8 @@ class LineMaterial(BasicMaterial):
         self._setting_dict["lineType"] = "connected"
         self.set_properties(property_dict)
 
-    def update_render_settings(self):
-        GL.glLineWidth(self._setting_dict["lineWidth"])
+    def update_render_settings(self, gl_state):
+        gl_state.line_width(self._setting_dict["lineWidth"])
         if self._setting_dict["lineType"] == "connected":
             self._setting_dict["drawStyle"] = GL.GL_LINE_STRIP
         elif self._setting_dict["lineType"] == "loop":
@@ -1,12 +1,14 @@
 import OpenGL.GL as GL
 
 from core.uniform import Uniform
-from core.utils import Utils
+from core.program_cache import ProgramCache
 
 
 class Material:
-    def __init__(self, vertex_shader_code, fragment_shader_code):
-        self._program_ref = Utils.initialize_program(vertex_shader_code, fragment_shader_code)
+    def __init__(self, vertex_shader_code, fragment_shader_code, define_dict=None):
+        # Materials with the same shader code and #define variants share one program
+        self._define_dict = dict(define_dict or {})
+        self._program_ref = ProgramCache.get(vertex_shader_code, fragment_shader_code, self._define_dict)
         # Store Uniform objects, indexed by name of associated variable in shader.
         # Each shader typically contains these uniforms; values will be set during render process from Mesh / Camera.
         self._uniform_dict = {
@@ -14,15 +16,21 @@ class Material:
             "viewMatrix":       Uniform("mat4", None),
             "projectionMatrix": Uniform("mat4", None),
         }
-        # Store OpenGL render settings, indexed by variable name
+        # Store OpenGL render settings, indexed by variable name.
+        # Transparent materials are drawn after opaque ones, back to front.
         self._setting_dict = {
-            "drawStyle": GL.GL_TRIANGLES
+            "drawStyle": GL.GL_TRIANGLES,
+            "transparent": False
         }
 
     @property
     def program_ref(self):
         return self._program_ref
 
+    @property
+    def define_dict(self):
+        return self._define_dict
+
     @property
     def setting_dict(self):
         return self._setting_dict
@@ -39,8 +47,32 @@ class Material:
         for variable_name, uniform_object in self._uniform_dict.items():
             uniform_object.locate_variable(self._program_ref, variable_name)
 
-    def update_render_settings(self):
-        """ Configure OpenGL with render settings """
+    @staticmethod
+    def instancing_shader_code(use_instancing):
+        """
+        Vertex shader code defining getWorldMatrix() and getInstanceColor().
+        With instancing, the per-instance attributes supplied by InstancedMesh are
+        combined with modelMatrix; otherwise modelMatrix and white are returned.
+        Must be inserted after the declaration of modelMatrix.
+        """
+        if use_instancing:
+            return """
+                in mat4 instanceMatrix;
+                in vec3 instanceColor;
+                mat4 getWorldMatrix() { return modelMatrix * instanceMatrix; }
+                vec3 getInstanceColor() { return instanceColor; }
+            """
+        return """
+                mat4 getWorldMatrix() { return modelMatrix; }
+                vec3 getInstanceColor() { return vec3(1.0, 1.0, 1.0); }
+            """
+
+    def release(self):
+        """ Release the reference of this material to its shared program, when the material is discarded; meshes hold references of their own """
+        ProgramCache.release(self._program_ref)
+
+    def update_render_settings(self, gl_state):
+        """ Configure OpenGL with render settings through a GLState tracker """
         pass
 
     def set_properties(self, property_dict):
@@ -14,9 +14,6 @@ class PointMaterial(BasicMaterial):
         self._setting_dict["roundedPoints"] = False
         self.set_properties(property_dict)
 
-    def update_render_settings(self):
-        GL.glPointSize(self._setting_dict["pointSize"])
-        if self._setting_dict["roundedPoints"]:
-            GL.glEnable(GL.GL_POINT_SMOOTH)
-        else:
-            GL.glDisable(GL.GL_POINT_SMOOTH)
+    def update_render_settings(self, gl_state):
+        gl_state.point_size(self._setting_dict["pointSize"])
+        gl_state.set_capability(GL.GL_POINT_SMOOTH, self._setting_dict["roundedPoints"])
@@ -70,8 +70,5 @@ class SpriteMaterial(Material):
         self.setting_dict["doubleSide"] = True
         self.set_properties(property_dict)
 
-    def update_render_settings(self):
-        if self.setting_dict["doubleSide"]:
-            GL.glDisable(GL.GL_CULL_FACE)
-        else:
-            GL.glEnable(GL.GL_CULL_FACE)
\ No newline at end of file
+    def update_render_settings(self, gl_state):
+        gl_state.set_capability(GL.GL_CULL_FACE, not self.setting_dict["doubleSide"])
\ No newline at end of file
@@ -17,13 +17,10 @@ class SurfaceMaterial(BasicMaterial):
         self._setting_dict["lineWidth"] = 1
         self.set_properties(property_dict)
 
-    def update_render_settings(self):
-        if self._setting_dict["doubleSide"]:
-            GL.glDisable(GL.GL_CULL_FACE)
-        else:
-            GL.glEnable(GL.GL_CULL_FACE)
+    def update_render_settings(self, gl_state):
+        gl_state.set_capability(GL.GL_CULL_FACE, not self._setting_dict["doubleSide"])
         if self._setting_dict["wireframe"]:
-            GL.glPolygonMode(GL.GL_FRONT_AND_BACK, GL.GL_LINE)
+            gl_state.polygon_mode(GL.GL_LINE)
         else:
-            GL.glPolygonMode(GL.GL_FRONT_AND_BACK, GL.GL_FILL)
-        GL.glLineWidth(self._setting_dict["lineWidth"])
+            gl_state.polygon_mode(GL.GL_FILL)
+        gl_state.line_width(self._setting_dict["lineWidth"])
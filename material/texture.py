@@ -4,20 +4,22 @@ from material.material import Material
 
 
 class TextureMaterial(Material):
-    def __init__(self, texture, property_dict=None):
+    def __init__(self, texture, property_dict=None, use_instancing=False):
         vertex_shader_code = """
             uniform mat4 projectionMatrix;
             uniform mat4 viewMatrix;
-            uniform mat4 modelMatrix;
+            uniform mat4 modelMatrix;""" + self.instancing_shader_code(use_instancing) + """
             in vec3 vertexPosition;
             in vec2 vertexUV;
             uniform vec2 repeatUV;
             uniform vec2 offsetUV;
             out vec2 UV;
+            out vec3 instanceTint;
             void main()
             {
-                gl_Position = projectionMatrix * viewMatrix * modelMatrix * vec4(vertexPosition, 1.0);
+                gl_Position = projectionMatrix * viewMatrix * getWorldMatrix() * vec4(vertexPosition, 1.0);
                 UV = vertexUV * repeatUV + offsetUV;
+                instanceTint = getInstanceColor();
             }
         """
 
@@ -25,10 +27,11 @@ class TextureMaterial(Material):
             uniform vec3 baseColor;
             uniform sampler2D textureSampler;
             in vec2 UV;
+            in vec3 instanceTint;
             out vec4 fragColor;
             void main()
             {
-                vec4 color = vec4(baseColor, 1.0) * texture(textureSampler, UV);
+                vec4 color = vec4(baseColor * instanceTint, 1.0) * texture(textureSampler, UV);
                 if (color.a < 0.1)
                     discard;                    
                 fragColor = color;
@@ -48,13 +51,10 @@ class TextureMaterial(Material):
         self.setting_dict["lineWidth"] = 1
         self.set_properties(property_dict)
 
-    def update_render_settings(self):
-        if self.setting_dict["doubleSide"]:
-            GL.glDisable(GL.GL_CULL_FACE)
-        else:
-            GL.glEnable(GL.GL_CULL_FACE)
+    def update_render_settings(self, gl_state):
+        gl_state.set_capability(GL.GL_CULL_FACE, not self.setting_dict["doubleSide"])
         if self.setting_dict["wireframe"]:
-            GL.glPolygonMode(GL.GL_FRONT_AND_BACK, GL.GL_LINE)
+            gl_state.polygon_mode(GL.GL_LINE)
         else:
-            GL.glPolygonMode(GL.GL_FRONT_AND_BACK, GL.GL_FILL)
-        GL.glLineWidth(self.setting_dict["lineWidth"])
+            gl_state.polygon_mode(GL.GL_FILL)
+        gl_state.line_width(self.setting_dict["lineWidth"])
@@ -0,0 +1,95 @@
+"""
+Play many headless AI-vs-AI matches in parallel, e.g. to tune constants.py
+or to check that a physics change does not alter results.
+
+Run from the repository root; every --set is one variant of the settings:
+    python -m simulation.batch --matches 1000 --seconds 60
+    python -m simulation.batch --set ball_speed=8 --set ball_speed=10,ball_attrition=0.9
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from simulation.match import MatchSimulation
+from simulation.match_settings import MatchSettings
+
+
+# Settings of batch matches that differ from the game
+BATCH_DEFAULTS = {"kickoff_jitter": 2}
+
+
+def play_match(job):
+    """ Play one AI-vs-AI match; job is (settings overrides, seed, seconds, tick rate) """
+    overrides, seed, seconds, tick_rate = job
+    match = MatchSimulation(MatchSettings(**dict(BATCH_DEFAULTS, **overrides)), seed=seed)
+    match.run(seconds, tick_rate)
+    state = match.state
+    return {"score": state.score,
+            "opponent_score": state.opponent_score,
+            "boost_boxes": state.next_boost_box_id,
+            "ticks": state.tick_count}
+
+
+def run_batch(overrides_list, match_count, seconds=60, tick_rate=60, workers=None, first_seed=0):
+    """
+    Play match_count matches for every dict of setting overrides, spread over
+    a process pool. Match i of every variant uses seed first_seed + i, so all
+    variants see the same boost box spawns. Returns one summary dict per variant.
+    """
+    job_list = [(overrides, first_seed + i, seconds, tick_rate)
+                for overrides in overrides_list for i in range(match_count)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        result_list = list(executor.map(play_match, job_list, chunksize=max(1, len(job_list) // 64)))
+    summary_list = []
+    for variant, overrides in enumerate(overrides_list):
+        results = result_list[variant * match_count:(variant + 1) * match_count]
+        goals = [result["score"] + result["opponent_score"] for result in results]
+        summary_list.append({
+            "settings": overrides,
+            "matches": match_count,
+            "goals_per_match": sum(goals) / match_count,
+            "player_wins": sum(result["score"] > result["opponent_score"] for result in results) / match_count,
+            "opponent_wins": sum(result["score"] < result["opponent_score"] for result in results) / match_count,
+            "scoreless": sum(goal_count == 0 for goal_count in goals) / match_count,
+        })
+    return summary_list
+
+
+def parse_overrides(text):
+    """ "ball_speed=10,ball_attrition=0.99" -> {"ball_speed": 10.0, "ball_attrition": 0.99} """
+    overrides = {}
+    for item in text.split(","):
+        name, value = item.split("=")
+        overrides[name.strip()] = float(value)
+    # Fail early on unknown names
+    MatchSettings(**overrides)
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=200, help="matches per settings variant")
+    parser.add_argument("--seconds", type=float, default=60, help="simulated length of a match")
+    parser.add_argument("--tick-rate", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--set", action="append", dest="variant_list", default=[],
+                        help="comma-separated setting overrides, e.g. ball_speed=10")
+    arguments = parser.parse_args()
+
+    overrides_list = [parse_overrides(text) for text in arguments.variant_list] or [{}]
+    start = time.perf_counter()
+    summary_list = run_batch(overrides_list, arguments.matches, arguments.seconds,
+                             arguments.tick_rate, arguments.workers)
+    elapsed = time.perf_counter() - start
+    match_count = arguments.matches * len(overrides_list)
+    print(f"{match_count} matches of {arguments.seconds:g} s in {elapsed:.1f} s "
+          f"({match_count / elapsed * 60:.0f} matches/minute, {arguments.workers} workers)")
+    for summary in summary_list:
+        print(f"{summary['settings'] or 'defaults'}: {summary['goals_per_match']:.2f} goals/match, "
+              f"player wins {summary['player_wins']:.0%}, opponent wins {summary['opponent_wins']:.0%}, "
+              f"scoreless {summary['scoreless']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import numpy as np
+
+
+def sweep_sphere_plane(center, motion, radius, normal, distance):
+    """
+    Time of impact (0 to 1, as a fraction of motion) of a sphere moving by
+    motion against the plane normal . p = distance, which is solid on the side
+    opposite to the normal; None if it does not hit it during the motion.
+    A sphere that already overlaps the plane hits it at once if it moves further in.
+    """
+    start = sum(normal[i] * center[i] for i in range(3)) - distance - radius
+    approach = sum(normal[i] * motion[i] for i in range(3))
+    if start < 0:
+        return 0.0 if approach < 0 else None
+    end = start + approach
+    if end >= 0:
+        return None
+    return start / (start - end)
+
+
+def sweep_sphere_box(center, motion, radius, minimum, maximum):
+    """
+    Time of impact (0 to 1, as a fraction of motion) of a sphere moving by
+    motion against an axis-aligned box (bounds may be infinite); 0 if they
+    already overlap, None if they do not meet during the motion. The box is
+    grown by the radius on every side, so its corners count as square.
+    """
+    enter_time = 0.0
+    exit_time = 1.0
+    for i in range(3):
+        low = minimum[i] - radius
+        high = maximum[i] + radius
+        if motion[i] == 0:
+            if center[i] < low or center[i] > high:
+                return None
+            continue
+        time_low = (low - center[i]) / motion[i]
+        time_high = (high - center[i]) / motion[i]
+        if time_low > time_high:
+            time_low, time_high = time_high, time_low
+        enter_time = max(enter_time, time_low)
+        exit_time = min(exit_time, time_high)
+        if enter_time > exit_time:
+            return None
+    return enter_time
+
+
+class CollisionWorld:
+    """
+    Collision queries for spheres moving over a flat arena, static planes and
+    static boxes.
+
+    Broad phase: spheres are sorted into a uniform grid of square cells in the
+    x-z plane; only spheres in the same or neighbouring cells are compared.
+    Positions outside the arena are clamped to the border cells, which only
+    adds candidates. Narrow phase: squared distances, no square roots.
+    Planar spheres (e.g. pickups) ignore the height difference.
+    Fast spheres are swept against planes and boxes to find the time of
+    impact, so they cannot pass through them between two ticks.
+    """
+    # Half of the neighbourhood of a cell (column, row): every pair of adjacent cells is visited once
+    NEIGHBOUR_OFFSETS = [(0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+    # Below this many spheres, testing all pairs is cheaper than building the grid
+    GRID_MIN_BODY_COUNT = 32
+
+    def __init__(self, min_x, max_x, min_z, max_z, cell_size=2.0, capacity=16):
+        self._min_x = min_x
+        self._min_z = min_z
+        self._cell_size = cell_size
+        self._column_count = max(1, int(np.ceil((max_x - min_x) / cell_size)))
+        self._row_count = max(1, int(np.ceil((max_z - min_z) / cell_size)))
+        self._neighbour_offsets = np.array(self.NEIGHBOUR_OFFSETS)
+        # index pairs (i < j) for all-pairs tests, by sphere count
+        self._all_pairs_cache = {}
+        # Spheres, one row each
+        self._position = np.zeros((capacity, 3))
+        self._radius = np.zeros(capacity)
+        self._planar = np.zeros(capacity, dtype=bool)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._owner_list = [None] * capacity
+        self._body_count = 0
+        self._free_body_list = []
+        # Static planes, (normal, distance, owner), and axis-aligned boxes,
+        # (minimum corner, maximum corner, owner); few, so kept in lists
+        self._plane_list = []
+        self._box_list = []
+
+    @property
+    def body_count(self):
+        return self._body_count - len(self._free_body_list)
+
+    def add_sphere(self, owner, position, radius, planar=False):
+        """ Add a sphere and return its body id; contacts report owner """
+        if 2 * radius > self._cell_size:
+            raise Exception(f"Sphere radius {radius} is too large for cells of size {self._cell_size}")
+        if self._free_body_list:
+            body_id = self._free_body_list.pop()
+        else:
+            if self._body_count == len(self._position):
+                self._grow(2 * len(self._position))
+            body_id = self._body_count
+            self._body_count += 1
+        self._position[body_id] = position
+        self._radius[body_id] = radius
+        self._planar[body_id] = planar
+        self._alive[body_id] = True
+        self._owner_list[body_id] = owner
+        return body_id
+
+    def remove_body(self, body_id):
+        self._alive[body_id] = False
+        self._owner_list[body_id] = None
+        self._free_body_list.append(body_id)
+
+    def set_position(self, body_id, position):
+        self._position[body_id] = position
+
+    def add_box(self, owner, minimum, maximum):
+        """ Add a static box given by its minimum and maximum corners (may be infinite) """
+        self._box_list.append(([float(v) for v in minimum], [float(v) for v in maximum], owner))
+
+    def add_plane(self, owner, normal, distance):
+        """ Add a static plane normal . p = distance, solid on the side opposite to the normal """
+        self._plane_list.append(([float(v) for v in normal], float(distance), owner))
+
+    def _grow(self, capacity):
+        extra = capacity - len(self._position)
+        self._position = np.vstack([self._position, np.zeros((extra, 3))])
+        self._radius = np.concatenate([self._radius, np.zeros(extra)])
+        self._planar = np.concatenate([self._planar, np.zeros(extra, dtype=bool)])
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+        self._owner_list.extend([None] * extra)
+
+    def find_contact_ids(self):
+        """ Return arrays (a, b) of the body ids of all pairs of overlapping spheres """
+        body_ids = np.flatnonzero(self._alive[0:self._body_count])
+        position = self._position[body_ids]
+        if len(body_ids) <= self.GRID_MIN_BODY_COUNT:
+            first, second = self._all_pairs(len(body_ids))
+        else:
+            first, second = self._grid_pairs(position)
+
+        # Narrow phase: squared distance against squared sum of radii
+        difference = position[first] - position[second]
+        planar = self._planar[body_ids[first]] | self._planar[body_ids[second]]
+        difference[planar, 1] = 0
+        distance_squared = np.einsum("ij,ij->i", difference, difference)
+        radius_sum = self._radius[body_ids[first]] + self._radius[body_ids[second]]
+        touching = distance_squared < radius_sum * radius_sum
+        return body_ids[first[touching]], body_ids[second[touching]]
+
+    def _all_pairs(self, count):
+        if count not in self._all_pairs_cache:
+            self._all_pairs_cache[count] = np.triu_indices(count, 1)
+        return self._all_pairs_cache[count]
+
+    def _grid_pairs(self, position):
+        """ Candidate pairs (indices into position) of spheres in the same or neighbouring cells """
+        column = np.clip(((position[:, 0] - self._min_x) // self._cell_size).astype(int),
+                         0, self._column_count - 1)
+        row = np.clip(((position[:, 2] - self._min_z) // self._cell_size).astype(int),
+                      0, self._row_count - 1)
+        key = row * self._column_count + column
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+
+        # Cells to visit for every sphere, shape (offset count, sphere count)
+        neighbour_column = column + self._neighbour_offsets[:, 0:1]
+        neighbour_row = row + self._neighbour_offsets[:, 1:2]
+        neighbour_key = neighbour_row * self._column_count + neighbour_column
+        start = np.searchsorted(sorted_key, neighbour_key, side="left")
+        end = np.searchsorted(sorted_key, neighbour_key, side="right")
+        # Same cell: only spheres after this one in the sorted order, so each pair appears once
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        start[0] = np.maximum(start[0], rank + 1)
+        inside = (neighbour_column >= 0) & (neighbour_column < self._column_count) \
+            & (neighbour_row < self._row_count)
+        counts = np.where(inside, np.maximum(end - start, 0), 0).ravel()
+
+        # Expand the candidate ranges [start, end) into index pairs
+        total = counts.sum()
+        first = np.repeat(np.tile(np.arange(len(key)), len(self._neighbour_offsets)), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[np.repeat(start.ravel(), counts) + offsets]
+        return first, second
+
+    def find_contacts(self):
+        """ Return the list of (owner, owner) of all pairs of overlapping spheres """
+        first, second = self.find_contact_ids()
+        return [(self._owner_list[a], self._owner_list[b]) for a, b in zip(first.tolist(), second.tolist())]
+
+    def boxes_overlapping(self, center, radius=0):
+        """ Return the owners of the boxes that a sphere overlaps or touches, in the order they were added """
+        owner_list = []
+        for minimum, maximum, owner in self._box_list:
+            # Squared distance from the center to the closest point of the box
+            distance_squared = 0
+            for i in range(3):
+                if center[i] < minimum[i]:
+                    distance_squared += (minimum[i] - center[i]) ** 2
+                elif center[i] > maximum[i]:
+                    distance_squared += (center[i] - maximum[i]) ** 2
+            if distance_squared <= radius * radius:
+                owner_list.append(owner)
+        return owner_list
+
+    def sweep_planes(self, center, motion, radius):
+        """ First plane hit by a moving sphere: (time of impact, normal, owner), or None """
+        first_hit = None
+        for normal, distance, owner in self._plane_list:
+            time = sweep_sphere_plane(center, motion, radius, normal, distance)
+            if time is not None and (first_hit is None or time < first_hit[0]):
+                first_hit = (time, normal, owner)
+        return first_hit
+
+    def sweep_boxes(self, center, motion, radius=0):
+        """ First box met by a moving sphere: (time of impact, owner), or None """
+        first_hit = None
+        for minimum, maximum, owner in self._box_list:
+            time = sweep_sphere_box(center, motion, radius, minimum, maximum)
+            if time is not None and (first_hit is None or time < first_hit[0]):
+                first_hit = (time, owner)
+        return first_hit
@@ -0,0 +1,328 @@
+import math
+import random
+
+from constants import *
+from simulation.collision import CollisionWorld
+from simulation.match_settings import MatchSettings
+from simulation.match_state import MatchState, BoostBox, BALL_SCALE
+
+
+# Invisible walls around the field as planes (normal, distance): the ball stays on the side the normal points to
+WALL_THICKNESS = 5
+WALL_PLANES = [
+    ([1, 0, 0], -FIELD_WIDTH / 2),
+    ([-1, 0, 0], -FIELD_WIDTH / 2),
+    ([0, 0, 1], -FIELD_LENGTH / 2),
+    ([0, 0, -1], -FIELD_LENGTH / 2),
+]
+# Goal hitboxes (16 x 8) at both ends: the player scores in the first, the opponent in the second;
+# the goal lines are closer than the end walls, so the ball reaches a scoring zone first
+GOAL_POSITIONS = [[0, 0, -(FIELD_LENGTH / 2 - WALL_THICKNESS / 2 + 1)],
+                  [0, 0, (FIELD_LENGTH / 2 - WALL_THICKNESS / 2 + 1)]]
+GOAL_BOUNDS = [([x - 8, x + 8], [z - 4, z + 4]) for x, _, z in GOAL_POSITIONS]
+# Wall hits handled within one tick before the rest of the motion is dropped
+MAX_BALL_BOUNCES = 4
+# Points the AI drives the ball towards
+PLAYER_GOAL_POSITION = [0.5, 0.5, FIELD_LENGTH / 2]
+OPPONENT_GOAL_POSITION = [0.5, 0.5, -FIELD_LENGTH / 2]
+
+
+class MatchSimulation:
+    """
+    Match rules without rendering: jet-ski movement, ball physics, walls,
+    goals, boost boxes and the opponent AI, advanced one tick at a time.
+    The rendered game and headless batch runs use the same code.
+    """
+    def __init__(self, settings=None, seed=None):
+        self._settings = settings if settings is not None else MatchSettings()
+        self._state = MatchState()
+        # Boost box positions come from this generator, so a seed makes a match repeatable
+        self._random = random.Random(seed)
+        self._start()
+
+    def reset(self, settings=None, seed=None):
+        """
+        Start a new match on the same state objects, so the meshes attached to
+        their rigs stay in place. The settings are kept unless new ones are given.
+        Every boost box left on the field gets a ("boost_box_removed", box) event.
+        """
+        if settings is not None:
+            self._settings = settings
+        removed_box_list = list(self._state.boost_box_list)
+        self._state.reset()
+        self._random.seed(seed)
+        self._start()
+        self._event_list[0:0] = [("boost_box_removed", box) for box in removed_box_list]
+
+    def _start(self):
+        """ Collision world and bodies, kickoff and first boost box of a new match """
+        # Events since the last call of pop_events(): ("goal", player_scored),
+        # ("boost_box_spawned", box), ("boost_box_collected", box), ("boost_box_removed", box)
+        self._event_list = []
+        # Ball, jet skis and boost boxes are spheres of radius hitbox_buffer / 2, so two of them
+        # touch when their centers are closer than hitbox_buffer; walls are planes and the scoring zones boxes
+        self._collision_world = CollisionWorld(-FIELD_WIDTH / 2, FIELD_WIDTH / 2,
+                                               -FIELD_LENGTH / 2, FIELD_LENGTH / 2,
+                                               cell_size=max(2.0, self._settings.hitbox_buffer))
+        self._body_dict = {}
+        for owner in [self._state.ball, self._state.jet_ski, self._state.opponent]:
+            self._add_body(owner, owner.rig.global_position)
+        for i, ((min_x, max_x), (min_z, max_z)) in enumerate(GOAL_BOUNDS):
+            # The scoring zone lies 3 units behind the goal line
+            z_offset = -3 if i == 0 else 3
+            self._collision_world.add_box(i, [min_x, -math.inf, min_z + z_offset],
+                                          [max_x, math.inf, max_z + z_offset])
+        for i, (normal, distance) in enumerate(WALL_PLANES):
+            self._collision_world.add_plane(i, normal, distance)
+        self._place_ball()
+        self._spawn_boost_box()
+
+    @property
+    def settings(self):
+        return self._settings
+
+    @property
+    def state(self):
+        return self._state
+
+    def pop_events(self):
+        event_list = self._event_list
+        self._event_list = []
+        return event_list
+
+    def tick(self, controls, delta_time):
+        """
+        Advance the match by delta_time (in units of SECONDS_PER_TIME_UNIT).
+        With controls=None the player is driven by the AI as well.
+        """
+        state = self._state
+        state.time += delta_time * SECONDS_PER_TIME_UNIT
+        if controls is None:
+            self._drive_ai(state.jet_ski, OPPONENT_GOAL_POSITION, self._settings.player_difficulty, delta_time)
+        else:
+            self._drive_player(controls, delta_time)
+        contact_list = self._find_contacts()
+        self._update_ball(contact_list, delta_time)
+        self._update_boost_boxes(contact_list)
+        self._drive_ai(state.opponent, PLAYER_GOAL_POSITION, self._settings.opponent_difficulty, delta_time)
+        state.tick_count += 1
+
+    def run(self, seconds, tick_rate=60, controls=None):
+        """ Run ticks for the given number of simulated seconds """
+        delta_time = 1 / tick_rate / SECONDS_PER_TIME_UNIT
+        for _ in range(round(seconds * tick_rate)):
+            self.tick(controls, delta_time)
+
+    # Collisions
+
+    def _add_body(self, owner, position, planar=False):
+        radius = self._settings.hitbox_buffer / 2
+        self._body_dict[owner] = self._collision_world.add_sphere(owner, position, radius, planar)
+
+    def _remove_body(self, owner):
+        self._collision_world.remove_body(self._body_dict.pop(owner))
+
+    def _find_contacts(self):
+        """ Move the bodies of the ball and jet skis to their rigs and return this tick's contact list """
+        state = self._state
+        for owner in [state.ball, state.jet_ski, state.opponent]:
+            self._collision_world.set_position(self._body_dict[owner], owner.rig.global_position)
+        return self._collision_world.find_contacts()
+
+    @staticmethod
+    def _contacts_of(contact_list, owner):
+        """ Everything touching owner according to contact_list """
+        touching = []
+        for a, b in contact_list:
+            if a is owner:
+                touching.append(b)
+            elif b is owner:
+                touching.append(a)
+        return touching
+
+    # Jet skis
+
+    def _drive_player(self, controls, delta_time):
+        settings = self._settings
+        jet_ski = self._state.jet_ski
+        rig = jet_ski.rig
+        jet_ski.boosting = controls.boost and self._state.boost > 0
+        if jet_ski.boosting:
+            self._state.boost -= settings.boost_cost * delta_time
+            move_amount = settings.jetski_speed * settings.jetski_speed_boost * delta_time
+        else:
+            move_amount = settings.jetski_speed * delta_time
+        if jet_ski.is_jumping:
+            move_amount += settings.air_speed_boost * delta_time
+        rotate_amount = settings.jetski_turn_speed * (math.pi / 180) * delta_time
+
+        if controls.forward:
+            rig.translate(-move_amount, 0, 0)
+        if controls.backward:
+            rig.translate(move_amount, 0, 0)
+            if controls.left:
+                rig.rotate_y(-rotate_amount)
+            if controls.right:
+                rig.rotate_y(rotate_amount)
+        else:
+            if controls.left:
+                rig.rotate_y(rotate_amount)
+            if controls.right:
+                rig.rotate_y(-rotate_amount)
+
+        if controls.jump and not jet_ski.is_jumping:
+            jet_ski.is_jumping = True
+            jet_ski.jump_velocity = settings.jetski_jump_strength
+        if jet_ski.is_jumping:
+            self._update_jump(jet_ski, delta_time)
+
+    def _update_jump(self, jet_ski, delta_time):
+        settings = self._settings
+        position = jet_ski.rig.global_position
+        position[1] += jet_ski.jump_velocity * delta_time
+        jet_ski.jump_velocity += settings.ball_gravity * delta_time
+        if position[1] <= settings.ground:
+            position[1] = settings.ground
+            jet_ski.is_jumping = False
+            jet_ski.jump_velocity = 0
+        jet_ski.rig.set_position(position)
+
+    def _drive_ai(self, jet_ski, goal_position, difficulty, delta_time):
+        """ Drive behind the ball, on the line from the goal through the ball (hits come from the contact list) """
+        settings = self._settings
+        rig = jet_ski.rig
+        ball_position = self._state.ball.rig.global_position
+
+        direction_to_goal = [goal_position[i] - ball_position[i] for i in range(3)]
+        magnitude = math.sqrt(sum(d ** 2 for d in direction_to_goal))
+        if magnitude != 0:
+            direction_to_goal = [d / magnitude for d in direction_to_goal]
+        hit_position = [ball_position[i] - direction_to_goal[i] for i in range(3)]
+
+        rig.look_at(hit_position)
+        rig.rotate_y(math.pi * 1.5)
+        current_position = rig.global_position
+        rig.set_position([current_position[0], settings.ground, current_position[2]])
+        rig.translate(-settings.jetski_speed * difficulty * delta_time, 0, 0)
+
+    # Ball
+
+    def _hit_ball(self, jet_ski_position):
+        """ Send the ball away from a jet ski touching it """
+        settings = self._settings
+        ball = self._state.ball
+        ball_position = ball.rig.global_position
+        direction = [
+            ball_position[0] - jet_ski_position[0],
+            ball_position[1] - jet_ski_position[1] - 0.1,
+            ball_position[2] - jet_ski_position[2]
+        ]
+        magnitude = math.sqrt(sum(d ** 2 for d in direction))
+        if magnitude != 0:
+            direction = [d / magnitude for d in direction]
+        ball.velocity = [d * settings.ball_speed for d in direction]
+
+    def _update_ball(self, contact_list, delta_time):
+        settings = self._settings
+        ball = self._state.ball
+        touching = self._contacts_of(contact_list, ball)
+        # The player hits last, so wins a simultaneous hit
+        for jet_ski in [self._state.opponent, self._state.jet_ski]:
+            if jet_ski in touching:
+                self._hit_ball(jet_ski.rig.global_position)
+        ball_position = ball.rig.global_position
+
+        if ball_position[1] > settings.ball_ground:
+            ball.velocity[1] += settings.ball_gravity * delta_time
+        if ball.velocity[1] < 0 and ball_position[1] <= settings.ball_ground:
+            ball.rig.set_position([ball_position[0], settings.ball_ground, ball_position[2]])
+            ball.velocity[1] = -ball.velocity[1] * settings.ball_bounce
+
+        attrition = settings.ball_attrition ** delta_time
+        ball.velocity = [v * attrition for v in ball.velocity]
+        self._move_ball(delta_time)
+
+    def _move_ball(self, delta_time):
+        """
+        Sweep the ball along its motion: at a wall it reflects at the point of
+        contact and the rest of the motion continues from there; entering a
+        scoring zone (with its center) anywhere along the way is a goal.
+        """
+        ball = self._state.ball
+        world = self._collision_world
+        radius = self._settings.ball_radius
+        position = ball.rig.global_position
+        motion = [v * delta_time * BALL_SCALE for v in ball.velocity]
+        for _ in range(MAX_BALL_BOUNCES):
+            wall_hit = world.sweep_planes(position, motion, radius)
+            goal_hit = world.sweep_boxes(position, motion)
+            if goal_hit is not None and (wall_hit is None or goal_hit[0] <= wall_hit[0]):
+                self._goal_scored(player_scored=(goal_hit[1] == 0))
+                return
+            if wall_hit is None:
+                position = [position[i] + motion[i] for i in range(3)]
+                break
+            time, normal, _ = wall_hit
+            position = [position[i] + motion[i] * time for i in range(3)]
+            # Reflect the velocity and what is left of the motion
+            motion = [m * (1 - time) for m in motion]
+            motion_along_normal = sum(motion[i] * normal[i] for i in range(3))
+            velocity_along_normal = sum(ball.velocity[i] * normal[i] for i in range(3))
+            motion = [motion[i] - 2 * motion_along_normal * normal[i] for i in range(3)]
+            ball.velocity = [ball.velocity[i] - 2 * velocity_along_normal * normal[i] for i in range(3)]
+        ball.rig.set_position(position)
+
+    def _place_ball(self):
+        jitter = self._settings.kickoff_jitter
+        position = list(BALL_START_POSITION)
+        if jitter:
+            position[0] += self._random.uniform(-jitter, jitter)
+            position[2] += self._random.uniform(-jitter, jitter)
+        self._state.ball.rig.set_position(position)
+
+    # Goals
+
+    def _goal_scored(self, player_scored):
+        state = self._state
+        self._place_ball()
+        state.ball.velocity = [0, 0, 0]
+        state.jet_ski.rig.set_position(PLAYER_START_POSITION)
+        state.jet_ski.rig.set_rotate_y(math.pi * 1.75)
+        state.opponent.rig.set_position(OPPONENT_START_POSITION)
+        state.opponent.rig.set_rotate_y(math.pi * 1.75)
+        state.boost = 50
+        if player_scored:
+            state.score += 1
+        else:
+            state.opponent_score += 1
+        self._event_list.append(("goal", player_scored))
+
+    # Boost boxes
+
+    def _spawn_boost_box(self):
+        state = self._state
+        x = self._random.uniform(-FIELD_WIDTH / 2 + FIELD_WIDTH_OFFSET, FIELD_WIDTH / 2 - FIELD_WIDTH_OFFSET)
+        z = self._random.uniform(-FIELD_LENGTH / 2 + FIELD_LENGTH_OFFSET, FIELD_LENGTH / 2 - FIELD_LENGTH_OFFSET)
+        box = BoostBox(state.next_boost_box_id, [x, 0, z])
+        state.next_boost_box_id += 1
+        state.boost_box_list.append(box)
+        # Boxes are collected from any height
+        self._add_body(box, box.position, planar=True)
+        state.last_boost_box_time = state.time
+        self._event_list.append(("boost_box_spawned", box))
+
+    def _update_boost_boxes(self, contact_list):
+        settings = self._settings
+        state = self._state
+        if len(state.boost_box_list) < settings.boost_in_map_limit \
+                and state.time - state.last_boost_box_time >= settings.time_delay_spawn_boost:
+            self._spawn_boost_box()
+        # Only the player collects boxes, one per tick
+        touching = self._contacts_of(contact_list, state.jet_ski)
+        for box in state.boost_box_list:
+            if box in touching:
+                state.boost = min(state.boost + settings.boost_amount, settings.max_boost)
+                state.boost_box_list.remove(box)
+                self._remove_body(box)
+                self._event_list.append(("boost_box_collected", box))
+                break
@@ -0,0 +1,43 @@
+import constants
+
+
+class MatchSettings:
+    """
+    Rule constants of a match. Defaults are read from constants.py when the
+    settings are created (so values changed at runtime, e.g. the difficulty
+    chosen in the menu, are used); keyword arguments override them,
+    e.g. MatchSettings(ball_speed=10, ball_attrition=0.9).
+    Rates (attrition, costs, speeds) are per time unit, so they hold at any tick rate.
+    """
+    def __init__(self, **overrides):
+        self.ball_speed = constants.BALL_SPEED
+        self.ball_attrition = constants.BALL_ATTRITION
+        self.ball_gravity = constants.BALL_GRAVITY
+        self.ball_bounce = constants.BALL_BOUNCE
+        self.ball_ground = constants.BALL_GROUND
+        self.ball_radius = constants.BALL_RADIUS
+        self.hitbox_buffer = constants.HITBOX_BUFFER
+        self.ground = constants.GROUND
+        self.jetski_speed = constants.JETSKI_SPEED
+        self.jetski_speed_boost = constants.JETSKI_SPEED_BOOST
+        self.jetski_jump_strength = constants.JETSKI_JUMP_STRENGTH
+        self.jetski_turn_speed = constants.JETSKI_TURN_SPEED
+        self.air_speed_boost = constants.AIR_SPEED_BOOST
+        self.boost_cost = constants.BOOST_COST
+        self.boost_amount = constants.BOOST_AMOUNT
+        self.max_boost = constants.MAX_BOOST
+        self.boost_in_map_limit = constants.BOOST_IN_MAP_LIMIT
+        self.time_delay_spawn_boost = constants.TIME_DELAY_SPAWN_BOOST
+        self.opponent_difficulty = constants.OPPONENT_DIFFICULTY
+        # difficulty of the AI that drives the player in AI-vs-AI matches
+        self.player_difficulty = constants.OPPONENT_DIFFICULTY
+        # Random offset (up to this distance in x and z) of the ball at every kickoff;
+        # breaks the symmetry of AI-vs-AI matches, 0 in the game
+        self.kickoff_jitter = 0
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise Exception("Unknown match setting: " + name)
+            setattr(self, name, value)
+
+    def as_dict(self):
+        return dict(vars(self))
@@ -0,0 +1,97 @@
+import math
+
+from constants import *
+from core.matrix import Matrix
+from extras.movement_rig import MovementRig
+
+
+class Controls:
+    """ Player input for one simulation tick """
+    def __init__(self, forward=False, backward=False, left=False, right=False, jump=False, boost=False):
+        self.forward = forward
+        self.backward = backward
+        self.left = left
+        self.right = right
+        self.jump = jump
+        self.boost = boost
+
+    @staticmethod
+    def from_input(input_object):
+        """ Read the keys of the game from an Input object """
+        return Controls(forward=input_object.is_key_pressed("w"),
+                        backward=input_object.is_key_pressed("s"),
+                        left=input_object.is_key_pressed("a"),
+                        right=input_object.is_key_pressed("d"),
+                        jump=input_object.is_key_pressed("l"),
+                        boost=input_object.is_key_pressed("k"))
+
+
+# Scale of the ball rig; velocity is in the scaled units, so the ball moves BALL_SCALE * velocity
+BALL_SCALE = 0.3
+
+
+class BallState:
+    def __init__(self):
+        self.rig = MovementRig()
+        self.reset()
+
+    def reset(self):
+        """ Back to the kickoff; the rig is reset in place, so the meshes attached to it stay """
+        # The ball model is scaled by its rig, so translations of the rig are scaled as well
+        self.rig.local_matrix = Matrix.make_identity()
+        self.rig.scale(BALL_SCALE)
+        self.rig.set_position(BALL_START_POSITION)
+        self.velocity = [0, 0, 0]
+
+
+class JetSkiState:
+    def __init__(self, start_position, start_angle):
+        self.rig = MovementRig()
+        self.start_position = start_position
+        self.start_angle = start_angle
+        self.reset()
+
+    def reset(self):
+        """ Back to the start of a match; the rig is reset in place """
+        self.rig.local_matrix = Matrix.make_identity()
+        self.rig.rotate_y(self.start_angle)
+        self.rig.set_position(self.start_position)
+        self.is_jumping = False
+        self.jump_velocity = 0
+        # Was boost used in the last tick?
+        self.boosting = False
+
+
+class BoostBox:
+    def __init__(self, box_id, position):
+        self.box_id = box_id
+        # Position on the ground, [x, 0, z]
+        self.position = position
+
+
+class MatchState:
+    """
+    Everything that changes during a match. Transforms are kept in
+    MovementRig objects (numpy only, no OpenGL); the game adds its
+    meshes to these rigs, headless runs use them as they are.
+    """
+    def __init__(self):
+        self.ball = BallState()
+        self.jet_ski = JetSkiState(PLAYER_START_POSITION, math.pi * 1.5)
+        self.opponent = JetSkiState(OPPONENT_START_POSITION, math.pi / 2)
+        self.reset()
+
+    def reset(self):
+        """ Start a new match with the same rigs """
+        self.ball.reset()
+        self.jet_ski.reset()
+        self.opponent.reset()
+        self.boost = 100
+        self.score = 0
+        self.opponent_score = 0
+        self.boost_box_list = []
+        self.next_boost_box_id = 0
+        # simulated seconds since the start of the match
+        self.time = 0
+        self.last_boost_box_time = 0
+        self.tick_count = 0
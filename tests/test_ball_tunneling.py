@@ -0,0 +1,166 @@
+"""
+Swept collisions of the ball: time of impact against planes and boxes, and
+balls fired at the walls and goals of a headless match at extreme speeds and
+coarse tick rates. Run from the repository root:
+    python -m pytest tests
+"""
+import math
+import random
+
+import pytest
+
+from constants import FIELD_WIDTH, FIELD_LENGTH, BALL_GROUND, SECONDS_PER_TIME_UNIT
+from simulation.collision import CollisionWorld, sweep_sphere_plane, sweep_sphere_box
+from simulation.match import MatchSimulation
+from simulation.match_settings import MatchSettings
+from simulation.match_state import Controls, BALL_SCALE
+
+
+# Plane x = 0, solid for x < 0
+PLANE_NORMAL = [1, 0, 0]
+PLANE_DISTANCE = 0
+
+
+def test_plane_time_of_impact():
+    # The sphere touches the plane when its center reaches x = 1, 4 of the 10 units along
+    assert sweep_sphere_plane([5, 0, 0], [-10, 0, 0], 1, PLANE_NORMAL, PLANE_DISTANCE) == pytest.approx(0.4)
+    assert sweep_sphere_plane([5, 0, 0], [-10, 7, 3], 1, PLANE_NORMAL, PLANE_DISTANCE) == pytest.approx(0.4)
+
+
+def test_plane_missed():
+    # Stops short of the plane, moves away from it
+    assert sweep_sphere_plane([5, 0, 0], [-3, 0, 0], 1, PLANE_NORMAL, PLANE_DISTANCE) is None
+    assert sweep_sphere_plane([5, 0, 0], [3, 0, 0], 1, PLANE_NORMAL, PLANE_DISTANCE) is None
+
+
+def test_plane_grazing_motion():
+    # Moving parallel to the plane, just touching it or just clear of it, is not a hit
+    assert sweep_sphere_plane([1, 0, 0], [0, 0, 50], 1, PLANE_NORMAL, PLANE_DISTANCE) is None
+    assert sweep_sphere_plane([1.001, 0, 0], [0, 0, 50], 1, PLANE_NORMAL, PLANE_DISTANCE) is None
+    # Ending exactly in contact is not a hit either
+    assert sweep_sphere_plane([5, 0, 0], [-4, 0, 0], 1, PLANE_NORMAL, PLANE_DISTANCE) is None
+
+
+def test_plane_start_overlapping():
+    # Overlapping at the start: a hit at once when moving further in, none when moving out or along
+    assert sweep_sphere_plane([0.5, 0, 0], [-1, 0, 0], 1, PLANE_NORMAL, PLANE_DISTANCE) == 0.0
+    assert sweep_sphere_plane([0.5, 0, 0], [1, 0, 0], 1, PLANE_NORMAL, PLANE_DISTANCE) is None
+    assert sweep_sphere_plane([0.5, 0, 0], [0, 0, 1], 1, PLANE_NORMAL, PLANE_DISTANCE) is None
+
+
+def test_box_time_of_impact():
+    minimum, maximum = [-1, -1, -1], [1, 1, 1]
+    # A point reaches the face x = -1 a quarter of the way
+    assert sweep_sphere_box([-3, 0, 0], [8, 0, 0], 0, minimum, maximum) == pytest.approx(0.25)
+    # A sphere of radius 1 touches it one unit earlier
+    assert sweep_sphere_box([-3, 0, 0], [8, 0, 0], 1, minimum, maximum) == pytest.approx(0.125)
+    # Diagonal motion enters when the last axis enters
+    assert sweep_sphere_box([-3, -5, 0], [8, 8, 0], 0, minimum, maximum) == pytest.approx(0.5)
+
+
+def test_box_missed():
+    minimum, maximum = [-1, -1, -1], [1, 1, 1]
+    assert sweep_sphere_box([-3, 0, 0], [1, 0, 0], 0, minimum, maximum) is None
+    assert sweep_sphere_box([-3, 3, 0], [8, 0, 0], 0, minimum, maximum) is None
+    assert sweep_sphere_box([-3, 0, 0], [-8, 0, 0], 0, minimum, maximum) is None
+
+
+def test_box_grazing_motion():
+    minimum, maximum = [-1, -1, -1], [1, 1, 1]
+    # Sliding along the face y = 1 (grown by the radius) touches the box; just above it does not
+    assert sweep_sphere_box([-3, 1.5, 0], [8, 0, 0], 0.5, minimum, maximum) == pytest.approx(1.5 / 8)
+    assert sweep_sphere_box([-3, 1.501, 0], [8, 0, 0], 0.5, minimum, maximum) is None
+
+
+def test_box_start_overlapping():
+    minimum, maximum = [-1, -1, -1], [1, 1, 1]
+    assert sweep_sphere_box([0, 0, 0], [5, 0, 0], 0, minimum, maximum) == 0.0
+    assert sweep_sphere_box([1.2, 0, 0], [5, 0, 0], 0.5, minimum, maximum) == 0.0
+    assert sweep_sphere_box([0, 0, 0], [0, 0, 0], 0, minimum, maximum) == 0.0
+
+
+def test_box_infinite_bounds():
+    # A scoring zone: any height
+    minimum, maximum = [-8, -math.inf, 10], [8, math.inf, 18]
+    assert sweep_sphere_box([0, 1000, 0], [0, 0, 20], 0, minimum, maximum) == pytest.approx(0.5)
+    assert sweep_sphere_box([0, -1e9, 12], [0, 5, 0], 0, minimum, maximum) == 0.0
+    assert sweep_sphere_box([20, 0, 0], [0, 0, 20], 0, minimum, maximum) is None
+    assert sweep_sphere_box([0, 0, 0], [0, 0, 20], 1, minimum, maximum) == pytest.approx(0.45)
+
+
+def test_world_returns_first_hit():
+    world = CollisionWorld(-10, 10, -10, 10)
+    world.add_plane("left", [1, 0, 0], -10)
+    world.add_plane("right", [-1, 0, 0], -10)
+    world.add_box("near", [2, -math.inf, -1], [3, math.inf, 1])
+    world.add_box("far", [6, -math.inf, -1], [7, math.inf, 1])
+    time, normal, owner = world.sweep_planes([0, 0, 0], [40, 0, 0], 1)
+    assert owner == "right" and normal == [-1, 0, 0] and time == pytest.approx(9 / 40)
+    time, owner = world.sweep_boxes([0, 0, 0], [40, 0, 0])
+    assert owner == "near" and time == pytest.approx(2 / 40)
+    time, owner = world.sweep_boxes([0, 0, 0], [40, 0, 0], 0.5)
+    assert owner == "near" and time == pytest.approx(1.5 / 40)
+    assert world.sweep_planes([0, 0, 0], [1, 0, 5], 1) is None
+    assert world.sweep_boxes([0, 0, 0], [-5, 0, 0]) is None
+
+
+def new_match():
+    """ A match whose jet skis stay where they are, so only walls and goals act on the ball """
+    return MatchSimulation(MatchSettings(opponent_difficulty=0), seed=0)
+
+
+def fire(match, position, velocity):
+    match.state.ball.rig.set_position(position)
+    match.state.ball.velocity = list(velocity)
+    match.pop_events()
+
+
+@pytest.mark.parametrize("tick_rate", [60, 5, 1])
+def test_ball_reflects_at_the_contact_point(tick_rate):
+    match = new_match()
+    radius = match.settings.ball_radius
+    wall = FIELD_WIDTH / 2 - radius
+    start = [30, BALL_GROUND, 25]
+    delta_time = 1 / tick_rate / SECONDS_PER_TIME_UNIT
+    # About 20 units in one tick: past the wall, but not as far as the other one
+    fire(match, start, [20 / (delta_time * BALL_SCALE), 0, 0])
+    match.run(1 / tick_rate, tick_rate=tick_rate, controls=Controls())
+    position = match.state.ball.rig.global_position
+    velocity = match.state.ball.velocity
+    # Velocity is reflected off the wall; the ball covers the whole motion of the tick,
+    # turning back at the wall
+    assert velocity[0] < 0 and velocity[1] == 0 and velocity[2] == 0
+    motion = -velocity[0] * delta_time * BALL_SCALE
+    assert start[0] + motion > wall
+    assert position[0] == pytest.approx(wall - (start[0] + motion - wall))
+    assert position[2] == pytest.approx(start[2])
+
+
+def test_ball_scores_instead_of_passing_the_goal():
+    match = new_match()
+    # Straight at the player's goal (at -z), covering the whole field in one tick
+    fire(match, [0.5, BALL_GROUND, 20], [0, 0, -1000])
+    match.run(1, tick_rate=1, controls=Controls())
+    assert match.state.score == 1
+    assert match.state.opponent_score == 0
+
+
+@pytest.mark.parametrize("speed", [80, 800, 8000])
+@pytest.mark.parametrize("tick_rate", [20, 5])
+def test_fast_balls_stay_in_the_field(speed, tick_rate):
+    match = new_match()
+    radius = match.settings.ball_radius
+    delta_time = 1 / tick_rate / SECONDS_PER_TIME_UNIT
+    generator = random.Random(speed * tick_rate)
+    for _ in range(40):
+        position = [generator.uniform(-FIELD_WIDTH / 2 + 1, FIELD_WIDTH / 2 - 1), BALL_GROUND,
+                    generator.uniform(-FIELD_LENGTH / 2 + 8, FIELD_LENGTH / 2 - 8)]
+        angle = generator.uniform(0, 2 * math.pi)
+        fire(match, position, [speed * math.cos(angle), 0, speed * math.sin(angle)])
+        for _ in range(2 * tick_rate):
+            match.tick(Controls(), delta_time)
+            if any(event[0] == "goal" for event in match.pop_events()):
+                break
+            x, _, z = match.state.ball.rig.global_position
+            assert abs(x) <= FIELD_WIDTH / 2 - radius + 1e-6
+            assert abs(z) <= FIELD_LENGTH / 2 - radius + 1e-6
@@ -0,0 +1,55 @@
+"""
+Starting a match from the menu: the match uses the settings chosen in the menu,
+the first one included. Main is built without a window, with stand-ins for the
+level objects. Run from the repository root:
+    python -m pytest tests
+"""
+import constants
+import main
+from core_ext.interpolator import TransformInterpolator
+from simulation.match import MatchSimulation
+
+
+class LevelObjects:
+    """ Stand-in for ObjectCreator: boost boxes get no models """
+    def create_boost_box(self, position):
+        return None, None
+
+    def remove_box(self, box_rig, circle_rig):
+        pass
+
+
+def new_game():
+    """ Main after initialize() and create_objects(), as far as play() needs it """
+    game = main.Main.__new__(main.Main)
+    game.match = MatchSimulation()
+    game.objects = LevelObjects()
+    game.boost_box_rigs = {}
+    game.interpolator = TransformInterpolator()
+    game.match_played = False
+    game.boost_camera = 0
+    game.app_state = main.Main.MENU
+    return game
+
+
+def test_first_play_uses_menu_difficulty(monkeypatch):
+    # No particle system is needed
+    monkeypatch.setattr(main, "LOW_SPEC", True)
+    game = new_game()
+    difficulty = constants.DIFFICULTY_LEVELS["hard"]
+    assert game.match.settings.opponent_difficulty != difficulty
+    # Chosen in the menu after the match was created
+    monkeypatch.setattr(constants, "OPPONENT_DIFFICULTY", difficulty)
+    game.play()
+    assert game.app_state == main.Main.PLAYING
+    assert game.match.settings.opponent_difficulty == difficulty
+
+
+def test_play_again_uses_menu_difficulty(monkeypatch):
+    monkeypatch.setattr(main, "LOW_SPEC", True)
+    game = new_game()
+    game.play()
+    difficulty = constants.DIFFICULTY_LEVELS["easy"]
+    monkeypatch.setattr(constants, "OPPONENT_DIFFICULTY", difficulty)
+    game.play()
+    assert game.match.settings.opponent_difficulty == difficulty
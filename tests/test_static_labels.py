@@ -0,0 +1,67 @@
+"""
+The red and blue labels over the goals: when they do not turn, StaticBatcher
+merges them into one static batch, as ObjectCreator does once the level is
+built. Needs an OpenGL 3.3 context, from a hidden pygame window; skipped
+without one. Run from the repository root:
+    python -m pytest tests
+"""
+import types
+
+import OpenGL.GL as GL
+import pygame
+import pytest
+
+import all_objects
+from all_objects import ObjectCreator
+from core.program_cache import ProgramCache
+from core_ext.scene import Scene
+from core_ext.static_batcher import StaticBatcher
+from core_ext.texture_cache import TextureCache
+
+
+@pytest.fixture(scope="module")
+def gl_context():
+    pygame.display.init()
+    pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MAJOR_VERSION, 3)
+    pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MINOR_VERSION, 3)
+    pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, pygame.GL_CONTEXT_PROFILE_CORE)
+    try:
+        pygame.display.set_mode((64, 64), pygame.OPENGL | pygame.HIDDEN)
+    except pygame.error as error:
+        pytest.skip(f"no OpenGL context: {error}")
+    # PyOpenGL loads functions through its platform (GLX, EGL, ...), which must match
+    # the context of the SDL video driver (e.g. PYOPENGL_PLATFORM=egl for offscreen)
+    if not GL.glProgramBinary:
+        pygame.display.quit()
+        pytest.skip("OpenGL functions cannot be loaded for this context")
+    yield
+    pygame.display.quit()
+    # The shared programs and textures went with the context
+    ProgramCache.clear()
+    TextureCache.clear()
+
+
+def new_labels():
+    """ ObjectCreator with only its labels, in a scene of their own """
+    creator = ObjectCreator.__new__(ObjectCreator)
+    creator.example = types.SimpleNamespace(scene=Scene())
+    creator.create_labels()
+    return creator
+
+
+def test_still_labels_are_batched(gl_context, monkeypatch):
+    monkeypatch.setattr(all_objects, "LABELS_TURN", False)
+    creator = new_labels()
+    static_batches = StaticBatcher.batch(creator.example.scene)
+    assert len(static_batches) == 1
+    # Both quads are in the batch, and the labels left the scene
+    assert static_batches[0].geometry.vertex_count == 12
+    assert creator.red.parent is None and creator.blue.parent is None
+    assert creator.example.scene.mesh_list == static_batches
+
+
+def test_turning_labels_are_not_batched(gl_context, monkeypatch):
+    monkeypatch.setattr(all_objects, "LABELS_TURN", True)
+    creator = new_labels()
+    assert StaticBatcher.batch(creator.example.scene) == []
+    assert creator.red.parent is creator.example.scene and creator.blue.parent is creator.example.scene
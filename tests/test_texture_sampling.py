@@ -0,0 +1,135 @@
+"""
+Software-rasterizer check of baked textures: a textured ground plane that
+recedes to the horizon is rendered on the CPU with trilinear mipmap
+sampling (the filtering of GL_LINEAR_MIPMAP_LINEAR), once with the mip chain
+the runtime used to build (full image uploaded, glGenerateMipmap, emulated
+with box-filtered floating-point PIL resizes), and once with each mip chain written by
+TextureBaker (RGBA8 and BC1) and read back through its memory-mapped loader.
+The baked renders must match the first closely enough. Run from the repository root:
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from core_ext.texture import Texture
+from core_ext.texture_baker import TextureBaker
+
+
+IMAGE_SIZE = 64
+VIEW_WIDTH = 160
+VIEW_HEIGHT = 120
+CAMERA_HEIGHT = 1.0
+# World units covered by one repetition of the texture
+TILE_SIZE = 4.0
+MINIMUM_PSNR = {"RGBA8": 40.0, "BC1": 28.0}
+
+
+def generated_mip_chain(pixel_data):
+    """
+    The chain glGenerateMipmap approximates: every level box-filtered from level 0,
+    in floating point, rounded once
+    """
+    level_list = [pixel_data]
+    channel_list = [Image.fromarray(pixel_data[:, :, i].astype(np.float32), "F") for i in range(4)]
+    for width, height in TextureBaker.level_sizes(pixel_data.shape[1], pixel_data.shape[0])[1:]:
+        level = np.stack([np.asarray(channel.resize((width, height), Image.Resampling.BOX))
+                          for channel in channel_list], axis=-1)
+        level_list.append((level + 0.5).astype(np.uint8))
+    return level_list
+
+
+def ground_coordinates():
+    """ Texture coordinates of the ground under every pixel below the horizon, and their screen derivatives """
+    aspect_ratio = VIEW_WIDTH / VIEW_HEIGHT
+    x = (np.arange(VIEW_WIDTH) + 0.5) / VIEW_WIDTH * 2 - 1
+    y = 1 - (np.arange(VIEW_HEIGHT) + 0.5) / VIEW_HEIGHT * 2
+    screen_x, screen_y = np.meshgrid(x * aspect_ratio, y)
+    # Only the lower half sees the ground; 90 degree vertical field of view
+    screen_y = np.minimum(screen_y, -0.5 / VIEW_HEIGHT)
+    distance = CAMERA_HEIGHT / -screen_y
+    u = screen_x * distance / TILE_SIZE
+    v = distance / TILE_SIZE
+    derivatives = [np.gradient(coordinate, axis=axis) for coordinate in (u, v) for axis in (1, 0)]
+    return u, v, derivatives
+
+
+def sample_bilinear(level, u, v):
+    """ GL_LINEAR sampling with GL_REPEAT wrapping """
+    height, width = level.shape[0:2]
+    x = u * width - 0.5
+    y = v * height - 0.5
+    x0 = np.floor(x).astype(np.int64)
+    y0 = np.floor(y).astype(np.int64)
+    fx = (x - x0)[..., None]
+    fy = (y - y0)[..., None]
+    level = level.astype(np.float32)
+
+    def texel(dx, dy):
+        return level[(y0 + dy) % height, (x0 + dx) % width]
+
+    top = texel(0, 0) * (1 - fx) + texel(1, 0) * fx
+    bottom = texel(0, 1) * (1 - fx) + texel(1, 1) * fx
+    return top * (1 - fy) + bottom * fy
+
+
+def render(level_list):
+    """ GL_LINEAR_MIPMAP_LINEAR sampling of the ground plane """
+    u, v, (du_dx, du_dy, dv_dx, dv_dy) = ground_coordinates()
+    height, width = level_list[0].shape[0:2]
+    rho = np.maximum(np.hypot(du_dx * width, dv_dx * height), np.hypot(du_dy * width, dv_dy * height))
+    lod = np.clip(np.log2(np.maximum(rho, 1e-8)), 0, len(level_list) - 1)
+    lower = np.floor(lod).astype(np.int64)
+    fraction = (lod - lower)[..., None]
+    image = np.zeros((VIEW_HEIGHT, VIEW_WIDTH, 4), dtype=np.float32)
+    for level_index in np.unique(lower):
+        rows = lower == level_index
+        upper_index = min(level_index + 1, len(level_list) - 1)
+        first = sample_bilinear(level_list[level_index], u[rows], v[rows])
+        second = sample_bilinear(level_list[upper_index], u[rows], v[rows])
+        image[rows] = first * (1 - fraction[rows]) + second * fraction[rows]
+    return image
+
+
+def psnr(image, reference):
+    error = np.mean((image[..., 0:3] - reference[..., 0:3]) ** 2)
+    return float("inf") if error == 0 else 10 * np.log10(255 ** 2 / error)
+
+
+@pytest.fixture
+def image_filename(tmp_path):
+    """
+    A small tileable image like the water textures: waves of light and a finer
+    ripple on a blue tint, which shifts slowly (BC1 blocks keep one color line)
+    """
+    angle = np.arange(IMAGE_SIZE) / IMAGE_SIZE * 2 * np.pi
+    x, y = np.meshgrid(angle, angle)
+    light = 0.5 + 0.3 * np.sin(x) * np.cos(2 * y) + 0.15 * np.sin(3 * x + y) + 0.15 * np.sin(8 * x)
+    rgb = light[..., None] * [72, 168, 240] + np.cos(y)[..., None] * [20, 10, 0]
+    filename = str(tmp_path / "waves.png")
+    Image.fromarray(np.clip(rgb + 0.5, 0, 255).astype(np.uint8), "RGB").save(filename)
+    return filename
+
+
+def baked_levels(filename, compress):
+    """ Bake the image, then read it back as the runtime does """
+    TextureBaker.bake(filename, compress=compress)
+    level_list, compressed = TextureBaker.read(filename, compression_supported=True)
+    assert compressed == compress
+    if compressed:
+        level_list = [(width, height, TextureBaker.decompress_bc1(data, width, height))
+                      for width, height, data in level_list]
+    return [data for _, _, data in level_list]
+
+
+@pytest.mark.parametrize("name, compress", [("RGBA8", False), ("BC1", True)])
+def test_baked_mip_chain_matches_generated_mipmaps(image_filename, name, compress):
+    reference = render(generated_mip_chain(Texture.decode_image(image_filename)))
+    assert psnr(render(baked_levels(image_filename, compress)), reference) >= MINIMUM_PSNR[name]
+
+
+def test_level_0_only_is_worse(image_filename):
+    # Without mipmaps the distant ground aliases, which the baked chains avoid
+    pixel_data = Texture.decode_image(image_filename)
+    reference = render(generated_mip_chain(pixel_data))
+    assert psnr(render([pixel_data]), reference) < MINIMUM_PSNR["RGBA8"]